@@ -0,0 +1,157 @@
+"""
+Admission control for orders.
+
+AdmissionController keeps in-flight orders and open positions per instrument in memory and decides,
+under one lock and without touching the browser, whether another order may start. Open positions
+are reconciled from positions snapshots; fills reported after a snapshot began are kept on top of
+it until a later snapshot covers them, so the count errs on the high side, never the low one.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class AdmissionController:
+    def __init__(self, max_positions: int = 4, max_inflight: int = None, max_per_instrument: int = None,
+                 instrument_limits: dict = None):
+        """
+        max_positions: cap on open positions + in-flight orders across all instruments (None = no cap).
+        max_inflight: cap on orders being placed at once across all instruments (None = no cap).
+        max_per_instrument: cap on open + in-flight per instrument; instrument_limits overrides it
+        per instrument, e.g. {'SOL': 1}.
+        """
+        self.max_positions = max_positions
+        self.max_inflight = max_inflight
+        self.max_per_instrument = max_per_instrument
+        self.instrument_limits = dict(instrument_limits or {})
+        self._cond = threading.Condition()
+        self._inflight = {}        # instrument -> orders between admit() and release()
+        self._open = {}            # instrument -> open positions (last snapshot + unconfirmed fills)
+        self._fills = deque()      # (released_at, instrument) fills not yet covered by a snapshot
+        self._inflight_total = 0
+        self._open_total = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.rejected_by = {'inflight': 0, 'positions': 0, 'instrument': 0}
+
+    @classmethod
+    def from_config(cls, **kwargs):
+        from config import (ADMISSION_MAX_POSITIONS, ADMISSION_MAX_INFLIGHT, ADMISSION_MAX_PER_INSTRUMENT,
+                            ADMISSION_INSTRUMENT_LIMITS)
+        params = dict(max_positions=ADMISSION_MAX_POSITIONS, max_inflight=ADMISSION_MAX_INFLIGHT,
+                      max_per_instrument=ADMISSION_MAX_PER_INSTRUMENT, instrument_limits=ADMISSION_INSTRUMENT_LIMITS)
+        params.update(kwargs)
+        return cls(**params)
+
+    def limit_for(self, instrument: str):
+        return self.instrument_limits.get(instrument, self.max_per_instrument)
+
+    def _blocked(self, instrument: str):
+        """Which cap admitting one more order on `instrument` would exceed, or None. Caller holds the lock."""
+        if self.max_inflight is not None and self._inflight_total >= self.max_inflight:
+            return 'inflight'
+        if self.max_positions is not None and self._inflight_total + self._open_total >= self.max_positions:
+            return 'positions'
+        limit = self.limit_for(instrument)
+        if limit is not None and self._inflight.get(instrument, 0) + self._open.get(instrument, 0) >= limit:
+            return 'instrument'
+        return None
+
+    def admit(self, instrument: str, wait: float = 0.0):
+        """Reserve an in-flight slot for one order. Returns None when admitted (release() must follow),
+        else the reason it was rejected. wait > 0 waits up to that many seconds for capacity to free up."""
+        with self._cond:
+            blocked = self._blocked(instrument)
+            if blocked is not None and wait > 0:
+                deadline = time.monotonic() + wait
+                while blocked is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                    blocked = self._blocked(instrument)
+            if blocked is not None:
+                self.rejected += 1
+                self.rejected_by[blocked] += 1
+                return self._reason(blocked, instrument)
+            self._inflight[instrument] = self._inflight.get(instrument, 0) + 1
+            self._inflight_total += 1
+            self.accepted += 1
+            return None
+
+    def _reason(self, blocked: str, instrument: str) -> str:
+        if blocked == 'inflight':
+            return f"Max in-flight orders reached ({self.max_inflight})"
+        if blocked == 'positions':
+            return f"Max positions reached ({self.max_positions})"
+        return f"Max {instrument} positions reached ({self.limit_for(instrument)})"
+
+    def release(self, instrument: str, filled: bool):
+        """End an admitted order; a fill counts as an open position until a snapshot takes over."""
+        with self._cond:
+            n = self._inflight.get(instrument, 0)
+            if n <= 0:
+                return
+            self._inflight[instrument] = n - 1
+            self._inflight_total -= 1
+            if filled:
+                self._open[instrument] = self._open.get(instrument, 0) + 1
+                self._open_total += 1
+                self._fills.append((time.monotonic(), instrument))
+            self._cond.notify_all()
+
+    def closed(self, instrument: str, count: int = 1):
+        """A position was closed outside a snapshot (stop-loss, manual close)."""
+        with self._cond:
+            count = min(count, self._open.get(instrument, 0))
+            if count <= 0:
+                return
+            self._open[instrument] -= count
+            self._open_total = max(0, self._open_total - count)
+            self._cond.notify_all()
+
+    def sync_positions(self, counts: dict, taken_at: float):
+        """Replace open-position counts with a snapshot {instrument: n} that started at monotonic
+        time taken_at. Fills released after taken_at may be missing from it and are kept on top."""
+        with self._cond:
+            while self._fills and self._fills[0][0] < taken_at:
+                self._fills.popleft()
+            opened = dict(counts)
+            for _, instrument in self._fills:
+                opened[instrument] = opened.get(instrument, 0) + 1
+            self._open = opened
+            self._open_total = sum(opened.values())
+            self._cond.notify_all()
+
+    def sync_total(self, total: int, taken_at: float):
+        """Like sync_positions for a snapshot whose rows don't all name their instrument: only the
+        open total is replaced (plus fills released after taken_at). Per-instrument counts keep what
+        fills and closes made them, capped at the new total."""
+        with self._cond:
+            while self._fills and self._fills[0][0] < taken_at:
+                self._fills.popleft()
+            self._open_total = total + len(self._fills)
+            self._open = {k: min(n, self._open_total) for k, n in self._open.items()}
+            self._cond.notify_all()
+
+    def at_capacity(self, instrument: str) -> bool:
+        with self._cond:
+            return self._blocked(instrument) is not None
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'rejected_by': dict(self.rejected_by),
+                'inflight': self._inflight_total,
+                'open': self._open_total,
+                'per_instrument': {k: {'inflight': self._inflight.get(k, 0), 'open': self._open.get(k, 0)}
+                                   for k in set(self._inflight) | set(self._open)},
+            }
+
+    def summary_line(self) -> str:
+        st = self.stats()
+        cap = self.max_positions if self.max_positions is not None else '-'
+        return f"slots {st['inflight'] + st['open']}/{cap} admitted {st['accepted']} rejected {st['rejected']}"
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: P&L and stop-loss / trailing evaluation per price tick, a loop over bet dicts (what
+refresh_positions did per position) vs. PositionBook's vectorised mark + risk mask.
+Positions are synthetic, spread over a few instruments; every tick moves every instrument.
+
+Usage: python bench_position_book.py [--positions 10000] [--ticks 200] [--instruments BTC,ETH,SOL]
+"""
+
+import argparse
+import random
+import time
+
+from position_book import PositionBook
+
+START_PRICES = {'BTC': 64000.0, 'ETH': 3100.0, 'SOL': 150.0}
+
+
+def synth_positions(n: int, instruments, seed: int = 7):
+    rng = random.Random(seed)
+    bets = []
+    for i in range(n):
+        inst = instruments[i % len(instruments)]
+        entry = START_PRICES.get(inst, 100.0) * (1 + rng.uniform(-0.002, 0.002))
+        bets.append({
+            'id': f'p{i}',
+            'instrument': inst,
+            'direction': rng.choice(('up', 'down')),
+            'entry_price': entry,
+            'current_price': entry,
+            'wager': rng.choice((0.1, 0.5, 1.0, 5.0)),
+            'multiplier': rng.choice((10, 100, 500, 1000)),
+            'pnl': 0.0,
+        })
+    return bets
+
+
+def synth_ticks(n: int, instruments, seed: int = 11):
+    rng = random.Random(seed)
+    prices = {inst: START_PRICES.get(inst, 100.0) for inst in instruments}
+    ticks = []
+    for _ in range(n):
+        prices = {inst: p * (1 + rng.gauss(0, 0.00005)) for inst, p in prices.items()}
+        ticks.append(prices)
+    return ticks
+
+
+def run_dicts(bets, ticks, buffer: float):
+    """Per-position loop with the same rules: P&L from the mark, peak, stop-loss, trailing."""
+    peaks = {bet['id']: bet['pnl'] for bet in bets}
+    hits = set()
+    start = time.perf_counter()
+    for prices in ticks:
+        hits = set()
+        for bet in bets:
+            price = prices.get(bet['instrument'])
+            if not price or bet['entry_price'] <= 0:
+                continue
+            side = 1 if bet['direction'] == 'up' else -1
+            pnl = max(side * (price / bet['entry_price'] - 1.0) * bet['wager'] * bet['multiplier'], -bet['wager'])
+            bet['pnl'] = pnl
+            peak = peaks[bet['id']]
+            if pnl > peak:
+                peak = peaks[bet['id']] = pnl
+            if pnl <= -0.01 or (peak >= 0.01 and pnl < peak - buffer):
+                hits.add(bet['id'])
+    return time.perf_counter() - start, hits
+
+
+def run_book(bets, ticks, buffer: float):
+    book = PositionBook()
+    book.sync(bets)
+    mask = None
+    start = time.perf_counter()
+    for prices in ticks:
+        book.mark(prices)
+        mask = book.risk_mask(trail_buffer=buffer)
+    elapsed = time.perf_counter() - start
+    return elapsed, {book.ids[r] for r in range(len(book)) if mask[r]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--positions', type=int, default=10000)
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--instruments', default='BTC,ETH,SOL')
+    parser.add_argument('--buffer', type=float, default=0.02, help='trailing stop buffer')
+    args = parser.parse_args()
+
+    instruments = [s.strip().upper() for s in args.instruments.split(',') if s.strip()]
+    ticks = synth_ticks(args.ticks, instruments)
+    book_s, book_hits = run_book(synth_positions(args.positions, instruments), ticks, args.buffer)
+    dict_s, dict_hits = run_dicts(synth_positions(args.positions, instruments), ticks, args.buffer)
+
+    print(f"positions={args.positions} instruments={len(instruments)} ticks={args.ticks}")
+    print(f"  dict loop  {dict_s * 1e6 / args.ticks:>10.0f} us/tick")
+    print(f"  book       {book_s * 1e6 / args.ticks:>10.0f} us/tick")
+    print(f"  triggered on last tick: {len(book_hits)} (identical: {book_hits == dict_hits})")
+    if book_s > 0:
+        print(f"  speedup: {dict_s / book_s:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
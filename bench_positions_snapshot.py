@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: positions refresh via one-round-trip snapshot vs. per-element WebDriver scrape.
+Runs TradingInterface.get_active_bets against a fake driver that counts WebDriver calls
+and optionally sleeps per call to emulate chromedriver HTTP latency. No browser needed.
+
+Usage: python bench_positions_snapshot.py [--positions 4] [--latency-ms 3] [--repeat 20]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import config
+from trading_interface import TradingInterface
+
+HEADERS = ['Direction', 'Entry Price', 'Current Price', 'Wager', 'Multiplier', 'P&L', 'Cash Out']
+
+
+class CallCounter:
+    def __init__(self, latency_s: float):
+        self.calls = 0
+        self.latency_s = latency_s
+
+    def hit(self):
+        self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+
+class FakeElement:
+    def __init__(self, counter, text='', attrs=None, children=None, tag='div'):
+        self._counter = counter
+        self._text = text
+        self._attrs = attrs or {}
+        self._children = children or []
+        self.tag = tag
+
+    @property
+    def text(self):
+        self._counter.hit()
+        return self._text
+
+    def get_attribute(self, name):
+        self._counter.hit()
+        return self._attrs.get(name)
+
+    def find_elements(self, by, value):
+        self._counter.hit()
+        if value == 'td':
+            return [c for c in self._children if c.tag == 'td']
+        if value == './/*':
+            out = []
+            for c in self._children:
+                out.append(c)
+                out.extend(c._children)
+            return out
+        return []
+
+
+class FakeDriver:
+    """Answers the handful of queries get_active_bets issues against a synthetic positions table."""
+
+    def __init__(self, positions: int, latency_s: float):
+        self.counter = CallCounter(latency_s)
+        self.current_url = config.ROLLBIT_URL
+        self.rows = []
+        for i in range(positions):
+            # Direction chip carries no text; direction lives in an icon class (forces the attribute scan)
+            cells = [
+                ('', {'class': 'css-dir'}, [FakeElement(self.counter, '', {'class': 'icon-arrow-' + ('up' if i % 2 == 0 else 'down')})]),
+                (f'{64000 + i * 10:,}.50', {}, []),
+                (f'{64020 + i * 10:,}.25', {}, []),
+                ('$0.10', {}, []),
+                ('1000x', {}, []),
+                (f'{"+" if i % 2 == 0 else "-"}0.{i + 1:02d}', {}, []),
+                ('CASH OUT', {}, [FakeElement(self.counter, 'CASH OUT', {'class': 'css-nja62m'}, tag='button')]),
+            ]
+            tds = [FakeElement(self.counter, t, a, ch, tag='td') for t, a, ch in cells]
+            row_text = '\n'.join(t for t, _, _ in cells)
+            self.rows.append({'element': FakeElement(self.counter, row_text, {'class': 'css-jbcm9e'}, tds, tag='tr'),
+                              'cells': cells})
+
+    def find_elements(self, by, value):
+        self.counter.hit()
+        if value == 'thead th':
+            return [FakeElement(self.counter, h, tag='th') for h in HEADERS]
+        if value == 'tbody tr':
+            return [r['element'] for r in self.rows]
+        return []
+
+    def execute_script(self, script, *args):
+        self.counter.hit()
+        if 'getComputedStyle' in script and 'thead th' not in script:
+            return 'rgb(200, 200, 200)'
+        rows = []
+        for r in self.rows:
+            hints = []
+            for t, a, ch in r['cells']:
+                hints.extend(v for v in a.values() if v)
+                for c in ch:
+                    hints.extend(v for v in c._attrs.values() if v)
+            rows.append({
+                'cells': [t for t, _, _ in r['cells']],
+                'text': r['element']._text,
+                'hints': hints[:20],
+                'color': 'rgb(200, 200, 200)',
+                'cashout': True,
+            })
+        return {'headers': list(HEADERS), 'rows': rows}
+
+
+def run(mode: str, positions: int, latency_ms: float, repeat: int):
+    config.USE_POSITIONS_SNAPSHOT = (mode == 'snapshot')
+    driver = FakeDriver(positions, latency_ms / 1000.0)
+    trading = TradingInterface(driver)
+    bets = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            bets = trading.get_active_bets(max_age=0)
+    elapsed = time.perf_counter() - start
+    return {
+        'mode': mode,
+        'calls_per_refresh': driver.counter.calls / repeat,
+        'ms_per_refresh': elapsed * 1000.0 / repeat,
+        'parsed': len(bets),
+        'bets': bets,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--positions', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=3.0, help='simulated cost of one WebDriver round trip')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    results = [run(m, args.positions, args.latency_ms, args.repeat) for m in ('webdriver', 'snapshot')]
+    print(f"positions={args.positions} latency/call={args.latency_ms}ms repeat={args.repeat}")
+    for r in results:
+        print(f"  {r['mode']:<10} calls/refresh={r['calls_per_refresh']:>7.1f}  ms/refresh={r['ms_per_refresh']:>8.2f}  parsed={r['parsed']}")
+    legacy, snap = results
+    same = [(b['direction'], b['entry_price'], b['current_price'], b['wager'], b['multiplier'], b['pnl']) for b in legacy['bets']] == \
+           [(b['direction'], b['entry_price'], b['current_price'], b['wager'], b['multiplier'], b['pnl']) for b in snap['bets']]
+    print(f"  parsed results identical: {same}")
+    if snap['ms_per_refresh'] > 0:
+        print(f"  speedup: {legacy['ms_per_refresh'] / snap['ms_per_refresh']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
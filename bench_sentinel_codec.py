@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Sentinel frame decoding, full json.loads per frame vs. SentinelDecoder pre-filtering.
+Frames come from a recording (JSON lines, optionally .gz, either raw frames or {"raw": ...} records)
+or are synthesised with a configurable share of unsubscribed symbols and ping/pong frames.
+--bytes feeds the frames as UTF-8 bytes, as binary WebSocket frames arrive.
+
+Usage: python bench_sentinel_codec.py [--frames 200000] [--wanted BTCUSDT] [--symbols 20]
+                                      [--control-share 0.05] [--recording feed.jsonl.gz] [--bytes]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import time
+
+import sentinel_codec
+from sentinel_codec import SentinelDecoder
+
+
+def synth_frames(n: int, symbols: int, control_share: float, seed: int = 7):
+    rng = random.Random(seed)
+    names = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT'] + [f'ALT{i}USDT' for i in range(max(0, symbols - 3))]
+    ts = 1760000000000
+    frames = []
+    for _ in range(n):
+        ts += rng.randint(1, 40)
+        if rng.random() < control_share:
+            frames.append(json.dumps({'op': rng.choice(('pong', 'ack')), 'ts': ts}))
+            continue
+        pv = rng.randint(50, 150)
+        cv = pv + rng.randint(-40, 40)
+        frames.append(json.dumps({'s': rng.choice(names), 'ts': ts, 'pv': pv, 'cv': cv, 'delta': cv - pv, 'strings': rng.randint(5, 15)}))
+    return frames
+
+
+def load_frames(path: str):
+    opener = gzip.open if path.endswith('.gz') else open
+    frames = []
+    with opener(path, 'rt', encoding='utf-8') as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            frames.append(rec['raw'] if isinstance(rec, dict) and 'raw' in rec else line)
+    return frames
+
+
+def baseline(frames, wanted):
+    """What the GUI used to do: parse everything, then check the symbol."""
+    out = 0
+    for raw in frames:
+        d = json.loads(raw)
+        if (d.get('s') or '').upper() in wanted:
+            out += 1
+    return out
+
+
+def run(name, fn, frames):
+    start = time.perf_counter()
+    kept = fn(frames)
+    elapsed = time.perf_counter() - start
+    return name, kept, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=200000)
+    parser.add_argument('--wanted', default='BTCUSDT', help='comma-separated subscribed symbols')
+    parser.add_argument('--symbols', type=int, default=20, help='distinct symbols in synthetic frames')
+    parser.add_argument('--control-share', type=float, default=0.05)
+    parser.add_argument('--recording', help='JSON lines recording to replay instead of synthetic frames')
+    parser.add_argument('--bytes', action='store_true', help='decode bytes frames instead of str')
+    args = parser.parse_args()
+
+    wanted = frozenset(s.strip().upper() for s in args.wanted.split(',') if s.strip())
+    frames = load_frames(args.recording) if args.recording else synth_frames(args.frames, args.symbols, args.control_share)
+    if args.bytes:
+        frames = [raw.encode('utf-8') for raw in frames]
+
+    def decoder(frames):
+        dec = SentinelDecoder(wanted)
+        return sum(1 for raw in frames if dec.decode(raw) is not None)
+
+    def decoder_stdlib(frames):
+        saved = sentinel_codec._loads
+        sentinel_codec._loads = json.loads
+        try:
+            return decoder(frames)
+        finally:
+            sentinel_codec._loads = saved
+
+    results = [run('json.loads', lambda f: baseline(f, wanted), frames), run('decoder/json', decoder_stdlib, frames)]
+    if sentinel_codec.JSON_BACKEND == 'orjson':
+        results.append(run('decoder/orjson', decoder, frames))
+
+    print(f"frames={len(frames)} ({'bytes' if args.bytes else 'str'}) wanted={','.join(sorted(wanted))} backend={sentinel_codec.JSON_BACKEND}")
+    base = results[0][2]
+    for name, kept, elapsed in results:
+        print(f"  {name:<15} kept={kept:>7}  {elapsed * 1e9 / max(1, len(frames)):>7.0f} ns/frame  speedup {base / elapsed:4.1f}x")
+
+
+if __name__ == '__main__':
+    main()
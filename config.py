@@ -1,3 +1,5 @@
+import os
+
 SELECTORS = {
     'buy_sell_toggle': 'button.css-1wsh2jr, a[href*="/rlb/trade"], .css-1wsh2jr',
     'up_button': '.css-1p91j2k',        # visual chip div with text Up (green when active)
@@ -14,6 +16,68 @@ DEBUG_UI_SCAN = False           # print DOM scans/inspector at startup
 DEBUG_NETWORK_SPY = False       # install and dump network spy
 USE_API_FALLBACK = True         # call /private/trade if UI submit fails
 
+# Execution engine for execute_trade: 'ui' (click flow), 'api' (in-page POST /private/trade)
+# or 'auto' (api first, then the UI flow for the failure classes below)
+EXECUTION_ENGINE = 'ui'
+API_UI_FALLBACK_ON = ('validation', 'auth')   # api failures that fall back to the UI only if raised before the request was sent
+API_UI_FALLBACK_VERIFY = ('script', 'network')  # api failures that may have reached the exchange: UI fallback only if no new position appears
+API_TRADE_TIMEOUT = 5.0         # seconds before the in-page fetch is aborted
+USE_POSITIONS_SNAPSHOT = True   # read the positions table in one execute_script round trip
+POSITIONS_CACHE_TTL = 0.5       # seconds a positions snapshot is shared by get_active_bets callers (trades/closes invalidate it)
+POSITIONS_STREAM = False        # auto-refresh drains row changes from an in-page MutationObserver instead of re-reading the table (validate on the live page first)
+POSITIONS_STREAM_POLL_MS = 250  # auto-refresh interval while the stream is in use
+POSITIONS_STREAM_RING = 512     # in-page event ring; a reader further behind than this resyncs from a full snapshot
+POSITIONS_STREAM_RESYNC_S = 30.0  # full resync at least this often, even without overflow
+
+# Order acknowledgement (seconds): execute_trade waits on in-page events instead of fixed sleeps
+ORDER_ACK_TIMEOUT = 4.0         # max wait for a new position / toast / modal / navigation after PLACE BET
+ORDER_ACK_TOAST_GRACE = 1.0     # extra wait for the position row when a toast shows up first
+DIRECTION_ACK_TIMEOUT = 0.5     # max wait for the chip colors to flip after a direction click
+CLICK_NAV_WINDOW_MS = 50        # how long a JS click keeps watching for a navigation it triggered
+CLOSE_ALL_TIMEOUT = 5.0         # max wait for all cash-out buttons to disappear after close-all
+
+# Sentinel feed (asyncio client with automatic reconnect)
+# SENTINEL_WS_URL in the environment overrides the feed, e.g. ws://127.0.0.1:8765 for sentinel_stub_server.py
+SENTINEL_WS_URL = os.environ.get('SENTINEL_WS_URL', 'wss://matrix.cryptoiq.com/api/sentinel/ws')
+# Sentinel symbol -> Rollbit instrument. Every routed symbol entered in the GUI is subscribed on one
+# connection and traded through its own queue/worker on ROLLBIT_URL_TEMPLATE.
+SENTINEL_ROUTES = {
+    'BTCUSDT': 'BTC',
+    'ETHUSDT': 'ETH',
+    'SOLUSDT': 'SOL',
+}
+SENTINEL_PING_INTERVAL = 15.0   # seconds between {"op":"ping"} RTT probes
+SENTINEL_BACKOFF_INITIAL = 0.5  # first reconnect delay cap (seconds); doubles per failed attempt, full jitter
+SENTINEL_BACKOFF_MAX = 30.0     # reconnect delay cap (seconds)
+SENTINEL_STALE_AFTER = 35.0     # no frame (pongs included) for this long -> feed stale, force reconnect
+SENTINEL_PONG_TIMEOUT = 10.0    # ping unanswered this long -> feed stale (once the server has answered one)
+SENTINEL_RECORD_PATH = None     # e.g. 'sentinel_feed.jsonl.gz' to record every raw frame for sentinel_replay.py
+
+# WebSocket signal queue between the socket reader and the execution worker
+SIGNAL_QUEUE_MAXSIZE = 16       # pending signals before the overflow policy applies
+SIGNAL_QUEUE_POLICY = 'drop_oldest'  # 'drop_oldest', 'drop_newest' or 'coalesce' (one pending signal per symbol)
+SIGNAL_COALESCE_WINDOW_MS = 250     # bursts for a symbol within this window of the last one collapse into one (0 = off)
+SIGNAL_COALESCE_MODE = 'latest'     # which burst survives a merge: 'latest' or 'strongest' (largest |delta|)
+SIGNAL_MAX_AGE_MS = 3000            # expire signals whose burst `ts` is older than this before trading (None = off)
+
+# Admission control: checked in memory before any order (signal or manual) reaches the browser
+ADMISSION_MAX_POSITIONS = 4         # open positions + in-flight orders, all instruments (None = no cap)
+ADMISSION_MAX_INFLIGHT = 2          # orders being placed at once, all instruments (None = no cap)
+ADMISSION_MAX_PER_INSTRUMENT = None # open + in-flight per instrument (None = no cap)
+ADMISSION_INSTRUMENT_LIMITS = {}    # per-instrument overrides, e.g. {'SOL': 1}
+ADMISSION_WAIT_MS = 0               # how long a signal may wait for a free slot before it is rejected
+
+# Inbound price tap: marks the position book from the page's own market-data WebSocket between
+# positions snapshots. Off until the keys below match the page feed (check trading.price_tap_stats()).
+PRICE_TAP = False
+PRICE_TAP_URL_PATTERN = ''          # regex on the socket URL ('' = every socket the page opens)
+PRICE_TAP_SYMBOL_KEYS = ('s', 'symbol', 'instrument', 'market', 'pair')
+PRICE_TAP_PRICE_KEYS = ('p', 'price', 'last', 'lastPrice', 'markPrice', 'mark', 'c')
+PRICE_TAP_RING = 4096               # in-page (ts, instrument, price) slots; older undrained ticks are lost
+PRICE_TAP_MAX_FRAME = 65536         # larger frames are skipped without parsing
+PRICE_TAP_MAX_JUMP = 0.05           # drop ticks this far (fraction) from the last accepted price
+PRICE_TAP_ANCHOR_TICKS = 3          # ...unless this many in a row agree: that's the new level (also the first one)
+
 # Blacklist of elements to NEVER click
 BLACKLISTED_SELECTORS = [
     '.css-1psueex',           # Cashier button
@@ -26,6 +90,7 @@ BLACKLISTED_SELECTORS = [
 ]
 
 ROLLBIT_URL = 'https://rollbit.com/trading/BTC'
+ROLLBIT_URL_TEMPLATE = 'https://rollbit.com/trading/{instrument}'
 
 
 
@@ -1,9 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
 import time
-import json
-import websocket
+from admission import AdmissionController
+from position_book import PositionBook
+from positions import PositionTracker
+from signal_pipeline import SignalPipeline
+from sentinel_client import SentinelClient
+from sentinel_replay import FrameRecorder
+from config import POSITIONS_STREAM, POSITIONS_STREAM_POLL_MS, PRICE_TAP
 from branding import apply_theme, COLORS, FONTS, status_badge, SPACE, CanvasCard, draw_vertical_gradient
 
 class TradingGUI:
@@ -36,14 +40,25 @@ class TradingGUI:
         # WebSocket state
         self.ws_enabled = False
         self.ws_connected = False
-        self.ws_app = None
-        self.ws_thread = None
-        self.ws_symbol_var = tk.StringVar(value="BTCUSDT")
+        self.ws_client = None
+        self.ws_recorder = None
+        self.ws_symbol_var = tk.StringVar(value="BTCUSDT")  # comma-separated Sentinel symbols
         self.ws_status_var = tk.StringVar(value="Disconnected")
 
+        # Signal pipeline: the socket thread only decodes and enqueues; each routed instrument has its
+        # own queue and worker. Workers read settings from a snapshot kept in sync by Tk variable
+        # traces and reach Tk only through _ui.
+        # Admission control: in-flight orders and open positions are counted in memory so concurrent
+        # signals and manual trades can't race past the position caps
+        self.admission = AdmissionController.from_config()
+        self.signal_pipeline = SignalPipeline.from_config(
+            self.trading, on_result=self._on_signal_result, admission=self.admission,
+        )
+
         # Risk/position management state
-        self._pnl_peaks = {}
-        self.active_positions_count = 0
+        self.position_book = PositionBook()   # columnar P&L / peak P&L for the stop-loss and trailing rules
+        self._tick_closes = {}   # position id -> when a risk trigger last fired its close
+        self.position_tracker = PositionTracker()
         self.high_vol_var = tk.BooleanVar(value=False)
 
         # Ensure WS closes on exit
@@ -140,11 +155,44 @@ class TradingGUI:
         ws_row.pack(fill='x', padx=SPACE*2, pady=(0, SPACE*2))
         ws_btn = ttk.Button(ws_row, text="WebSocket Settings", style="Crypto.Purple.TButton", command=self.open_ws_settings)
         ws_btn.pack(side=tk.LEFT)
+        # Rolling signal latency (p50/p95): feed delay, receipt->execution start, start->position confirmed
+        self.signal_latency_var = tk.StringVar(value="Signal latency: no signals yet")
+        ttk.Label(ws_row, textvariable=self.signal_latency_var, style="Crypto.Muted.TLabel").pack(side=tk.LEFT, padx=SPACE*2)
+
+        # Keep the worker's copy of the signal settings current
+        for var in (self.ws_symbol_var, self.wager_var, self.multiplier_var):
+            var.trace_add('write', lambda *_: self._sync_signal_settings())
+        self._sync_signal_settings()
+
+        # Price tap on the page's market-data socket (marks the position book between snapshots)
+        if PRICE_TAP and hasattr(self.trading, 'start_price_tap'):
+            self.trading.start_price_tap()
 
         # Auto-refresh
         self.auto_refresh()
         self.refresh_positions()
 
+    def _sync_signal_settings(self):
+        """Snapshot symbol/wager/multiplier for the signal worker (runs on the Tk thread)."""
+        def _float(var):
+            try:
+                return float(var.get())
+            except (ValueError, tk.TclError):
+                return None
+        symbols = tuple(dict.fromkeys(x.strip().upper() for x in self.ws_symbol_var.get().split(',') if x.strip()))
+        self.signal_pipeline.settings = {
+            'symbols': symbols or ('BTCUSDT',),
+            'wager': _float(self.wager_var),
+            'multiplier': _float(self.multiplier_var),
+        }
+
+    def _ui(self, fn, *args):
+        """Run `fn(*args)` on the Tk thread."""
+        try:
+            self.root.after(0, lambda: fn(*args))
+        except Exception:
+            pass
+
     def open_ws_settings(self):
         # Layover window for websocket settings
         win = tk.Toplevel(self.root)
@@ -158,7 +206,7 @@ class TradingGUI:
         frame.pack(fill='both', expand=True, padx=SPACE*2, pady=SPACE*2)
 
         # Symbol
-        ttk.Label(frame, text="Symbol", style="Crypto.Muted.TLabel").pack(pady=(SPACE, SPACE//2))
+        ttk.Label(frame, text="Symbols (comma-separated)", style="Crypto.Muted.TLabel").pack(pady=(SPACE, SPACE//2))
         ttk.Entry(frame, textvariable=self.ws_symbol_var, style="Crypto.TEntry", width=20).pack()
 
         # Toggle
@@ -185,14 +233,15 @@ class TradingGUI:
         status_row = ttk.Frame(frame, style="Crypto.Surface.TFrame")
         status_row.pack(pady=SPACE)
         ttk.Label(status_row, text="Status:", style="Crypto.Muted.TLabel").pack(side=tk.LEFT)
-        ttk.Label(status_row, textvariable=self.ws_status_var, style="Crypto.StatusGood.TLabel").pack(side=tk.LEFT, padx=SPACE)
+        self.ws_status_label = ttk.Label(status_row, textvariable=self.ws_status_var, style="Crypto.StatusGood.TLabel")
+        self.ws_status_label.pack(side=tk.LEFT, padx=SPACE)
 
         # Test signal & Close
         def send_test_signal():
             try:
                 sample = {
-                    's': (self.ws_symbol_var.get().strip().upper() or 'BTCUSDT'),
-                    'ts': 1697059200000,
+                    's': self.signal_pipeline.settings['symbols'][0],
+                    'ts': int(time.time() * 1000),
                     'pv': 100,
                     'cv': 120,
                     'delta': 20,
@@ -206,96 +255,151 @@ class TradingGUI:
         ttk.Button(win, text="Close", style="Crypto.Secondary.TButton", command=win.destroy).pack(pady=(0, SPACE))
 
     def start_websocket(self):
-        if self.ws_thread and self.ws_thread.is_alive():
+        if self.ws_client is not None and self.ws_client.is_running():
             return
 
-        symbol = self.ws_symbol_var.get().strip().upper() or "BTCUSDT"
+        from config import SENTINEL_ROUTES
+        symbols = [x for x in self.signal_pipeline.settings['symbols'] if x in SENTINEL_ROUTES]
+        skipped = [x for x in self.signal_pipeline.settings['symbols'] if x not in SENTINEL_ROUTES]
+        if skipped:
+            print(f"⚠️ No instrument route for {', '.join(skipped)}; not subscribing (see SENTINEL_ROUTES)")
+        if not symbols:
+            self.update_status("No routed symbols to subscribe", COLORS["negative"])
+            return
+        symbol = ','.join(symbols)
 
-        def on_open(ws):
+        def on_state(state, detail):
+            # Called on the client's event loop thread; hop to Tk
             def _update():
-                self.ws_connected = True
-                self.ws_status_var.set(f"Connected ({symbol})")
-                self.update_status("🟢 WebSocket connected", '#00ff00')
-                try:
-                    self.refresh_positions()
-                except Exception:
-                    pass
-            self.root.after(0, _update)
-            sub_msg = {"op": "sub", "symbols": symbol, "pv": 100, "strings": 10}
-            ws.send(json.dumps(sub_msg))
-
-        def on_message(ws, message):
+                self.ws_connected = (state == 'connected')
+                self._set_ws_badge("Crypto.StatusGood.TLabel" if state == 'connected' else "Crypto.StatusWarn.TLabel")
+                if state == 'connected':
+                    self.ws_status_var.set(f"Connected ({symbol})")
+                    self.update_status("🟢 WebSocket connected", '#00ff00')
+                    try:
+                        self.refresh_positions()
+                    except Exception:
+                        pass
+                elif state == 'connecting':
+                    self.ws_status_var.set("Connecting..." if not detail else f"Reconnecting (attempt {detail})")
+                elif state == 'stale':
+                    # Socket looked alive but the feed went quiet; the client is forcing a reconnect
+                    self.ws_status_var.set(f"Feed stale ({detail}) - reconnecting")
+                    self.update_status("🟠 Sentinel feed stale - reconnecting", '#ffaa00')
+                elif state == 'disconnected' and self.ws_enabled:
+                    # Only mark as disconnected if user hasn't toggled off; the client retries by itself
+                    self.ws_status_var.set("Disconnected - retrying")
+                    self.update_status("🔴 WebSocket disconnected", '#ff0000')
+            self._ui(_update)
+
+        from config import SENTINEL_RECORD_PATH
+        if SENTINEL_RECORD_PATH and self.ws_recorder is None:
+            self.ws_recorder = FrameRecorder(SENTINEL_RECORD_PATH)
+        recorder = self.ws_recorder
+
+        def on_message(message, received_wall, received):
+            if recorder is not None:
+                recorder.record(message, received_wall)
+            # Only process if enabled
+            if not self.ws_enabled:
+                return
             try:
-                data = json.loads(message)
-                # Only process if enabled
-                if self.ws_enabled:
-                    self.handle_burst_data(data)
+                self.signal_pipeline.on_message(message, received_wall, received)
             except Exception as e:
                 print(f"WebSocket message error: {e}")
 
-        def on_error(ws, error):
-            print(f"WebSocket error: {error}")
-            self.root.after(0, lambda: self.ws_status_var.set("Error"))
-
-        def on_close(ws, close_status_code, close_msg):
-            def _update():
-                self.ws_connected = False
-                self.ws_status_var.set("Disconnected")
-                if self.ws_enabled:
-                    # Only mark as disconnected if user hasn't toggled off
-                    self.update_status("🔴 WebSocket disconnected", '#ff0000')
-            self.root.after(0, _update)
-
-        ws_url = "wss://matrix.cryptoiq.com/api/sentinel/ws"
-        self.ws_app = websocket.WebSocketApp(
-            ws_url,
-            on_open=on_open,
-            on_message=on_message,
-            on_error=on_error,
-            on_close=on_close
+        from config import (SENTINEL_WS_URL, SENTINEL_PING_INTERVAL, SENTINEL_BACKOFF_INITIAL, SENTINEL_BACKOFF_MAX,
+                            SENTINEL_STALE_AFTER, SENTINEL_PONG_TIMEOUT)
+        self.ws_client = SentinelClient(
+            SENTINEL_WS_URL, symbols, on_message, on_state,
+            recorder=getattr(self.trading, 'latency', None),
+            ping_interval=SENTINEL_PING_INTERVAL,
+            backoff_initial=SENTINEL_BACKOFF_INITIAL,
+            backoff_max=SENTINEL_BACKOFF_MAX,
+            stale_after=SENTINEL_STALE_AFTER,
+            pong_timeout=SENTINEL_PONG_TIMEOUT,
         )
-
-        def run_ws():
-            try:
-                self.ws_app.run_forever(ping_interval=30, ping_payload=json.dumps({"op": "ping"}))
-            except Exception as e:
-                print(f"WebSocket thread error: {e}")
-
-        self.ws_thread = threading.Thread(target=run_ws, daemon=True)
-        self.ws_thread.start()
+        self.ws_client.start()
         self.update_status("🔄 Connecting WebSocket...", '#ffaa00')
+        self.root.after(1000, self._update_ws_metrics)
+
+    def _update_ws_metrics(self):
+        """Show feed RTT / lag / reconnect / staleness metrics while the client runs."""
+        client = self.ws_client
+        if client is None or not client.is_running():
+            return
+        st = client.stats()
+        if st['stale']:
+            self.ws_status_var.set(f"STALE {st['stale_for_ms'] / 1000:.0f}s - reconnecting ({st['last_error']})")
+            self._set_ws_badge("Crypto.StatusWarn.TLabel")
+        elif st['connected']:
+            parts = [f"Connected ({','.join(self.signal_pipeline.settings['symbols'])})"]
+            if st['rtt_ms'] is not None:
+                parts.append(f"rtt {st['rtt_ms']:.0f}ms")
+            if st['lag_ms'] is not None:
+                parts.append(f"lag {st['lag_ms']:.0f}ms")
+            if st['reconnects']:
+                parts.append(f"reconnects {st['reconnects']} (last {st['last_reconnect_ms']:.0f}ms)")
+            if st['stale_events']:
+                parts.append(f"stale {st['stale_events']}x, {st['stale_seconds']:.0f}s total")
+            self.ws_status_var.set(" • ".join(parts))
+        self.root.after(1000, self._update_ws_metrics)
+
+    def _set_ws_badge(self, style: str):
+        """Restyle the WebSocket status label if the settings window is open."""
+        label = getattr(self, 'ws_status_label', None)
+        try:
+            if label is not None and label.winfo_exists():
+                label.config(style=style)
+        except Exception:
+            pass
 
     def stop_websocket(self):
         try:
-            if self.ws_app is not None:
-                try:
-                    self.ws_app.keep_running = False
-                except Exception:
-                    pass
+            if self.ws_client is not None:
                 try:
-                    self.ws_app.close()
+                    self.ws_client.stop(timeout=1.0)
                 except Exception:
                     pass
         finally:
-            self.ws_app = None
+            self.ws_client = None
+            if self.ws_recorder is not None:
+                self.ws_recorder.close()
+                self.ws_recorder = None
             self.ws_connected = False
             self.ws_status_var.set("Disconnected")
             self.update_status("🟡 WebSocket disabled", '#ffaa00')
 
     def auto_refresh(self):  # increased frequency with idle guard
-        """Auto-refresh active bets; run faster when positions exist."""
+        """Auto-refresh active bets. With the positions stream each tick only drains what changed,
+        so it runs every POSITIONS_STREAM_POLL_MS and redraws only on change; otherwise the table is
+        re-read every 1 s with positions open, 5 s when idle."""
+        if self.trading.is_busy():
+            # Signal worker is mid-trade; don't block the Tk thread on the driver
+            self.root.after(250, self.auto_refresh)
+            return
+        poll = getattr(self.trading, 'poll_active_bets', None)
+        if POSITIONS_STREAM and poll is not None:
+            taken_at = time.monotonic()
+            try:
+                active, changed = poll()
+            except Exception:
+                active, changed = [], False
+            if changed:
+                self.refresh_positions(active, taken_at)
+            self._apply_price_ticks()
+            self.root.after(int(POSITIONS_STREAM_POLL_MS), self.auto_refresh)
+            return
+        taken_at = time.monotonic()
         try:
             active = self.trading.get_active_bets()
         except Exception:
             active = []
-        if active:
-            # Refresh now and schedule soon for near-real-time updates
-            self.refresh_positions()
-            delay = 1000  # 1s
-        else:
-            # Light refresh and back off a bit
-            self.refresh_positions()
-            delay = 5000  # 5s when idle
+        # One scrape per tick: the same positions pick the delay and fill the table
+        self.refresh_positions(active, self._bets_taken_at(taken_at))
+        self._apply_price_ticks()
+        # Positions open: schedule soon for near-real-time updates; idle: back off a bit
+        delay = 1000 if active else 5000
         self.root.after(delay, self.auto_refresh)
 
     def update_status(self, message, color=COLORS["accent_green"]):
@@ -312,45 +416,36 @@ class TradingGUI:
         except Exception:
             pass
 
-    def handle_burst_data(self, data):
-        # Guard symbol
-        symbol = (data.get('s') or '').upper()
-        if symbol != (self.ws_symbol_var.get().strip().upper() or 'BTCUSDT'):
-            return
+    def handle_burst_data(self, data, trace=None):
+        """Queue a burst (Burst or raw dict) for the signal workers. Safe to call from any thread and never blocks."""
+        self.signal_pipeline.submit(data, trace)
 
-        direction = 'up' if data.get('delta', 0) > 0 else 'down'
-        try:
-            # Enforce max concurrent positions (4)
-            if self.active_positions_count >= 4:
-                self.update_status("Max positions reached - Signal ignored", COLORS["negative"])
-                return
-            wager = float(self.wager_var.get())
-            multiplier = float(self.multiplier_var.get())
-            success = self.trading.execute_trade(direction, wager, multiplier)
-            if success:
-                self.update_status(f"Signal received - {direction.upper()} trade placed", COLORS["positive"])
-                self.refresh_positions()
-            else:
-                self.update_status(f"Failed to place trade on signal: {direction.upper()}", COLORS["negative"])
-        except ValueError:
-            self.update_status("Invalid wager/multiplier for signal trade", COLORS["negative"])
-        except Exception as e:
-            self.update_status(f"Signal trade error: {str(e)}", COLORS["negative"])
+    def _on_signal_result(self, outcome, trading, direction, message):
+        """Signal worker finished with a signal: report it on the Tk thread."""
+        color = COLORS["positive"] if outcome == 'placed' else COLORS["negative"]
+        self._ui(self.update_status, message, color)
+        if outcome == 'placed':
+            self._ui(self.refresh_positions)
+        self._ui(self.signal_latency_var.set, self.signal_pipeline.status_line())
 
     def place_up_bet(self):
         try:
-            if self.active_positions_count >= 4:
-                self.update_status("Max positions reached - Trade blocked", COLORS["negative"])
-                return
-            self.update_status("🔄 Placing UP bet...", '#ffaa00')
             wager = float(self.wager_var.get())
             multiplier = float(self.multiplier_var.get())
+            blocked = self.admission.admit(self.trading.instrument)
+            if blocked is not None:
+                self.update_status(f"{blocked} - Trade blocked", COLORS["negative"])
+                return
+            self.update_status("🔄 Placing UP bet...", '#ffaa00')
+            success = False
             try:
                 success = self.trading.execute_trade('up', wager, multiplier)
             except Exception as ex:
                 # Handle navigation redirect cases bubbled up
                 messagebox.showwarning("Redirection detected", f"Navigation occurred while placing UP trade. Retrying may help.\n\nDetails: {ex}")
                 success = False
+            finally:
+                self.admission.release(self.trading.instrument, filled=bool(success))
             if success:
                 self.update_status("UP bet placed successfully", COLORS["positive"])
                 self.refresh_positions()
@@ -363,17 +458,21 @@ class TradingGUI:
 
     def place_down_bet(self):
         try:
-            if self.active_positions_count >= 4:
-                self.update_status("Max positions reached - Trade blocked", COLORS["negative"])
-                return
-            self.update_status("🔄 Placing DOWN bet...", '#ffaa00')
             wager = float(self.wager_var.get())
             multiplier = float(self.multiplier_var.get())
+            blocked = self.admission.admit(self.trading.instrument)
+            if blocked is not None:
+                self.update_status(f"{blocked} - Trade blocked", COLORS["negative"])
+                return
+            self.update_status("🔄 Placing DOWN bet...", '#ffaa00')
+            success = False
             try:
                 success = self.trading.execute_trade('down', wager, multiplier)
             except Exception as ex:
                 messagebox.showwarning("Redirection detected", f"Navigation occurred while placing DOWN trade. Retrying may help.\n\nDetails: {ex}")
                 success = False
+            finally:
+                self.admission.release(self.trading.instrument, filled=bool(success))
             if success:
                 self.update_status("DOWN bet placed successfully", COLORS["positive"])
                 self.refresh_positions()
@@ -427,85 +526,138 @@ class TradingGUI:
         sign = '+' if v > 0 else '−'  # U+2212 minus for negatives
         return f"{sign}{abs(v):.{decimals}f}"
 
-    def refresh_positions(self):
-        """Refresh the positions display (now using Treeview)."""
-        try:
-            # Clear
-            for row in self.positions.get_children():
-                self.positions.delete(row)
+    def _position_values(self, bet) -> tuple:
+        pnl_val = float(bet['pnl']) if isinstance(bet.get('pnl'), (int, float)) else 0.0
+        return (
+            bet['direction'].upper(),
+            bet.get('bias', 'Bullish' if bet['direction']=='up' else 'Bearish'),
+            bet['wager'],
+            bet['multiplier'],
+            bet['entry_price'],
+            bet['current_price'],
+            self._format_pnl(pnl_val),
+        )
 
-            active_bets = self.trading.get_active_bets()
+    def _position_tags(self, bet, idx: int) -> tuple:
+        pnl_val = float(bet['pnl']) if isinstance(bet.get('pnl'), (int, float)) else 0.0
+        pnl_tag = 'pnl_pos' if pnl_val >= 0 else 'pnl_neg'
+        dir_tag = 'dir_up' if bet['direction'] == 'up' else 'dir_down'
+        stripe_tag = 'odd' if idx % 2 else 'even'
+        return (stripe_tag, dir_tag, pnl_tag)
 
+    def _close_position(self, bet):
+        """Close one position by its stable id; fall back to closing everything."""
+        try:
+            if hasattr(self.trading, 'close_trade'):
+                if self.trading.close_trade(bet['id']) and bet.get('instrument'):
+                    self.admission.closed(bet['instrument'])
+            else:
+                self.trading.close_all_trades()
+        except Exception:
+            try:
+                self.trading.close_all_trades()
+            except Exception:
+                pass
+
+    def _bets_taken_at(self, called: float) -> float:
+        """Start of the scrape get_active_bets answered from; a cached one can predate the call."""
+        taken = getattr(self.trading, 'bets_taken_at', None)
+        return min(called, taken) if isinstance(taken, (int, float)) else called
+
+    def _on_risk_trigger(self, bet, reason: str, pnl: float, peak: float):
+        label = f"#{bet.get('row_index', 0) + 1} {bet['direction'].upper()} @ {bet['entry_price']}"
+        if reason == 'stop':
+            # Immediate tiny stop-loss around zero to avoid degenerate losers
+            self.update_status(f"Stop loss hit on position {label} (pnl {pnl:.4f})", COLORS["negative"])
+        else:
+            # Trailing profit lock
+            self.update_status(f"Trailing stop: lock profit on {label} (peak {peak:.4f} -> pnl {pnl:.4f})", COLORS["positive"])
+        self._close_position(bet)
+
+    def _apply_price_ticks(self):
+        """Mark the position book with every tick from the page's price feed since the last call and
+        act on stop-loss / trailing triggers between positions snapshots."""
+        drain = getattr(self.trading, 'drain_prices', None)
+        if not PRICE_TAP or drain is None or not len(self.position_book):
+            return
+        ticks = drain()
+        if not ticks:
+            return
+        for _, instrument, price in ticks:
+            self.position_book.mark({instrument: price})
+        # Only positions the ticks re-marked: the rest still hold the last snapshot's P&L
+        self._close_triggered(instruments={instrument for _, instrument, _ in ticks})
+
+    def _close_triggered(self, instruments=None):
+        """Act on every position the book's stop-loss / trailing mask selects (only those of
+        `instruments` when given). A position whose close didn't take stays in the mask and is
+        retried, at most once per 2 s (a close takes a snapshot to confirm, so don't re-fire on every
+        tick or refresh meanwhile)."""
+        buffer = 0.03 if self.high_vol_var.get() else 0.02
+        now = time.monotonic()
+        for key, reason, pnl, peak in self.position_book.triggered(trail_buffer=buffer, instruments=instruments):
+            bet = self.position_tracker.get(key)
+            if bet is None or now - self._tick_closes.get(key, 0.0) < 2.0:
+                continue
+            self._tick_closes[key] = now
+            self._on_risk_trigger(bet, reason, pnl, peak)
+
+    def refresh_positions(self, active_bets=None, taken_at=None):
+        """Refresh the positions display (Treeview rows keyed by stable position id; only changes are applied).
+        active_bets / taken_at: positions already read (e.g. from the positions stream) and when the read started."""
+        if active_bets is None and self.trading.is_busy():
+            return
+        try:
+            if active_bets is None:
+                taken_at = time.monotonic()
+                active_bets = self.trading.get_active_bets()
+                taken_at = self._bets_taken_at(taken_at)
+            elif taken_at is None:
+                taken_at = time.monotonic()
+            # Positions on the page are authoritative for admission control; per instrument only when
+            # every row names its instrument, else just the total
+            if all(bet.get('instrument') for bet in active_bets):
+                counts = {}
+                for bet in active_bets:
+                    counts[bet['instrument']] = counts.get(bet['instrument'], 0) + 1
+                self.admission.sync_positions(counts, taken_at)
+            else:
+                self.admission.sync_total(len(active_bets), taken_at)
+            # Disable buttons if at limit
+            try:
+                limit_reached = self.admission.at_capacity(self.trading.instrument)
+                for child in self.root.winfo_children():
+                    # heuristic: disable main buy/sell buttons by text
+                    if isinstance(child, ttk.Labelframe):
+                        for btn in child.winfo_children():
+                            if isinstance(btn, ttk.Button) and btn.cget('text') in ("BUY (UP)", "SELL (DOWN)"):
+                                btn.state(['disabled'] if limit_reached else ['!disabled'])
+            except Exception:
+                pass
+
+            diff = self.position_tracker.update(active_bets)
+            order = {bet['id']: idx for idx, bet in enumerate(active_bets)}
+            for bet in diff.closed:
+                if self.positions.exists(bet['id']):
+                    self.positions.delete(bet['id'])
+                self._tick_closes.pop(bet['id'], None)
+            for bet in diff.opened:
+                self.positions.insert('', 'end', iid=bet['id'], values=self._position_values(bet),
+                                      tags=self._position_tags(bet, order[bet['id']]))
+            for bet in diff.updated:
+                self.positions.item(bet['id'], values=self._position_values(bet),
+                                    tags=self._position_tags(bet, order[bet['id']]))
+            if diff.opened or diff.closed:
+                # Rows came or went: restore page order and the alternating stripes
+                for bet in active_bets:
+                    idx = order[bet['id']]
+                    self.positions.move(bet['id'], '', idx)
+                    self.positions.item(bet['id'], tags=self._position_tags(bet, idx))
+
+            self.position_book.sync(active_bets)
             if active_bets:
-                for idx, bet in enumerate(active_bets):
-                    dir_txt = bet['direction'].upper()
-                    pnl_val = float(bet['pnl']) if isinstance(bet.get('pnl'), (int, float)) else 0.0
-                    pnl_disp = self._format_pnl(pnl_val)
-                    pnl_tag = 'pnl_pos' if pnl_val >= 0 else 'pnl_neg'
-                    dir_tag = 'dir_up' if bet['direction'] == 'up' else 'dir_down'
-                    stripe_tag = 'odd' if idx % 2 else 'even'
-                    row_tags = (stripe_tag, dir_tag, pnl_tag)
-                    item_id = self.positions.insert('', 'end', values=(
-                        dir_txt,
-                        bet.get('bias', 'Bullish' if bet['direction']=='up' else 'Bearish'),
-                        bet['wager'],
-                        bet['multiplier'],
-                        bet['entry_price'],
-                        bet['current_price'],
-                        pnl_disp,
-                    ), tags=row_tags)
-                # Risk rules: update counters and apply stop-loss / trailing
-                self.active_positions_count = len(active_bets)
-                # Disable buttons if at limit
-                try:
-                    limit_reached = self.active_positions_count >= 4
-                    for child in self.root.winfo_children():
-                        # heuristic: disable main buy/sell buttons by text
-                        if isinstance(child, ttk.Labelframe):
-                            for btn in child.winfo_children():
-                                if isinstance(btn, ttk.Button) and btn.cget('text') in ("BUY (UP)", "SELL (DOWN)"):
-                                    btn.state(['disabled'] if limit_reached else ['!disabled'])
-                except Exception:
-                    pass
-
-                # Stop loss and trailing
-                buffer = 0.03 if self.high_vol_var.get() else 0.02
-                for idx, bet in enumerate(active_bets):
-                    key = bet.get('row_index', idx)
-                    pnl = float(bet.get('pnl') or 0)
-                    # Initialize peak at current pnl
-                    peak = self._pnl_peaks.get(key, pnl)
-                    if pnl > peak:
-                        peak = pnl
-                    self._pnl_peaks[key] = peak
-                    # Immediate tiny stop-loss around zero to avoid degenerate losers
-                    if pnl <= -0.01:
-                        self.update_status(f"Stop loss hit on position {key} (pnl {pnl:.4f})", COLORS["negative"])
-                        try:
-                            # Attempt per-position close; fallback to global
-                            if hasattr(self.trading, 'close_trade'):
-                                self.trading.close_trade(int(key))
-                            else:
-                                self.trading.close_all_trades()
-                        except Exception:
-                            try:
-                                self.trading.close_all_trades()
-                            except Exception:
-                                pass
-                        continue
-                    # Trailing profit lock
-                    if peak >= 0.01 and pnl < (peak - buffer):
-                        self.update_status(f"Trailing stop: lock profit on {key} (peak {peak:.4f} -> pnl {pnl:.4f})", COLORS["positive"])
-                        try:
-                            if hasattr(self.trading, 'close_trade'):
-                                self.trading.close_trade(int(key))
-                            else:
-                                self.trading.close_all_trades()
-                        except Exception:
-                            try:
-                                self.trading.close_all_trades()
-                            except Exception:
-                                pass
+                # Risk rules: stop-loss / trailing as one mask over the book
+                self._close_triggered()
 
                 self.update_status(f"ACTIVE • {len(active_bets)} position(s)", COLORS["accent_green"])
             else:
@@ -521,6 +673,7 @@ class TradingGUI:
         try:
             self.ws_enabled = False
             self.stop_websocket()
+            self.signal_pipeline.stop()
         finally:
             self.root.destroy()
 
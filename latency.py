@@ -0,0 +1,290 @@
+"""
+Lightweight latency instrumentation for the trade pipeline.
+
+Stages are timed with time.monotonic() and tagged with the number of WebDriver commands issued
+while they ran. Durations go into log-bucketed histograms (fixed memory, O(1) per sample) that
+can be dumped as p50/p95/p99, so the recorder can stay enabled in production.
+
+SignalTrace follows one Sentinel burst from WebSocket receipt to a confirmed position;
+SignalStats keeps rolling percentiles of its legs over the most recent signals.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+_GROWTH = 1.04                      # bucket width: ~2% relative error on reported percentiles
+_LOG_GROWTH = math.log(_GROWTH)
+
+
+class WebDriverCallCounter:
+    """Counts WebDriver commands per thread by wrapping driver.execute (every Selenium command,
+    including WebElement calls, goes through it). Attached at most once per driver."""
+
+    def __init__(self, driver):
+        self._local = threading.local()
+        original = driver.execute
+
+        def execute(*args, **kwargs):
+            self._local.calls = getattr(self._local, 'calls', 0) + 1
+            return original(*args, **kwargs)
+
+        driver.execute = execute
+
+    @classmethod
+    def attach(cls, driver):
+        counter = getattr(driver, '_sentinel_call_counter', None)
+        if counter is None and hasattr(driver, 'execute'):
+            counter = cls(driver)
+            try:
+                driver._sentinel_call_counter = counter
+            except Exception:
+                pass
+        return counter
+
+    def calls(self) -> int:
+        """WebDriver commands issued so far by the calling thread."""
+        return getattr(self._local, 'calls', 0)
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of durations in seconds."""
+    __slots__ = ('buckets', 'count', 'total', 'max', 'calls')
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.calls = 0
+
+    def record(self, seconds: float, calls: int = 0):
+        us = seconds * 1e6
+        idx = int(math.log(us) / _LOG_GROWTH) if us > 1.0 else 0
+        self.buckets[idx] = self.buckets.get(idx, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.calls += calls
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100) in seconds."""
+        if not self.count:
+            return 0.0
+        rank = max(1.0, q / 100.0 * self.count)
+        seen = 0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if seen >= rank:
+                return min(_GROWTH ** (idx + 0.5) / 1e6, self.max)
+        return self.max
+
+
+class StageTimer:
+    """Sequential stage laps: each lap(stage) records the time and WebDriver calls since the
+    previous lap into the recorder, and keeps per-stage totals (seconds) in .laps."""
+    __slots__ = ('recorder', 'prefix', 'started', 'last', 'last_calls', 'laps')
+
+    def __init__(self, recorder, prefix: str = ''):
+        self.recorder = recorder
+        self.prefix = prefix
+        self.started = self.last = time.monotonic()
+        self.last_calls = recorder.driver_calls()
+        self.laps = {}
+
+    def lap(self, stage: str) -> float:
+        now = time.monotonic()
+        calls = self.recorder.driver_calls()
+        elapsed = now - self.last
+        self.recorder.record(self.prefix + stage, elapsed, calls - self.last_calls)
+        self.laps[stage] = self.laps.get(stage, 0.0) + elapsed
+        self.last = now
+        self.last_calls = calls
+        return elapsed
+
+    def total(self, stage: str = 'total') -> float:
+        """Record the whole duration since the timer was created under `stage`."""
+        elapsed = time.monotonic() - self.started
+        self.recorder.record(self.prefix + stage, elapsed)
+        self.laps[stage] = elapsed
+        return elapsed
+
+
+class LatencyRecorder:
+    """Thread-safe collection of named latency histograms."""
+
+    def __init__(self, driver=None):
+        self._lock = threading.Lock()
+        self._hists = {}
+        self._counter = WebDriverCallCounter.attach(driver) if driver is not None else None
+
+    def driver_calls(self) -> int:
+        return self._counter.calls() if self._counter is not None else 0
+
+    def record(self, stage: str, seconds: float, calls: int = 0):
+        with self._lock:
+            hist = self._hists.get(stage)
+            if hist is None:
+                hist = self._hists[stage] = LatencyHistogram()
+            hist.record(seconds, calls)
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time a block: with recorder.span('place_bet'): ..."""
+        started = time.monotonic()
+        calls = self.driver_calls()
+        try:
+            yield
+        finally:
+            self.record(stage, time.monotonic() - started, self.driver_calls() - calls)
+
+    def timer(self, prefix: str = '') -> StageTimer:
+        return StageTimer(self, prefix)
+
+    def summary(self) -> dict:
+        """{stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms, calls_mean}}"""
+        with self._lock:
+            out = {}
+            for stage, h in self._hists.items():
+                out[stage] = {
+                    'count': h.count,
+                    'mean_ms': h.total / h.count * 1000.0 if h.count else 0.0,
+                    'p50_ms': h.percentile(50) * 1000.0,
+                    'p95_ms': h.percentile(95) * 1000.0,
+                    'p99_ms': h.percentile(99) * 1000.0,
+                    'max_ms': h.max * 1000.0,
+                    'calls_mean': h.calls / h.count if h.count else 0.0,
+                }
+            return out
+
+    def dump(self) -> str:
+        """Human-readable table of summary(), one stage per line."""
+        rows = self.summary()
+        if not rows:
+            return '(no latency samples)'
+        width = max(len(s) for s in rows)
+        lines = [f"{'stage':<{width}}  {'n':>6}  {'p50':>9}  {'p95':>9}  {'p99':>9}  {'max':>9}  {'calls':>6}"]
+        for stage, r in rows.items():
+            lines.append(
+                f"{stage:<{width}}  {r['count']:>6}  {r['p50_ms']:>7.1f}ms  {r['p95_ms']:>7.1f}ms  "
+                f"{r['p99_ms']:>7.1f}ms  {r['max_ms']:>7.1f}ms  {r['calls_mean']:>6.1f}"
+            )
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._hists.clear()
+
+
+class SignalTrace:
+    """Timeline of one signal: received -> dequeued -> exec_start -> click_issued -> confirmed.
+    Marks are monotonic seconds (first mark of a name wins). exchange_ts_ms is the burst's own `ts`
+    and received_wall the wall clock at receipt; their difference is the feed delay, which also
+    absorbs any clock skew between the Sentinel server and this machine."""
+    __slots__ = ('symbol', 'direction', 'exchange_ts_ms', 'received_wall', 'marks', 'outcome')
+
+    def __init__(self, symbol: str = '', exchange_ts_ms=None, received_wall: float = None, received: float = None):
+        self.symbol = symbol
+        self.direction = ''
+        self.exchange_ts_ms = exchange_ts_ms
+        self.received_wall = time.time() if received_wall is None else received_wall
+        self.marks = {'received': time.monotonic() if received is None else received}
+        self.outcome = None
+
+    @classmethod
+    def from_burst(cls, data, received_wall: float = None, received: float = None):
+        """data: a burst dict or sentinel_codec.Burst."""
+        readable = hasattr(data, 'get')
+        ts = data.get('ts') if readable else None
+        try:
+            ts = float(ts) if ts is not None else None
+        except (TypeError, ValueError):
+            ts = None
+        return cls((data.get('s') or '').upper() if readable else '', ts, received_wall, received)
+
+    def mark(self, name: str):
+        if name not in self.marks:
+            self.marks[name] = time.monotonic()
+
+    def _between(self, start: str, end: str):
+        a, b = self.marks.get(start), self.marks.get(end)
+        return (b - a) * 1000.0 if a is not None and b is not None else None
+
+    def durations(self) -> dict:
+        """Leg durations in ms; a leg is None when one of its marks is missing."""
+        feed = None
+        if self.exchange_ts_ms is not None:
+            feed = self.received_wall * 1000.0 - self.exchange_ts_ms
+        return {
+            'feed_ms': feed,
+            'queue_ms': self._between('received', 'dequeued'),
+            'receipt_to_start_ms': self._between('received', 'exec_start'),
+            'start_to_click_ms': self._between('exec_start', 'click_issued'),
+            'click_to_confirmed_ms': self._between('click_issued', 'confirmed'),
+            'start_to_confirmed_ms': self._between('exec_start', 'confirmed'),
+            'total_ms': self._between('received', 'confirmed'),
+        }
+
+    def journal(self) -> dict:
+        """One JSON-serialisable record per signal for the trade journal."""
+        out = {
+            'symbol': self.symbol,
+            'direction': self.direction,
+            'ts': self.exchange_ts_ms,
+            'received_at': round(self.received_wall * 1000.0),
+            'outcome': self.outcome,
+        }
+        out.update({k: (round(v, 1) if v is not None else None) for k, v in self.durations().items()})
+        return out
+
+
+class SignalStats:
+    """Rolling percentiles of signal legs over the last `window` traces. Completed traces are
+    also fed into the recorder's all-time histograms as 'signal.<leg>'."""
+    LEGS = ('feed_ms', 'queue_ms', 'receipt_to_start_ms', 'start_to_confirmed_ms', 'total_ms')
+
+    def __init__(self, recorder: LatencyRecorder = None, window: int = 200):
+        self.recorder = recorder
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, trace: SignalTrace) -> dict:
+        legs = trace.durations()
+        with self._lock:
+            self._recent.append(legs)
+            self.count += 1
+        if self.recorder is not None:
+            for leg in self.LEGS:
+                v = legs.get(leg)
+                if v is not None and v >= 0:
+                    self.recorder.record('signal.' + leg[:-3], v / 1000.0)
+        return legs
+
+    def snapshot(self) -> dict:
+        """{leg: {n, p50_ms, p95_ms, max_ms}} over the rolling window (legs with samples only)."""
+        with self._lock:
+            recent = list(self._recent)
+        out = {}
+        for leg in self.LEGS:
+            vals = sorted(v[leg] for v in recent if v.get(leg) is not None)
+            if not vals:
+                continue
+            n = len(vals)
+            out[leg] = {
+                'n': n,
+                'p50_ms': vals[(n - 1) // 2],
+                'p95_ms': vals[min(n - 1, int(math.ceil(0.95 * n)) - 1)],
+                'max_ms': vals[-1],
+            }
+        return out
+
+    def summary_line(self) -> str:
+        """Compact p50/p95 line for status displays."""
+        snap = self.snapshot()
+        labels = (('feed_ms', 'feed'), ('receipt_to_start_ms', 'rx→start'), ('start_to_confirmed_ms', 'start→fill'))
+        parts = [f"{name} {snap[leg]['p50_ms']:.0f}/{snap[leg]['p95_ms']:.0f}ms" for leg, name in labels if leg in snap]
+        return ' | '.join(parts) if parts else 'no signals yet'
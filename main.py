@@ -259,6 +259,7 @@ def find_trading_interface_elements(driver):
 
 def main():
     driver = None
+    trading = None
     try:
         print("Starting browser...")
         driver = init_browser()
@@ -300,6 +301,9 @@ def main():
         import traceback
         traceback.print_exc()
     finally:
+        if trading is not None:
+            print("\n=== TRADE LATENCY (p50/p95/p99) ===")
+            print(trading.latency_report())
         if driver:
             print("Closing browser...")
             driver.quit()
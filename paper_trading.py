@@ -0,0 +1,139 @@
+"""
+Paper stand-in for TradingInterface.
+
+Implements the part of the TradingInterface surface the signal pipeline and GUI use, without a
+browser: orders "fill" after a configurable simulated latency and are kept as in-memory positions.
+Used by the replay harness to benchmark everything downstream of the feed deterministically.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+
+from latency import LatencyRecorder, SignalStats, SignalTrace
+
+
+class PaperSession:
+    """State shared by every per-instrument PaperTradingInterface (see for_instrument): the lock,
+    latency and signal stats, the position list, order counter and fill simulation."""
+
+    def __init__(self, fill_latency_ms: float = 0.0, jitter_ms: float = 0.0, fail_rate: float = 0.0,
+                 seed: int = None):
+        self.fill_latency_ms = fill_latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        # Mirrors the real interface: one browser session serialises every instrument
+        self.lock = threading.RLock()
+        self.latency = LatencyRecorder()
+        self.signal_stats = SignalStats(self.latency)
+        self.logger = logging.getLogger("sentinel.paper")
+        self.positions = []
+        self.orders = 0
+        self.next_id = 1
+        self.interfaces = {}   # instrument -> PaperTradingInterface
+
+
+def _session_attr(name: str):
+    """Interface attribute stored on its PaperSession."""
+    return property(lambda self: getattr(self.session, name),
+                    lambda self, value: setattr(self.session, name, value))
+
+
+class PaperTradingInterface:
+    fill_latency_ms = _session_attr('fill_latency_ms')
+    jitter_ms = _session_attr('jitter_ms')
+    fail_rate = _session_attr('fail_rate')
+    _rng = _session_attr('rng')
+    driver_lock = _session_attr('lock')
+    latency = _session_attr('latency')
+    signal_stats = _session_attr('signal_stats')
+    logger = _session_attr('logger')
+    positions = _session_attr('positions')
+    orders = _session_attr('orders')
+    _next_id = _session_attr('next_id')
+    _siblings = _session_attr('interfaces')
+
+    def __init__(self, instrument: str = 'BTC', fill_latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 fail_rate: float = 0.0, seed: int = None, session: PaperSession = None):
+        self.session = session if session is not None else PaperSession(fill_latency_ms, jitter_ms, fail_rate, seed)
+        self.instrument = instrument
+        self.session.interfaces.setdefault(instrument, self)
+        self.last_trade_timings = {}
+
+    def for_instrument(self, instrument: str) -> 'PaperTradingInterface':
+        sibling = self._siblings.get(instrument)
+        if sibling is None:
+            sibling = PaperTradingInterface(instrument, session=self.session)
+        return sibling
+
+    def is_busy(self) -> bool:
+        if self.driver_lock.acquire(blocking=False):
+            self.driver_lock.release()
+            return False
+        return True
+
+    def execute_trade(self, direction, wager, multiplier, engine: str = None, trace: SignalTrace = None):
+        """Simulated order: sleeps fill_latency_ms (+/- jitter) under the shared lock, then records a position."""
+        with self.driver_lock:
+            timer = self.latency.timer('trade.')
+            if trace is not None:
+                trace.mark('exec_start')
+            delay = max(0.0, self.fill_latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            if trace is not None:
+                trace.mark('click_issued')
+            if delay:
+                time.sleep(delay)
+            timer.lap('paper_fill')
+            ok = self._rng.random() >= self.fail_rate
+            if ok:
+                self.positions.append({
+                    'id': self._next_id,
+                    'instrument': self.instrument,
+                    'direction': direction.lower(),
+                    'wager': float(wager),
+                    'multiplier': float(multiplier),
+                    'entry_price': 0.0,
+                    'current_price': 0.0,
+                    'pnl': 0.0,
+                    'row_index': len(self.positions),
+                })
+                self._next_id += 1
+                if trace is not None:
+                    trace.mark('confirmed')
+            self.orders += 1
+            timer.total()
+            self.last_trade_timings = dict(timer.laps)
+            if trace is not None:
+                trace.direction = direction.lower()
+                self.record_signal(trace, 'confirmed' if ok else 'failed')
+            return ok
+
+    def record_signal(self, trace: SignalTrace, outcome: str):
+        trace.outcome = outcome
+        self.signal_stats.record(trace)
+        self.logger.info("SIGNAL TRACE | " + json.dumps(trace.journal()))
+
+    def get_active_bets(self):
+        return [dict(p) for p in self.positions]
+
+    def close_trade(self, position_id) -> bool:
+        """Close by stable position id (bet['id']), like TradingInterface.close_trade."""
+        with self.driver_lock:
+            for i, p in enumerate(self.positions):
+                if p['id'] == position_id:
+                    del self.positions[i]
+                    for j, q in enumerate(self.positions):
+                        q['row_index'] = j
+                    return True
+            return False
+
+    def close_all_trades(self) -> bool:
+        with self.driver_lock:
+            self.positions.clear()
+            return True
+
+    def latency_report(self) -> str:
+        return self.latency.dump()
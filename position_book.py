@@ -0,0 +1,148 @@
+"""
+Columnar book of open positions for vectorised P&L and risk evaluation.
+
+PositionBook keeps one NumPy array per field (entry, wager, multiplier, side, instrument, price,
+P&L, peak P&L) with an id -> row map, so a price tick re-marks every position of the instrument in
+a few array operations and the stop-loss / trailing rules come out as one boolean mask instead of a
+loop over bet dicts. Snapshots from get_active_bets are applied with sync(); marks in between come
+from mark({instrument: price}). A position whose bet has no instrument is never marked: its P&L is
+whatever the last snapshot showed.
+"""
+
+import numpy as np
+
+SIDES = {'up': 1, 'down': -1}
+
+
+class PositionBook:
+    def __init__(self, capacity: int = 64):
+        self.n = 0
+        self.ids = []
+        self._index = {}        # id -> row
+        self._codes = {}        # instrument -> code (index into _marks)
+        self._marks = np.zeros(4)
+        self._alloc(max(1, int(capacity)))
+
+    def _alloc(self, capacity: int):
+        def grow(old, dtype):
+            arr = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                arr[:self.n] = old[:self.n]
+            return arr
+        self.entry = grow(getattr(self, 'entry', None), np.float64)
+        self.wager = grow(getattr(self, 'wager', None), np.float64)
+        self.mult = grow(getattr(self, 'mult', None), np.float64)
+        self.side = grow(getattr(self, 'side', None), np.int8)
+        self.inst = grow(getattr(self, 'inst', None), np.int32)
+        self.price = grow(getattr(self, 'price', None), np.float64)
+        self.pnl = grow(getattr(self, 'pnl', None), np.float64)
+        self.peak = grow(getattr(self, 'peak', None), np.float64)
+
+    def _code(self, instrument: str) -> int:
+        code = self._codes.get(instrument)
+        if code is None:
+            code = self._codes[instrument] = len(self._codes)
+            if code >= len(self._marks):
+                self._marks = np.concatenate([self._marks, np.zeros(len(self._marks))])
+        return code
+
+    def __len__(self):
+        return self.n
+
+    def __contains__(self, position_id):
+        return position_id in self._index
+
+    def upsert(self, bet: dict):
+        """Add or refresh one position from a bet dict (get_active_bets shape). P&L comes from the
+        bet (the platform's displayed value); the peak of a known position is kept. bet['instrument']
+        None or missing: code -1, which mark() skips."""
+        pid = bet['id']
+        row = self._index.get(pid)
+        pnl = float(bet.get('pnl') or 0.0)
+        if row is None:
+            if self.n == len(self.entry):
+                self._alloc(2 * len(self.entry))
+            row = self.n
+            self.n += 1
+            self._index[pid] = row
+            self.ids.append(pid)
+            self.peak[row] = pnl
+        self.entry[row] = float(bet.get('entry_price') or 0.0)
+        self.wager[row] = float(bet.get('wager') or 0.0)
+        self.mult[row] = float(bet.get('multiplier') or 0.0)
+        self.side[row] = SIDES.get(bet.get('direction'), 0)
+        self.inst[row] = self._code(bet['instrument']) if bet.get('instrument') else -1
+        self.price[row] = float(bet.get('current_price') or 0.0)
+        self.pnl[row] = pnl
+        if pnl > self.peak[row]:
+            self.peak[row] = pnl
+
+    def remove(self, position_id) -> bool:
+        """Drop a position; the last row moves into its slot."""
+        row = self._index.pop(position_id, None)
+        if row is None:
+            return False
+        last = self.n - 1
+        if row != last:
+            moved = self.ids[last]
+            for col in (self.entry, self.wager, self.mult, self.side, self.inst, self.price, self.pnl, self.peak):
+                col[row] = col[last]
+            self.ids[row] = moved
+            self._index[moved] = row
+        self.ids.pop()
+        self.n = last
+        return True
+
+    def sync(self, bets: list):
+        """Make the book match a positions snapshot: unknown ids are added, missing ones removed."""
+        live = {bet['id'] for bet in bets}
+        for pid in [pid for pid in self.ids if pid not in live]:
+            self.remove(pid)
+        for bet in bets:
+            self.upsert(bet)
+
+    def mark(self, prices: dict):
+        """Re-mark every position of the instruments in `prices` ({instrument: price}) and raise
+        peaks. P&L = side * (price / entry - 1) * wager * multiplier, floored at -wager (bust)."""
+        codes = [(self._codes[k], float(v)) for k, v in prices.items() if k in self._codes and v]
+        if not codes or not self.n:
+            return
+        for code, price in codes:
+            self._marks[code] = price
+        n = self.n
+        marked = np.isin(self.inst[:n], [code for code, _ in codes])
+        px = self._marks[self.inst[:n]]
+        entry = self.entry[:n]
+        ok = marked & (entry > 0) & (self.side[:n] != 0)
+        ret = np.divide(px, entry, out=np.ones(n), where=ok) - 1.0
+        pnl = np.maximum(self.side[:n] * ret * self.wager[:n] * self.mult[:n], -self.wager[:n])
+        self.price[:n] = np.where(ok, px, self.price[:n])
+        self.pnl[:n] = np.where(ok, pnl, self.pnl[:n])
+        np.maximum(self.peak[:n], self.pnl[:n], out=self.peak[:n])
+
+    def risk_mask(self, stop_loss: float = -0.01, trail_arm: float = 0.01, trail_buffer: float = 0.02):
+        """Rows to close: stop-loss (pnl <= stop_loss) or trailing stop (peak reached trail_arm and
+        pnl fell more than trail_buffer below it)."""
+        n = self.n
+        pnl, peak = self.pnl[:n], self.peak[:n]
+        return (pnl <= stop_loss) | ((peak >= trail_arm) & (pnl < peak - trail_buffer))
+
+    def triggered(self, stop_loss: float = -0.01, trail_arm: float = 0.01, trail_buffer: float = 0.02,
+                  instruments=None) -> list:
+        """[(id, 'stop'|'trail', pnl, peak)] for the rows risk_mask selects. instruments: only rows of
+        these (e.g. the ones a tick just marked); rows without an instrument are then never selected."""
+        mask = self.risk_mask(stop_loss, trail_arm, trail_buffer)
+        if instruments is not None:
+            mask = mask & np.isin(self.inst[:self.n], [self._codes[k] for k in instruments if k in self._codes])
+        rows = np.flatnonzero(mask)
+        return [(self.ids[r], 'stop' if self.pnl[r] <= stop_loss else 'trail', float(self.pnl[r]), float(self.peak[r]))
+                for r in rows]
+
+    def peak_of(self, position_id) -> float:
+        row = self._index.get(position_id)
+        return float(self.peak[row]) if row is not None else 0.0
+
+    def stats(self) -> dict:
+        n = self.n
+        return {'open': n, 'capacity': len(self.entry), 'instruments': len(self._codes),
+                'pnl': float(self.pnl[:n].sum()) if n else 0.0}
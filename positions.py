@@ -0,0 +1,163 @@
+"""
+Stable identity for positions scraped from the Rollbit positions table.
+
+Row indexes shift whenever a position above closes or the table re-sorts, so bets are identified by
+the text of the cells that don't change while a position is open (entry price, wager, multiplier,
+open time, as mapped from the table headers) or, when the headers don't name them, by the token the
+page scripts keep for the row element. PositionTracker diffs successive snapshots by that id into opened / updated / closed
+so consumers only touch what changed. SnapshotCache lets every consumer share one table scrape.
+row_instrument reads which instrument a row belongs to, so per-instrument consumers never guess it.
+"""
+
+import re
+import time
+
+# Fields that change while a position is open; a difference in any of them makes it 'updated'
+LIVE_FIELDS = ('current_price', 'pnl', 'has_cashout', 'row_index', 'direction', 'wager', 'bias')
+
+
+def position_key(bet: dict) -> str:
+    """Stable key of one position row: its header-mapped static cells ('match', {column: text}), else
+    its row token. Never built from parsed values, which may be guessed from whichever cells look right."""
+    match = bet.get('match')
+    if match:
+        return '|'.join(f"{col}={match[col]}" for col in sorted(match, key=int))
+    if bet.get('token'):
+        return f"row:{bet['token']}"
+    return f"row#{bet.get('row_index', 0)}"
+
+
+def row_instrument(texts, instruments) -> str:
+    """Instrument a positions row names as a ticker ('ETH', 'ETH-PERP', 'ETHUSD'), from the first of
+    `texts` (instrument cell, row text, hints) that names any of `instruments`. None when none does,
+    or when that text names several: better unknown than booked under the wrong price."""
+    names = sorted({i for i in instruments if i}, key=len, reverse=True)
+    if not names:
+        return None
+    pattern = re.compile(r"(?<![A-Za-z0-9])(" + '|'.join(map(re.escape, names)) + r")(?![a-z])")
+    for text in texts:
+        found = set(pattern.findall(text or ''))
+        if found:
+            return found.pop() if len(found) == 1 else None
+    return None
+
+
+def assign_position_ids(bets: list) -> list:
+    """Set bet['id'] on every bet from its key ('key', computed by the parser, or
+    position_key). Identical positions are told apart by table order ('key#2', ...); they are
+    interchangeable, so which one keeps the bare key after another closes doesn't matter."""
+    seen = {}
+    for bet in bets:
+        key = bet.get('key') or position_key(bet)
+        n = seen.get(key, 0) + 1
+        seen[key] = n
+        bet['id'] = key if n == 1 else f"{key}#{n}"
+    return bets
+
+
+class PositionDiff:
+    __slots__ = ('opened', 'updated', 'closed')
+
+    def __init__(self, opened=None, updated=None, closed=None):
+        self.opened = opened or []
+        self.updated = updated or []
+        self.closed = closed or []
+
+    def __bool__(self):
+        return bool(self.opened or self.updated or self.closed)
+
+    def __repr__(self):
+        return f"PositionDiff(opened={len(self.opened)}, updated={len(self.updated)}, closed={len(self.closed)})"
+
+
+class PositionTracker:
+    """Keeps the last snapshot by position id and turns each new snapshot into a PositionDiff."""
+
+    def __init__(self):
+        self.positions = {}   # id -> bet, in table order
+        self.opened = 0
+        self.closed = 0
+        self.snapshots = 0
+
+    def update(self, bets: list) -> PositionDiff:
+        if any('id' not in bet for bet in bets):
+            assign_position_ids(bets)
+        current = {bet['id']: bet for bet in bets}
+        previous = self.positions
+        diff = PositionDiff()
+        for pid, bet in current.items():
+            old = previous.get(pid)
+            if old is None:
+                diff.opened.append(bet)
+            elif any(old.get(f) != bet.get(f) for f in LIVE_FIELDS):
+                diff.updated.append(bet)
+        for pid, bet in previous.items():
+            if pid not in current:
+                diff.closed.append(bet)
+        self.positions = current
+        self.snapshots += 1
+        self.opened += len(diff.opened)
+        self.closed += len(diff.closed)
+        return diff
+
+    def get(self, position_id: str):
+        return self.positions.get(position_id)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def stats(self) -> dict:
+        return {'open': len(self.positions), 'opened': self.opened, 'closed': self.closed, 'snapshots': self.snapshots}
+
+
+class SnapshotCache:
+    """Last positions snapshot with a TTL, shared by every consumer of get_active_bets.
+
+    Not locked itself: the owner serialises get() (TradingInterface holds its driver lock), which
+    makes loads single-flight. A caller that queued behind a load passes the time it arrived and
+    takes that load's result instead of starting another one.
+    """
+
+    def __init__(self, ttl: float = 0.5):
+        self.ttl = ttl
+        self._value = None
+        self._started = None    # monotonic time the cached load started (None = empty)
+        self._finished = 0.0
+        self.hits = 0
+        self.joined = 0
+        self.loads = 0
+        self.invalidations = 0
+
+    def get(self, load, arrived: float = None, max_age: float = None):
+        """Cached value if it is at most max_age (default ttl) old or was loaded after `arrived`,
+        else load() and cache the result. Exceptions from load() propagate and cache nothing."""
+        now = time.monotonic()
+        if self._started is not None:
+            if arrived is not None and self._finished >= arrived:
+                self.joined += 1
+                return self._value
+            if now - self._started <= (self.ttl if max_age is None else max_age):
+                self.hits += 1
+                return self._value
+        value = load()
+        self.put(value, now)
+        self.loads += 1
+        return value
+
+    @property
+    def taken_at(self):
+        """Monotonic time the cached value's load started (None when empty)."""
+        return self._started
+
+    def put(self, value, started: float):
+        """Cache a value read by other means (e.g. the positions stream) that started at `started`."""
+        self._value, self._started, self._finished = value, started, time.monotonic()
+
+    def invalidate(self):
+        """Drop the cached value; the next get() loads. Call after anything that opens or closes positions."""
+        if self._started is not None:
+            self.invalidations += 1
+        self._value, self._started = None, None
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'joined': self.joined, 'loads': self.loads, 'invalidations': self.invalidations}
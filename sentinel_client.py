@@ -0,0 +1,285 @@
+"""
+asyncio client for the CryptoIQ Sentinel burst feed.
+
+Runs its own event loop (uvloop when installed) on a daemon thread and keeps the connection up:
+jittered exponential-backoff reconnects, the {"op":"sub"} frame is re-sent on every connect, and an
+application-level {"op":"ping"} measures round-trip time. A watchdog declares the feed stale when a
+live-looking connection goes quiet (no frames, or pings no longer answered) and forces a reconnect.
+Frames are handed to `on_message` on the loop thread, so the callback must not block -- it should
+only enqueue (see signal_pipeline).
+"""
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+
+import websockets
+
+try:
+    import uvloop
+except ImportError:  # optional speed-up, not available on Windows
+    uvloop = None
+
+_TS_RE = re.compile(r'"ts":\s*(\d+(?:\.\d+)?)')
+_TS_RE_BYTES = re.compile(rb'"ts":\s*(\d+(?:\.\d+)?)')
+
+
+class SentinelClient:
+    def __init__(self, url: str, symbols, on_message, on_state=None, recorder=None,
+                 ping_interval: float = 15.0, backoff_initial: float = 0.5, backoff_max: float = 30.0,
+                 stale_after: float = 35.0, pong_timeout: float = 10.0):
+        """
+        on_message(raw, received_wall, received_mono): every non-pong frame, as received.
+        on_state(state, detail): 'connecting', 'connected', 'stale', 'disconnected' or 'stopped'.
+        recorder: optional LatencyRecorder for the feed.rtt / feed.lag / feed.gap / feed.reconnect /
+            feed.stale histograms.
+        stale_after: seconds without any frame (pongs included) before the feed is declared stale.
+        pong_timeout: seconds a ping may go unanswered, enforced once the server has answered one on
+        the current connection.
+        Either may be None to disable that check.
+        """
+        self.url = url
+        self.symbols = symbols
+        self.on_message = on_message
+        self.on_state = on_state
+        self.recorder = recorder
+        self.ping_interval = ping_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stale_after = stale_after
+        self.pong_timeout = pong_timeout
+
+        self._loop = None
+        self._task = None
+        self._thread = None
+        self._ws = None
+        self._ping_sent = None
+        self._pongs_seen = False
+        self._stale_reason = None
+        self._stopping = False
+
+        self.connected = False
+        self.connects = 0
+        self.reconnects = 0
+        self.messages = 0
+        self.last_error = None
+        self.last_reconnect_ms = None
+        self.rtt_ms = None
+        self.last_lag_ms = None
+        self.last_message_at = None
+        self.stale_since = None       # monotonic time of the last frame before the feed went stale
+        self.stale_events = 0
+        self.stale_seconds = 0.0
+        self.last_stale_ms = None
+
+    # ---- thread/loop management ----
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run_loop, name='sentinel-client', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stopping = True
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # loop already closed
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run_loop(self):
+        loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+        self._loop = loop
+        asyncio.set_event_loop(loop)
+        try:
+            self._task = loop.create_task(self._run())
+            loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.connected = False
+            self._emit_state('stopped', None)
+            loop.close()
+            self._loop = None
+            self._task = None
+
+    def _emit_state(self, state: str, detail):
+        if self.on_state is not None:
+            try:
+                self.on_state(state, detail)
+            except Exception as e:
+                print(f"Sentinel state callback error: {e}")
+
+    def subscribe_frame(self) -> str:
+        symbols = self.symbols if isinstance(self.symbols, str) else ','.join(self.symbols)
+        return json.dumps({"op": "sub", "symbols": symbols, "pv": 100, "strings": 10})
+
+    # ---- connection lifecycle ----
+    async def _run(self):
+        attempt = 0
+        disconnected_at = None
+        while not self._stopping:
+            self._emit_state('connecting', attempt)
+            try:
+                async with websockets.connect(self.url, ping_interval=None, close_timeout=2) as ws:
+                    self._ws = ws
+                    await ws.send(self.subscribe_frame())
+                    self._ping_sent = None
+                    self._pongs_seen = False  # pong_timeout applies once this connection has answered a ping
+                    self._stale_reason = None
+                    self.last_message_at = time.monotonic()
+                    self.connected = True
+                    self.connects += 1
+                    attempt = 0
+                    if disconnected_at is not None:
+                        self.reconnects += 1
+                        elapsed = time.monotonic() - disconnected_at
+                        self.last_reconnect_ms = elapsed * 1000.0
+                        if self.recorder is not None:
+                            self.recorder.record('feed.reconnect', elapsed)
+                    self._emit_state('connected', None)
+                    pinger = asyncio.ensure_future(self._ping_loop(ws))
+                    watchdog = asyncio.ensure_future(self._watchdog(ws))
+                    try:
+                        await self._read_loop(ws)
+                    finally:
+                        pinger.cancel()
+                        watchdog.cancel()
+                self.last_error = self._stale_reason or 'closed by server'
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = self._stale_reason or str(e)
+            finally:
+                self._ws = None
+                # Reconnect time runs from losing a live connection (or the first failed attempt)
+                if self.connected or disconnected_at is None:
+                    disconnected_at = time.monotonic()
+                self.connected = False
+            self._emit_state('disconnected', self.last_error)
+            # Full jitter: uniform(0, min(cap, base * 2^attempt)) keeps many clients from reconnecting in lockstep
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_initial * (2 ** attempt)))
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _read_loop(self, ws):
+        async for raw in ws:
+            received_wall, received = time.time(), time.monotonic()
+            self.messages += 1
+            if self.recorder is not None:
+                self.recorder.record('feed.gap', received - self.last_message_at)
+            self.last_message_at = received
+            if self.stale_since is not None:
+                self._end_stale(received)
+            # Binary frames stay bytes: the decoder parses them without a str round trip
+            if (b'"pong"' if isinstance(raw, bytes) else '"pong"') in raw and self._handle_pong(raw, received):
+                continue
+            self._track_lag(raw, received_wall)
+            try:
+                self.on_message(raw, received_wall, received)
+            except Exception as e:
+                print(f"Sentinel message callback error: {e}")
+
+    async def _ping_loop(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            if self._ping_sent is None:  # an unanswered ping keeps its send time for the watchdog
+                self._ping_sent = time.monotonic()
+            await ws.send(json.dumps({"op": "ping"}))
+
+    async def _watchdog(self, ws):
+        tick = max(0.05, min(1.0, (self.stale_after or 4.0) / 4))
+        while True:
+            await asyncio.sleep(tick)
+            now = time.monotonic()
+            reason = None
+            if self.stale_after and now - self.last_message_at > self.stale_after:
+                reason = f"no frames for {now - self.last_message_at:.1f}s"
+            elif (self.pong_timeout and self._pongs_seen and self._ping_sent is not None
+                  and now - self._ping_sent > self.pong_timeout):
+                reason = f"ping unanswered for {now - self._ping_sent:.1f}s"
+            if reason is not None:
+                self.stale_events += 1
+                if self.stale_since is None:  # a stall that outlives a reconnect keeps its start
+                    self.stale_since = self.last_message_at
+                self._stale_reason = f"stale: {reason}"
+                self._emit_state('stale', reason)
+                # TCP may still look healthy, so don't wait on a close handshake
+                ws.transport.abort()
+                return
+
+    def _end_stale(self, received: float):
+        """First frame after a stale period: record how long the feed was effectively down."""
+        elapsed = received - self.stale_since
+        self.stale_since = None
+        self.stale_seconds += elapsed
+        self.last_stale_ms = elapsed * 1000.0
+        if self.recorder is not None:
+            self.recorder.record('feed.stale', elapsed)
+
+    def stale_for(self) -> float:
+        """Seconds the feed has been stale so far (0 when healthy)."""
+        since = self.stale_since
+        return time.monotonic() - since if since is not None else 0.0
+
+    def _handle_pong(self, raw, received: float) -> bool:
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            return False
+        if not isinstance(msg, dict) or msg.get('op') != 'pong':
+            return False
+        self._pongs_seen = True
+        if self._ping_sent is not None:
+            rtt = received - self._ping_sent
+            self._ping_sent = None
+            self.rtt_ms = rtt * 1000.0
+            if self.recorder is not None:
+                self.recorder.record('feed.rtt', rtt)
+        return True
+
+    def _track_lag(self, raw, received_wall: float):
+        """Exchange ts -> receipt lag, read without a full parse (the consumer decodes the frame)."""
+        m = (_TS_RE_BYTES if isinstance(raw, bytes) else _TS_RE).search(raw)
+        if m is None:
+            return
+        try:
+            lag = received_wall * 1000.0 - float(m.group(1))
+        except ValueError:
+            return
+        self.last_lag_ms = lag
+        if self.recorder is not None and lag >= 0:
+            self.recorder.record('feed.lag', lag / 1000.0)
+
+    def send(self, payload: dict):
+        """Send a JSON frame from any thread (no-op while disconnected)."""
+        loop, ws = self._loop, self._ws
+        if loop is not None and ws is not None:
+            asyncio.run_coroutine_threadsafe(ws.send(json.dumps(payload)), loop)
+
+    def stats(self) -> dict:
+        return {
+            'connected': self.connected,
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'messages': self.messages,
+            'last_reconnect_ms': self.last_reconnect_ms,
+            'rtt_ms': self.rtt_ms,
+            'lag_ms': self.last_lag_ms,
+            'last_error': self.last_error,
+            'stale': self.stale_since is not None,
+            'stale_for_ms': self.stale_for() * 1000.0,
+            'stale_events': self.stale_events,
+            'stale_seconds': self.stale_seconds,
+            'last_stale_ms': self.last_stale_ms,
+        }
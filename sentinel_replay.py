@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Record/replay of Sentinel burst streams.
+
+FrameRecorder appends every raw frame with its receipt timestamp to a gzip-compressed JSON lines
+file ({"t": receipt epoch seconds, "raw": frame}). replay_frames() feeds a recording back into any
+on_message(raw, received_wall, received) sink -- normally SignalPipeline.on_message -- at 1x, Nx or
+maximum speed. Burst `ts` values are rebased by default so each frame keeps its recorded feed lag
+relative to replay time (otherwise every old signal would be expired as stale).
+
+Usage: python sentinel_replay.py feed.jsonl.gz [--speed 1|N|0=max] [--symbols BTCUSDT,ETHUSDT]
+                                 [--fill-latency-ms 50] [--live]
+"""
+
+import argparse
+import gzip
+import json
+import re
+import threading
+import time
+
+_TS_RE = re.compile(r'("ts"\s*:\s*)(\d+(?:\.\d+)?)')
+
+
+class FrameRecorder:
+    """Thread-safe appender of raw frames to a .jsonl.gz recording."""
+
+    def __init__(self, path: str, flush_every: int = 200):
+        self.path = path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        # Appending writes a new gzip member; multi-member files read back as one stream
+        self._fh = gzip.open(path, 'at', encoding='utf-8')
+        self.frames = 0
+
+    def record(self, raw, received_wall: float = None, received: float = None):
+        """Usable directly as a client on_message callback (received is unused)."""
+        if isinstance(raw, (bytes, bytearray)):
+            raw = raw.decode('utf-8', 'replace')
+        line = json.dumps({'t': time.time() if received_wall is None else received_wall, 'raw': raw})
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(line + '\n')
+            self.frames += 1
+            if self.frames % self.flush_every == 0:
+                self._fh.flush()
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+def read_recording(path: str):
+    """Yield (receipt_time, raw) from a recording (.gz or plain JSON lines)."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(rec, dict) and 'raw' in rec:
+                yield float(rec.get('t') or 0.0), rec['raw']
+
+
+def rebase_ts(raw: str, shift_ms: float) -> str:
+    """Shift the burst's `ts` by shift_ms without parsing the frame."""
+    return _TS_RE.sub(lambda m: m.group(1) + str(int(float(m.group(2)) + shift_ms)), raw, count=1)
+
+
+def replay_frames(path: str, sink, speed: float = 1.0, rebase: bool = True, stop_event: threading.Event = None) -> dict:
+    """Feed a recording into sink(raw, received_wall, received). speed: 1 = recorded pace,
+    N = N times faster, 0 = as fast as possible. Returns frames sent and wall time."""
+    started_wall, started = time.time(), time.monotonic()
+    first_t = None
+    sent = 0
+    for t, raw in read_recording(path):
+        if stop_event is not None and stop_event.is_set():
+            break
+        if first_t is None:
+            first_t = t
+        if speed and speed > 0:
+            due = started + (t - first_t) / speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        now_wall, now = time.time(), time.monotonic()
+        if rebase:
+            # Keep the recorded ts->receipt lag: new ts = now - (recorded receipt - recorded ts)
+            raw = rebase_ts(raw, (now_wall - t) * 1000.0)
+        sink(raw, now_wall, now)
+        sent += 1
+    return {'frames': sent, 'seconds': time.monotonic() - started, 'started_at': started_wall}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording')
+    parser.add_argument('--speed', type=float, default=1.0, help='1 = recorded pace, N = N x faster, 0 = max')
+    parser.add_argument('--symbols', default='BTCUSDT', help='comma-separated subscribed symbols')
+    parser.add_argument('--wager', type=float, default=0.10)
+    parser.add_argument('--multiplier', type=float, default=1000)
+    parser.add_argument('--fill-latency-ms', type=float, default=50.0, help='paper fill latency')
+    parser.add_argument('--coalesce-window-ms', type=float, help='override SIGNAL_COALESCE_WINDOW_MS (0 = off)')
+    parser.add_argument('--no-rebase', action='store_true', help='keep recorded ts values')
+    parser.add_argument('--max-positions', type=int, help='admission control: cap on open + in-flight positions')
+    parser.add_argument('--max-inflight', type=int, help='admission control: cap on orders placed at once')
+    parser.add_argument('--live', action='store_true', help='trade through a real browser instead of paper')
+    args = parser.parse_args()
+
+    from signal_pipeline import SignalPipeline
+    if args.live:
+        from browser import init_browser
+        from trading_interface import TradingInterface
+        trading = TradingInterface(init_browser())
+    else:
+        from paper_trading import PaperTradingInterface
+        trading = PaperTradingInterface(fill_latency_ms=args.fill_latency_ms)
+
+    overrides = {}
+    if args.coalesce_window_ms is not None:
+        overrides['coalesce_window_ms'] = args.coalesce_window_ms
+    if args.max_positions is not None or args.max_inflight is not None:
+        from admission import AdmissionController
+        overrides['admission'] = AdmissionController.from_config(max_positions=args.max_positions,
+                                                                 max_inflight=args.max_inflight)
+    pipeline = SignalPipeline.from_config(trading, **overrides)
+    pipeline.settings = {
+        'symbols': tuple(s.strip().upper() for s in args.symbols.split(',') if s.strip()),
+        'wager': args.wager,
+        'multiplier': args.multiplier,
+    }
+    result = replay_frames(args.recording, pipeline.on_message, args.speed, rebase=not args.no_rebase)
+    # Drain: wait until coalescer windows close and every lane is idle (checked twice to cover hand-offs)
+    while True:
+        if pipeline.idle():
+            time.sleep(0.05)
+            if pipeline.idle():
+                break
+        time.sleep(0.05)
+    pipeline.stop()
+
+    st = pipeline.stats()
+    print(f"replayed {result['frames']} frames in {result['seconds']:.2f}s "
+          f"({result['frames'] / max(result['seconds'], 1e-9):.0f} frames/s) speed={args.speed or 'max'}")
+    print(f"decoder:   {st['decoder']}")
+    print(f"coalescer: {st['coalescer']}")
+    print(f"queues:    {st['queues']['total']}")
+    if 'admission' in st:
+        print(f"admission: {st['admission']}")
+    print(pipeline.status_line())
+    print(trading.latency_report())
+
+
+if __name__ == '__main__':
+    main()
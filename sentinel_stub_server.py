@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Sentinel WebSocket feed, for load and reconnect testing without network.
+
+Speaks the protocol the bot uses: accepts {"op":"sub","symbols":"BTCUSDT,ETHUSDT",...}, answers
+{"op":"ping"} with {"op":"pong"}, and emits {"s","ts","pv","cv","delta","strings"} bursts for the
+subscribed symbols. Rate, burstiness, symbol mix, feed lag, disconnects, silent stalls (socket
+open, no frames or pongs) and slow-consumer handling are configurable.
+
+Point the bot at it with SENTINEL_WS_URL=ws://127.0.0.1:8765 (environment or config.py), or run
+with --selftest to connect a headless client + signal pipeline with paper fills and print
+reconnect, RTT, throughput and latency figures.
+
+Usage: python sentinel_stub_server.py [--port 8765] [--rate 50] [--burst-size 1]
+                                      [--symbols BTCUSDT:5,ETHUSDT:3,SOLUSDT:2]
+                                      [--disconnect-every 0] [--stall-every 0 --stall-for 5]
+                                      [--slow-policy block|drop|disconnect]
+                                      [--selftest 10]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+
+import websockets
+
+
+def parse_mix(spec: str) -> dict:
+    """'BTCUSDT:5,ETHUSDT:3' -> {'BTCUSDT': 5.0, 'ETHUSDT': 3.0} (weight defaults to 1)."""
+    mix = {}
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition(':')
+        mix[name.strip().upper()] = float(weight) if weight else 1.0
+    return mix
+
+
+class StubSentinelServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, rate: float = 50.0, burst_size: int = 1,
+                 mix: dict = None, lag_ms: float = 20.0, disconnect_every: float = 0.0,
+                 slow_policy: str = 'block', max_buffer: int = 256 * 1024, seed: int = None,
+                 stall_every: float = 0.0, stall_for: float = 5.0):
+        """
+        rate: bursts per second per connection (Poisson arrivals); burst_size: frames sent back to
+        back per arrival (>1 emulates volatile clusters). lag_ms: how far `ts` trails the send time.
+        disconnect_every: close each connection after this many seconds (0 = never).
+        stall_every / stall_for: every stall_every seconds, go silent for stall_for seconds -- no
+        bursts and no pongs -- while keeping the socket open (0 = never).
+        slow_policy: when the client's unsent buffer exceeds max_buffer bytes, 'block' waits for it
+        to drain (backpressure), 'drop' skips frames, 'disconnect' closes the connection.
+        """
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.burst_size = max(1, int(burst_size))
+        self.mix = mix or {'BTCUSDT': 1.0}
+        self.lag_ms = lag_ms
+        self.disconnect_every = disconnect_every
+        self.stall_every = stall_every
+        self.stall_for = stall_for
+        self.slow_policy = slow_policy
+        self.max_buffer = max_buffer
+        self._rng = random.Random(seed)
+        self._prices = {s: 100 for s in self.mix}
+        self.connections = 0
+        self.sent = 0
+        self.dropped = 0
+        self.slow_disconnects = 0
+        self.pings = 0
+        self.stalls = 0
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def _frame(self, symbol: str) -> str:
+        pv = self._prices[symbol]
+        cv = max(1, pv + self._rng.randint(-25, 25))
+        self._prices[symbol] = cv
+        return json.dumps({
+            's': symbol,
+            'ts': int(time.time() * 1000 - self.lag_ms),
+            'pv': pv,
+            'cv': cv,
+            'delta': cv - pv,
+            'strings': self._rng.randint(5, 15),
+        })
+
+    @staticmethod
+    def _buffered(ws) -> int:
+        try:
+            return ws.transport.get_write_buffer_size()
+        except Exception:
+            return 0
+
+    async def _emit(self, ws, subscribed: dict, conn: dict):
+        names = list(subscribed)
+        weights = [subscribed[n] for n in names]
+        while True:
+            await asyncio.sleep(self._rng.expovariate(self.rate) if self.rate > 0 else 3600)
+            if conn['stalled']:
+                continue
+            for _ in range(self.burst_size):
+                if self._buffered(ws) > self.max_buffer:
+                    if self.slow_policy == 'drop':
+                        self.dropped += 1
+                        continue
+                    if self.slow_policy == 'disconnect':
+                        self.slow_disconnects += 1
+                        ws.transport.abort()  # a close handshake would queue behind the unread data
+                        return
+                await ws.send(self._frame(self._rng.choices(names, weights)[0]))  # 'block' waits in drain
+                self.sent += 1
+
+    async def _handler(self, ws):
+        self.connections += 1
+        conn = {'stalled': False}
+        emitter = None
+        killer = None
+        staller = None
+        if self.disconnect_every > 0:
+            async def _kill():
+                await asyncio.sleep(self.disconnect_every)
+                await ws.close(1012, 'injected disconnect')
+            killer = asyncio.ensure_future(_kill())
+        if self.stall_every > 0:
+            async def _stall():
+                while True:
+                    await asyncio.sleep(self.stall_every)
+                    conn['stalled'] = True
+                    self.stalls += 1
+                    await asyncio.sleep(self.stall_for)
+                    conn['stalled'] = False
+            staller = asyncio.ensure_future(_stall())
+        try:
+            async for raw in ws:
+                try:
+                    msg = json.loads(raw)
+                except ValueError:
+                    continue
+                op = msg.get('op') if isinstance(msg, dict) else None
+                if op == 'ping':
+                    if conn['stalled']:
+                        continue
+                    self.pings += 1
+                    await ws.send(json.dumps({'op': 'pong', 'ts': int(time.time() * 1000)}))
+                elif op == 'sub':
+                    wanted = {s.strip().upper() for s in str(msg.get('symbols', '')).split(',') if s.strip()}
+                    subscribed = {s: w for s, w in self.mix.items() if s in wanted} or \
+                                 {s: 1.0 for s in wanted}
+                    for s in subscribed:
+                        self._prices.setdefault(s, 100)
+                    if emitter is not None:
+                        emitter.cancel()
+                    emitter = asyncio.ensure_future(self._emit(ws, subscribed, conn))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for task in (emitter, killer, staller):
+                if task is not None:
+                    task.cancel()
+
+    async def serve(self, stop: asyncio.Event = None):
+        # send() waits for drain above write_limit: that is the 'block' policy; the others need headroom
+        # above max_buffer so their check runs before send() stalls
+        write_limit = self.max_buffer if self.slow_policy == 'block' else self.max_buffer * 4
+        async with websockets.serve(self._handler, self.host, self.port, write_limit=write_limit):
+            print(f"Stub Sentinel listening on {self.url}")
+            await (stop.wait() if stop is not None else asyncio.Future())
+
+    def stats(self) -> dict:
+        return {'connections': self.connections, 'sent': self.sent, 'dropped': self.dropped,
+                'slow_disconnects': self.slow_disconnects, 'pings': self.pings, 'stalls': self.stalls}
+
+
+def selftest(server: StubSentinelServer, seconds: float, symbols, fill_latency_ms: float):
+    """Run a SentinelClient + SignalPipeline (paper fills) against the stub and report."""
+    from paper_trading import PaperTradingInterface
+    from sentinel_client import SentinelClient
+    from signal_pipeline import SignalPipeline
+
+    loop = asyncio.new_event_loop()
+    stop = asyncio.Event()
+    thread = threading.Thread(target=lambda: loop.run_until_complete(server.serve(stop)), daemon=True)
+    thread.start()
+    time.sleep(0.5)
+
+    trading = PaperTradingInterface(fill_latency_ms=fill_latency_ms)
+    pipeline = SignalPipeline.from_config(trading)
+    pipeline.settings = {'symbols': tuple(symbols), 'wager': 0.10, 'multiplier': 1000}
+    client = SentinelClient(server.url, list(symbols), pipeline.on_message, recorder=trading.latency,
+                            ping_interval=1.0, backoff_initial=0.2, backoff_max=2.0,
+                            stale_after=3.0, pong_timeout=2.0)
+    client.start()
+    time.sleep(seconds)
+    client.stop()
+    pipeline.stop()
+    loop.call_soon_threadsafe(stop.set)
+    thread.join(2.0)
+
+    st = pipeline.stats()
+    print(f"server:    {server.stats()}")
+    print(f"client:    {client.stats()}")
+    print(f"decoder:   {st['decoder']}  ({st['decoder']['frames'] / seconds:.0f} frames/s)")
+    print(f"coalescer: {st['coalescer']}")
+    print(f"queues:    {st['queues']['total']}")
+    print(f"orders:    {trading.orders}")
+    print(trading.latency_report())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=float, default=50.0, help='burst arrivals per second per connection')
+    parser.add_argument('--burst-size', type=int, default=1, help='frames per arrival')
+    parser.add_argument('--symbols', default='BTCUSDT:5,ETHUSDT:3,SOLUSDT:2', help='symbol mix with weights')
+    parser.add_argument('--lag-ms', type=float, default=20.0, help='how far burst ts trails send time')
+    parser.add_argument('--disconnect-every', type=float, default=0.0, help='seconds before each connection is dropped')
+    parser.add_argument('--stall-every', type=float, default=0.0, help='seconds between silent stalls (socket stays open)')
+    parser.add_argument('--stall-for', type=float, default=5.0, help='length of each stall in seconds')
+    parser.add_argument('--slow-policy', choices=('block', 'drop', 'disconnect'), default='block')
+    parser.add_argument('--max-buffer', type=int, default=256 * 1024, help='unsent bytes before slow-policy applies')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--selftest', type=float, metavar='SECONDS', help='run a headless client against the stub')
+    parser.add_argument('--fill-latency-ms', type=float, default=50.0, help='paper fill latency for --selftest')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.symbols)
+    server = StubSentinelServer(args.host, args.port, args.rate, args.burst_size, mix, args.lag_ms,
+                                args.disconnect_every, args.slow_policy, args.max_buffer, args.seed,
+                                args.stall_every, args.stall_for)
+    if args.selftest:
+        selftest(server, args.selftest, list(mix), args.fill_latency_ms)
+        return
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        print(f"\nStopped: {server.stats()}")
+
+
+if __name__ == '__main__':
+    main()
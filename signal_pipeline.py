@@ -0,0 +1,506 @@
+"""
+Signal pipeline between the Sentinel WebSocket reader and the browser.
+
+The reader thread only parses and enqueues; execution workers drain the queues and run trades,
+so a multi-second execute_trade never stalls frame reads, pings or reconnects.
+SignalPipeline wires the stages together; the GUI owns one and the replay harness drives one headless.
+"""
+
+import threading
+import time
+from collections import deque
+
+from latency import SignalTrace
+from sentinel_codec import Burst, SentinelDecoder
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'coalesce')
+
+
+class SignalQueue:
+    """Bounded FIFO whose put() never blocks.
+
+    When full, 'drop_oldest' evicts the head, 'drop_newest' rejects the incoming item. 'coalesce'
+    replaces a pending item with the same key (keeping its place in line) and otherwise behaves
+    like drop_oldest. Wait time is measured from first enqueue of a slot to its dequeue.
+    """
+
+    def __init__(self, maxsize: int = 16, policy: str = 'drop_oldest', key=None, recorder=None, on_discard=None):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}; expected one of {OVERFLOW_POLICIES}")
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.key = key
+        self.recorder = recorder
+        self.on_discard = on_discard   # on_discard(item, reason) for dropped/coalesced items, called outside the lock
+        self._items = deque()          # entries: [key, item, enqueued_at]
+        self._pending = {}             # key -> entry, only for 'coalesce'
+        self._cond = threading.Condition()
+        self._closed = False
+        self.enqueued = 0
+        self.dequeued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.last_wait_ms = 0.0
+
+    def put(self, item) -> bool:
+        """Enqueue without blocking; returns False if `item` itself was dropped."""
+        discarded = None
+        accepted = True
+        with self._cond:
+            if self._closed:
+                return False
+            k = self.key(item) if (self.policy == 'coalesce' and self.key is not None) else None
+            entry = self._pending.get(k) if k is not None else None
+            if entry is not None:
+                discarded = (entry[1], 'coalesced')
+                entry[1] = item
+                self.coalesced += 1
+            elif len(self._items) >= self.maxsize and self.policy == 'drop_newest':
+                discarded = (item, 'dropped')
+                accepted = False
+                self.dropped += 1
+            else:
+                if len(self._items) >= self.maxsize:
+                    old = self._items.popleft()
+                    if old[0] is not None:
+                        self._pending.pop(old[0], None)
+                    discarded = (old[1], 'dropped')
+                    self.dropped += 1
+                entry = [k, item, time.monotonic()]
+                self._items.append(entry)
+                if k is not None:
+                    self._pending[k] = entry
+                self.enqueued += 1
+                if len(self._items) > self.max_depth:
+                    self.max_depth = len(self._items)
+                self._cond.notify()
+        if discarded is not None and self.on_discard is not None:
+            try:
+                self.on_discard(*discarded)
+            except Exception:
+                pass
+        return accepted
+
+    def get(self, timeout: float = None):
+        """Next item, or None on timeout / after close()."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            k, item, enqueued_at = self._items.popleft()
+            if k is not None:
+                self._pending.pop(k, None)
+            self.dequeued += 1
+        waited = time.monotonic() - enqueued_at
+        self.last_wait_ms = waited * 1000.0
+        if self.recorder is not None:
+            self.recorder.record('signal.queue_wait', waited)
+        return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'depth': len(self._items),
+                'max_depth': self.max_depth,
+                'maxsize': self.maxsize,
+                'policy': self.policy,
+                'enqueued': self.enqueued,
+                'dequeued': self.dequeued,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'last_wait_ms': self.last_wait_ms,
+            }
+
+
+class SignalWorker:
+    """Daemon thread that feeds queued signals to `handler` one at a time."""
+
+    def __init__(self, queue: SignalQueue, handler, name: str = 'signal-worker'):
+        self.queue = queue
+        self.handler = handler
+        self.name = name
+        self._stop = threading.Event()
+        self._thread = None
+        self.busy = False
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        self._stop.set()
+        self.queue.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            item = self.queue.get(timeout=0.5)
+            if item is None:
+                continue
+            self.busy = True
+            try:
+                self.handler(item)
+            except Exception as e:
+                print(f"Signal worker error: {e}")
+            finally:
+                self.busy = False
+
+
+COALESCE_MODES = ('latest', 'strongest')
+
+
+class BurstCoalescer:
+    """Per-symbol coalescing stage in front of the signal queue.
+
+    The first burst for a symbol passes straight through; further bursts within `window_ms` of
+    the last emitted one are merged into a single pending burst (the latest, or the one with the
+    largest |delta| for mode 'strongest') that is emitted when the window closes. Bursts whose
+    exchange `ts` is older than `max_age_ms` are expired instead of emitted. Items are
+    (data, trace) tuples.
+    """
+
+    def __init__(self, emit, window_ms: float = 250, mode: str = 'latest', max_age_ms: float = None, on_discard=None):
+        if mode not in COALESCE_MODES:
+            raise ValueError(f"Unknown coalesce mode {mode!r}; expected one of {COALESCE_MODES}")
+        self.emit = emit
+        self.window = max(0.0, float(window_ms or 0)) / 1000.0
+        self.mode = mode
+        self.max_age_ms = max_age_ms
+        self.on_discard = on_discard   # on_discard(item, reason) for merged/expired items
+        self._lock = threading.Lock()
+        self._pending = {}             # symbol -> item waiting for its window to close
+        self._last_emit = {}           # symbol -> monotonic time of the last emit
+        self._timers = {}
+        self.offered = 0
+        self.emitted = 0
+        self.merged = 0
+        self.expired = 0
+
+    def _discard(self, item, reason: str):
+        if self.on_discard is not None:
+            try:
+                self.on_discard(item, reason)
+            except Exception:
+                pass
+
+    def _emit(self, item):
+        if self.expire(item):
+            return
+        self.emitted += 1
+        self.emit(item)
+
+    def age_ms(self, data: dict):
+        """Milliseconds since the burst's exchange `ts`, or None if it has none."""
+        try:
+            return time.time() * 1000.0 - float(data['ts'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def expire(self, item) -> bool:
+        """Drop `item` (counted and reported) if its `ts` is older than max_age_ms. Also meant to be
+        called by the consumer right before execution, since a signal can age in the queue."""
+        if not self.max_age_ms:
+            return False
+        age = self.age_ms(item[0])
+        if age is None or age <= self.max_age_ms:
+            return False
+        self.expired += 1
+        self._discard(item, 'expired')
+        return True
+
+    def _pick(self, held, incoming):
+        """Return (keep, drop) for two bursts of the same symbol."""
+        if self.mode == 'strongest':
+            try:
+                if abs(float(held[0].get('delta', 0))) > abs(float(incoming[0].get('delta', 0))):
+                    return held, incoming
+            except (TypeError, ValueError):
+                pass
+        return incoming, held
+
+    def offer(self, item):
+        self.offered += 1
+        if self.expire(item):
+            return
+        if self.window <= 0:
+            self._emit(item)
+            return
+        symbol = (item[0].get('s') or '').upper()
+        now = time.monotonic()
+        dropped = None
+        with self._lock:
+            held = self._pending.get(symbol)
+            last = self._last_emit.get(symbol)
+            if held is None and (last is None or now - last >= self.window):
+                self._last_emit[symbol] = now
+                passthrough = True
+            else:
+                passthrough = False
+                if held is not None:
+                    item, dropped = self._pick(held, item)
+                    self.merged += 1
+                self._pending[symbol] = item
+                if symbol not in self._timers:
+                    timer = threading.Timer(max(0.0, last + self.window - now), self._flush, (symbol,))
+                    timer.daemon = True
+                    self._timers[symbol] = timer
+                    timer.start()
+        if dropped is not None:
+            self._discard(dropped, 'merged')
+        if passthrough:
+            self._emit(item)
+
+    def _flush(self, symbol: str):
+        with self._lock:
+            self._timers.pop(symbol, None)
+            item = self._pending.pop(symbol, None)
+            if item is not None:
+                self._last_emit[symbol] = time.monotonic()
+        if item is not None:
+            self._emit(item)
+
+    def stop(self):
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+            self._pending.clear()
+
+    def stats(self) -> dict:
+        return {
+            'offered': self.offered,
+            'emitted': self.emitted,
+            'merged': self.merged,
+            'expired': self.expired,
+            'pending': len(self._pending),
+            'window_ms': self.window * 1000.0,
+            'mode': self.mode,
+        }
+
+
+class InstrumentRouter:
+    """Routes (data, trace) items to per-instrument lanes by Sentinel symbol.
+
+    Each instrument gets its own SignalQueue and SignalWorker (created on first use), so a burst on
+    one instrument never queues behind another instrument's signals. `make_handler(instrument)`
+    returns the worker callback for a lane. Symbols without a route are discarded as 'unrouted'.
+    """
+
+    def __init__(self, routes: dict, make_handler, maxsize: int = 16, policy: str = 'drop_oldest',
+                 recorder=None, on_discard=None):
+        self.routes = {k.upper(): v for k, v in routes.items()}
+        self.make_handler = make_handler
+        self.maxsize = maxsize
+        self.policy = policy
+        self.recorder = recorder
+        self.on_discard = on_discard
+        self._lock = threading.Lock()
+        self.lanes = {}                # instrument -> (SignalQueue, SignalWorker)
+        self.unrouted = 0
+
+    def instrument_for(self, symbol: str):
+        return self.routes.get((symbol or '').upper())
+
+    def _lane(self, instrument: str):
+        lane = self.lanes.get(instrument)
+        if lane is None:
+            with self._lock:
+                lane = self.lanes.get(instrument)
+                if lane is None:
+                    queue = SignalQueue(self.maxsize, self.policy, key=lambda item: item[0].get('s'),
+                                        recorder=self.recorder, on_discard=self.on_discard)
+                    worker = SignalWorker(queue, self.make_handler(instrument), name=f'signal-worker-{instrument}')
+                    worker.start()
+                    lane = self.lanes[instrument] = (queue, worker)
+        return lane
+
+    def route(self, item) -> bool:
+        instrument = self.instrument_for(item[0].get('s'))
+        if instrument is None:
+            self.unrouted += 1
+            if self.on_discard is not None:
+                try:
+                    self.on_discard(item, 'unrouted')
+                except Exception:
+                    pass
+            return False
+        return self._lane(instrument)[0].put(item)
+
+    def stop(self):
+        for queue, worker in list(self.lanes.values()):
+            worker.stop()
+
+    def stats(self) -> dict:
+        """Per-instrument queue stats plus totals across lanes under 'total'."""
+        per = {instrument: queue.stats() for instrument, (queue, _) in list(self.lanes.items())}
+        total = {
+            'depth': sum(q['depth'] for q in per.values()),
+            'maxsize': self.maxsize * max(1, len(per)),
+            'dropped': sum(q['dropped'] for q in per.values()),
+            'coalesced': sum(q['coalesced'] for q in per.values()),
+            'last_wait_ms': max((q['last_wait_ms'] for q in per.values()), default=0.0),
+            'unrouted': self.unrouted,
+        }
+        return {'lanes': per, 'total': total}
+
+
+class SignalPipeline:
+    """Sentinel frames -> trades: SentinelDecoder -> BurstCoalescer -> InstrumentRouter lanes ->
+    trading.for_instrument(...).execute_trade.
+
+    settings: {'symbols', 'wager', 'multiplier'} snapshot, replaced (never mutated) by the owner.
+    gate(item, trading): optional check on the worker right before executing; returns a rejection
+        message or None.
+    admission: optional AdmissionController; each trade holds one of its slots while it executes.
+    on_result(outcome, trading, direction, message): optional notification after each executed or
+        rejected signal ('placed', 'failed', 'rejected', 'error'), called on the worker thread.
+    """
+
+    def __init__(self, trading, routes: dict, queue_maxsize: int = 16, queue_policy: str = 'drop_oldest',
+                 coalesce_window_ms: float = 250, coalesce_mode: str = 'latest', max_age_ms: float = None,
+                 gate=None, on_result=None, admission=None, admission_wait_ms: float = 0):
+        self.trading = trading
+        self.gate = gate
+        self.admission = admission
+        self.admission_wait = (admission_wait_ms or 0) / 1000.0
+        self.on_result = on_result
+        self.decoder = SentinelDecoder()
+        self.settings = {'symbols': ('BTCUSDT',), 'wager': None, 'multiplier': None}
+        self.router = InstrumentRouter(
+            routes, self._make_handler, queue_maxsize, queue_policy,
+            recorder=getattr(trading, 'latency', None), on_discard=self._on_discard,
+        )
+        # Bursts are coalesced per symbol and stale ones expired before they reach the queues
+        self.coalescer = BurstCoalescer(
+            self.router.route, coalesce_window_ms, coalesce_mode, max_age_ms, on_discard=self._on_discard,
+        )
+
+    @classmethod
+    def from_config(cls, trading, **kwargs):
+        from config import (SENTINEL_ROUTES, SIGNAL_QUEUE_MAXSIZE, SIGNAL_QUEUE_POLICY,
+                            SIGNAL_COALESCE_WINDOW_MS, SIGNAL_COALESCE_MODE, SIGNAL_MAX_AGE_MS, ADMISSION_WAIT_MS)
+        params = dict(routes=SENTINEL_ROUTES, queue_maxsize=SIGNAL_QUEUE_MAXSIZE, queue_policy=SIGNAL_QUEUE_POLICY,
+                      coalesce_window_ms=SIGNAL_COALESCE_WINDOW_MS, coalesce_mode=SIGNAL_COALESCE_MODE,
+                      max_age_ms=SIGNAL_MAX_AGE_MS, admission_wait_ms=ADMISSION_WAIT_MS)
+        params.update(kwargs)
+        return cls(trading, **params)
+
+    @property
+    def settings(self) -> dict:
+        return self._settings
+
+    @settings.setter
+    def settings(self, settings: dict):
+        self._settings = settings
+        self.decoder.symbols = settings['symbols']
+
+    def on_message(self, raw, received_wall: float, received: float):
+        """Socket-thread entry point for one raw frame; never blocks."""
+        burst = self.decoder.decode(raw)
+        if burst is not None:
+            self.submit(burst, SignalTrace.from_burst(burst, received_wall, received))
+
+    def submit(self, data, trace: SignalTrace = None):
+        """Queue a burst (Burst or raw dict). Safe to call from any thread and never blocks."""
+        if isinstance(data, dict):
+            data = Burst.from_dict(data)
+        if data.s not in self._settings['symbols']:
+            return
+        if trace is None:
+            trace = SignalTrace.from_burst(data)
+        self.coalescer.offer((data, trace))
+
+    def _on_discard(self, item, reason: str):
+        self.trading.record_signal(item[1], reason)
+
+    def _make_handler(self, instrument: str):
+        trading = self.trading.for_instrument(instrument)
+        return lambda item: self._execute(item, trading)
+
+    def _notify(self, outcome: str, trading, direction: str, message: str):
+        if self.on_result is not None:
+            try:
+                self.on_result(outcome, trading, direction, message)
+            except Exception as e:
+                print(f"Signal result callback error: {e}")
+
+    def _execute(self, item, trading):
+        """Worker: run the trade for one burst on the instrument's interface."""
+        data, trace = item
+        trace.mark('dequeued')
+        direction = 'up' if data.get('delta', 0) > 0 else 'down'
+        trace.direction = direction
+        # The signal may have gone stale while queued behind a slow trade
+        if self.coalescer.expire(item):
+            return
+        settings = self._settings
+        try:
+            problem = self.gate(item, trading) if self.gate is not None else None
+            if problem is None and (settings['wager'] is None or settings['multiplier'] is None):
+                problem = "Invalid wager/multiplier for signal trade"
+            if problem is None and self.admission is not None:
+                reason = self.admission.admit(trading.instrument, self.admission_wait)
+                if reason is not None:
+                    problem = f"{reason} - Signal ignored"
+            if problem is not None:
+                trading.record_signal(trace, 'rejected')
+                self._notify('rejected', trading, direction, problem)
+                return
+            success = False
+            try:
+                success = trading.execute_trade(direction, settings['wager'], settings['multiplier'], trace=trace)
+            finally:
+                if self.admission is not None:
+                    self.admission.release(trading.instrument, filled=bool(success))
+            if success:
+                self._notify('placed', trading, direction, f"Signal received - {trading.instrument} {direction.upper()} trade placed")
+            else:
+                self._notify('failed', trading, direction, f"Failed to place trade on signal: {trading.instrument} {direction.upper()}")
+        except Exception as e:
+            self._notify('error', trading, direction, f"Signal trade error: {str(e)}")
+
+    def idle(self) -> bool:
+        """True when nothing is pending in the coalescer or queues and no worker is executing."""
+        if self.coalescer.stats()['pending']:
+            return False
+        for queue, worker in list(self.router.lanes.values()):
+            if len(queue) or worker.busy:
+                return False
+        return True
+
+    def stats(self) -> dict:
+        st = {'decoder': self.decoder.stats(), 'coalescer': self.coalescer.stats(), 'queues': self.router.stats()}
+        if self.admission is not None:
+            st['admission'] = self.admission.stats()
+        return st
+
+    def status_line(self) -> str:
+        q = self.router.stats()['total']
+        c = self.coalescer.stats()
+        line = (f"Signal latency: {self.trading.signal_stats.summary_line()} | "
+                f"queue {q['depth']}/{q['maxsize']} wait {q['last_wait_ms']:.0f}ms drops {q['dropped']} | "
+                f"merged {c['merged']} expired {c['expired']}")
+        if self.admission is not None:
+            line += f" | {self.admission.summary_line()}"
+        return line
+
+    def stop(self):
+        self.coalescer.stop()
+        self.router.stop()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Admission control tests: caps, release / fills and sync_positions ordering against snapshots.
+Runs headless: python test_admission.py, or under pytest.
+"""
+
+import sys
+import threading
+import time
+
+from admission import AdmissionController
+
+
+def test_caps():
+    """Each cap rejects with its own reason and is counted"""
+    adm = AdmissionController(max_positions=None, max_inflight=2)
+    assert adm.admit('BTC') is None and adm.admit('ETH') is None
+    assert 'in-flight' in adm.admit('SOL')
+
+    adm = AdmissionController(max_positions=2)
+    adm.sync_positions({'BTC': 1}, time.monotonic())
+    assert adm.admit('ETH') is None
+    assert 'positions' in adm.admit('SOL')        # 1 open + 1 in flight
+
+    adm = AdmissionController(max_positions=None, max_per_instrument=2, instrument_limits={'SOL': 1})
+    assert adm.admit('BTC') is None
+    adm.release('BTC', filled=True)
+    assert adm.admit('BTC') is None
+    assert 'BTC' in adm.admit('BTC')              # 1 open + 1 in flight
+    assert adm.admit('SOL') is None
+    assert 'SOL' in adm.admit('SOL')              # override of the per-instrument cap
+    st = adm.stats()
+    assert st['rejected_by'] == {'inflight': 0, 'positions': 0, 'instrument': 2}
+    assert (st['inflight'], st['open']) == (2, 1)
+
+
+def test_release_without_admit_is_ignored():
+    adm = AdmissionController(max_positions=1)
+    adm.release('BTC', filled=True)
+    assert adm.stats()['open'] == 0
+
+
+def test_sync_positions_keeps_fills_after_snapshot_start():
+    """A fill released after the snapshot started may be missing from it and stays counted"""
+    adm = AdmissionController(max_positions=None)
+    adm.admit('BTC')
+    adm.release('BTC', filled=True)               # fill before the snapshot: covered by it
+    taken_at = time.monotonic()
+    adm.admit('BTC')
+    adm.release('BTC', filled=True)               # fill after the snapshot started
+    adm.sync_positions({'BTC': 1}, taken_at)
+    assert adm.stats()['per_instrument']['BTC']['open'] == 2
+    # A later snapshot covers both fills
+    adm.sync_positions({'BTC': 2}, time.monotonic())
+    assert adm.stats()['per_instrument']['BTC']['open'] == 2
+    adm.sync_positions({'BTC': 0}, time.monotonic())
+    assert adm.stats()['open'] == 0
+
+
+def test_sync_positions_stale_snapshot_never_undercounts():
+    """A snapshot that started before a fill can't lower the count below that fill"""
+    adm = AdmissionController(max_positions=1)
+    stale_taken_at = time.monotonic()
+    adm.admit('ETH')
+    adm.release('ETH', filled=True)
+    adm.sync_positions({}, stale_taken_at)
+    assert adm.at_capacity('ETH')
+    assert adm.admit('ETH') is not None
+
+
+def test_sync_total_without_instruments():
+    """A snapshot whose rows don't name their instrument resets only the total"""
+    adm = AdmissionController(max_positions=None, max_per_instrument=1)
+    adm.admit('ETH')
+    adm.release('ETH', filled=True)
+    adm.sync_total(2, time.monotonic())           # ETH + one position of unknown instrument
+    st = adm.stats()
+    assert st['open'] == 2
+    assert st['per_instrument']['ETH']['open'] == 1
+    assert adm.admit('BTC') is None               # BTC not charged for the unknown row
+    assert 'ETH' in adm.admit('ETH')              # ETH keeps its cap
+    adm.release('BTC', filled=False)
+    adm.sync_total(0, time.monotonic())
+    assert adm.stats()['per_instrument']['ETH']['open'] == 0
+    adm.closed('ETH')
+    assert adm.stats()['open'] == 0
+
+
+def test_closed():
+    adm = AdmissionController(max_positions=1)
+    adm.sync_positions({'BTC': 1}, time.monotonic())
+    assert adm.at_capacity('BTC')
+    adm.closed('BTC', count=5)
+    assert adm.stats()['open'] == 0
+    assert not adm.at_capacity('BTC')
+
+
+def test_admit_waits_for_capacity():
+    """admit(wait=...) is woken by a release on another thread"""
+    adm = AdmissionController(max_positions=None, max_inflight=1)
+    assert adm.admit('BTC') is None
+    threading.Timer(0.05, adm.release, ('BTC', False)).start()
+    started = time.monotonic()
+    assert adm.admit('ETH', wait=2.0) is None
+    assert time.monotonic() - started < 1.0
+    assert adm.admit('SOL', wait=0.05) is not None
+
+
+def main():
+    """Run all admission tests"""
+    print("🧪 ADMISSION CONTROL TESTS")
+    print("=" * 50)
+    tests = [
+        test_caps,
+        test_release_without_admit_is_ignored,
+        test_sync_positions_keeps_fills_after_snapshot_start,
+        test_sync_positions_stale_snapshot_never_undercounts,
+        test_sync_total_without_instruments,
+        test_closed,
+        test_admit_waits_for_capacity,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"   ❌ {test.__name__}: {e!r}")
+    print("=" * 50)
+    print(f"   Passed: {passed}/{len(tests)}")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
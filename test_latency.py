@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Latency instrumentation tests: histogram percentiles, stage laps and signal trace legs.
+Runs headless: python test_latency.py, or under pytest.
+"""
+
+import sys
+
+from latency import LatencyHistogram, LatencyRecorder, SignalStats, SignalTrace
+
+
+def test_histogram_percentiles():
+    """Log buckets: percentiles land within a bucket (~10%) of the true value, capped at max"""
+    h = LatencyHistogram()
+    for ms in range(1, 101):
+        h.record(ms / 1000.0)
+    assert h.count == 100
+    assert abs(h.percentile(50) - 0.050) / 0.050 < 0.1
+    assert abs(h.percentile(99) - 0.099) / 0.099 < 0.1
+    assert h.percentile(100) <= h.max == 0.1
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_stage_timer_laps():
+    rec = LatencyRecorder()
+    timer = rec.timer('trade.')
+    timer.lap('inputs')
+    timer.lap('inputs')
+    timer.lap('place_bet')
+    timer.total()
+    summary = rec.summary()
+    assert summary['trade.inputs']['count'] == 2
+    assert set(timer.laps) == {'inputs', 'place_bet', 'total'}
+    assert timer.laps['total'] >= timer.laps['inputs'] + timer.laps['place_bet']
+
+
+def test_signal_trace_legs():
+    trace = SignalTrace('BTCUSDT', exchange_ts_ms=1000.0, received_wall=1.25, received=10.0)
+    trace.marks.update({'dequeued': 10.001, 'exec_start': 10.002, 'click_issued': 10.010, 'confirmed': 10.110})
+    trace.mark('confirmed')                       # first mark of a name wins
+    legs = trace.durations()
+    assert round(legs['feed_ms'], 3) == 250.0
+    assert round(legs['queue_ms'], 3) == 1.0
+    assert round(legs['start_to_confirmed_ms'], 3) == 108.0
+    assert round(legs['total_ms'], 3) == 110.0
+    assert SignalTrace().durations()['total_ms'] is None
+
+
+def test_signal_stats_window():
+    rec = LatencyRecorder()
+    stats = SignalStats(rec, window=3)
+    for total in (10, 20, 30, 40):
+        trace = SignalTrace(received=0.0)
+        trace.marks['confirmed'] = total / 1000.0
+        stats.record(trace)
+    snap = stats.snapshot()
+    assert snap['total_ms']['n'] == 3
+    assert round(snap['total_ms']['p50_ms']) == 30
+    assert rec.summary()['signal.total']['count'] == 4
+
+
+def main():
+    """Run all latency tests"""
+    print("🧪 LATENCY TESTS")
+    print("=" * 50)
+    tests = [
+        test_histogram_percentiles,
+        test_stage_timer_laps,
+        test_signal_trace_legs,
+        test_signal_stats_window,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"   ❌ {test.__name__}: {e!r}")
+    print("=" * 50)
+    print(f"   Passed: {passed}/{len(tests)}")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
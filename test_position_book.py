@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+PositionBook tests: remove / swap bookkeeping, sync, mark P&L math and the stop-loss / trailing mask.
+Needs numpy (requirements.txt). Runs headless: python test_position_book.py, or under pytest.
+"""
+
+import sys
+
+from position_book import PositionBook
+
+
+def bet(pid, direction='up', entry=100.0, wager=1.0, mult=10.0, pnl=0.0, instrument='BTC'):
+    return {'id': pid, 'direction': direction, 'entry_price': entry, 'current_price': entry,
+            'wager': wager, 'multiplier': mult, 'pnl': pnl, 'instrument': instrument}
+
+
+def close(a, b):
+    return abs(a - b) < 1e-9
+
+
+def test_remove_swaps_last_row_in():
+    book = PositionBook(capacity=2)               # also exercises growth
+    for i, entry in enumerate((100.0, 200.0, 300.0, 400.0)):
+        book.upsert(bet(f'p{i}', entry=entry))
+    assert len(book) == 4
+    assert book.remove('p1')
+    assert not book.remove('p1')
+    assert book.ids == ['p0', 'p3', 'p2']
+    assert book._index == {'p0': 0, 'p3': 1, 'p2': 2}
+    assert book.entry[1] == 400.0
+    assert book.remove('p2')                      # last row: nothing moves
+    assert book.ids == ['p0', 'p3'] and 'p2' not in book
+
+
+def test_sync_adds_and_drops():
+    book = PositionBook()
+    book.sync([bet('a'), bet('b'), bet('c')])
+    book.sync([bet('c'), bet('d')])
+    assert sorted(book.ids) == ['c', 'd']
+    assert all(book.ids[row] == pid for pid, row in book._index.items())
+
+
+def test_mark_pnl_math():
+    """P&L = side * (price / entry - 1) * wager * multiplier, floored at -wager"""
+    book = PositionBook()
+    book.sync([bet('long', 'up', entry=100.0, wager=2.0, mult=50.0),
+               bet('short', 'down', entry=100.0, wager=1.0, mult=10.0),
+               bet('eth', 'up', entry=3000.0, instrument='ETH')])
+    book.mark({'BTC': 101.0})
+    pnl = dict(zip(book.ids, book.pnl[:len(book)]))
+    assert close(pnl['long'], 0.01 * 2.0 * 50.0)
+    assert close(pnl['short'], -0.01 * 1.0 * 10.0)
+    assert pnl['eth'] == 0.0                      # other instrument untouched
+    book.mark({'BTC': 50.0})
+    pnl = dict(zip(book.ids, book.pnl[:len(book)]))
+    assert close(pnl['long'], -2.0)               # bust floor
+    assert close(pnl['short'], 5.0)
+    assert close(book.peak_of('long'), 1.0)       # peak survives the drop
+
+
+def test_risk_mask_and_triggered():
+    book = PositionBook()
+    book.sync([bet('a', entry=100.0), bet('b', entry=100.0), bet('ok', entry=100.0, mult=1.0)])
+    book.mark({'BTC': 100.05})                    # a/b: +0.005 each; ok: +0.0005
+    assert not book.triggered()
+    book.mark({'BTC': 100.5})                     # +0.05: arms the trailing stop
+    book.mark({'BTC': 100.2})                     # +0.02: 0.03 below the peak
+    hits = {pid: reason for pid, reason, _, _ in book.triggered(trail_buffer=0.02)}
+    assert hits == {'a': 'trail', 'b': 'trail'}
+    book.mark({'BTC': 99.8})                      # -0.02 for mult 10
+    hits = {pid: reason for pid, reason, _, _ in book.triggered()}
+    assert hits == {'a': 'stop', 'b': 'stop'}
+    assert 'ok' not in hits
+
+
+def test_unknown_instrument_never_marked():
+    """Rows as _parse_active_bets returns them when the row names no instrument"""
+    book = PositionBook()
+    eth = bet('p1', entry=2500.0, wager=1.0, mult=10.0, pnl=0.04)
+    eth['instrument'] = None
+    missing = bet('p2', entry=2500.0, pnl=0.0)
+    del missing['instrument']
+    book.sync([eth, missing, bet('btc', entry=60000.0)])
+    book.mark({'BTC': 60000.0})
+    pnl = dict(zip(book.ids, book.pnl[:len(book)]))
+    assert close(pnl['p1'], 0.04) and pnl['p2'] == 0.0
+    assert close(book.peak_of('p1'), 0.04)
+    book.sync([eth, missing, bet('btc', entry=60000.0)])
+    assert not book.triggered()
+
+
+def test_tick_triggers_only_marked_instruments():
+    """Tick-driven closes: only positions of the ticked instruments, never ones without an instrument"""
+    book = PositionBook()
+    unknown = bet('u', entry=2500.0, pnl=-0.5)      # page already shows it past the stop
+    unknown['instrument'] = None
+    book.sync([unknown, bet('b', entry=100.0), bet('e', entry=100.0, pnl=-0.5, instrument='ETH')])
+    book.mark({'BTC': 99.0})
+    hits = [pid for pid, _, _, _ in book.triggered(instruments={'BTC'})]
+    assert hits == ['b']
+    assert book.triggered(instruments={'SOL'}) == []
+    assert sorted(pid for pid, _, _, _ in book.triggered()) == ['b', 'e', 'u']
+
+
+def main():
+    """Run all position book tests"""
+    print("🧪 POSITION BOOK TESTS")
+    print("=" * 50)
+    tests = [
+        test_remove_swaps_last_row_in,
+        test_sync_adds_and_drops,
+        test_mark_pnl_math,
+        test_risk_mask_and_triggered,
+        test_unknown_instrument_never_marked,
+        test_tick_triggers_only_marked_instruments,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"   ❌ {test.__name__}: {e!r}")
+    print("=" * 50)
+    print(f"   Passed: {passed}/{len(tests)}")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Position identity and snapshot cache tests: position_key / assign_position_ids, PositionTracker
+diffs and SnapshotCache TTL, join and single-flight behaviour.
+Runs headless: python test_positions.py, or under pytest.
+"""
+
+import sys
+import threading
+import time
+
+from positions import PositionTracker, SnapshotCache, assign_position_ids, position_key, row_instrument
+
+
+def bet(entry, pnl=0.0, token='', **extra):
+    b = {'direction': 'up', 'entry_price': float(entry.replace(',', '')), 'wager': 1.0, 'multiplier': 100.0,
+         'pnl': pnl, 'current_price': 0.0, 'row_index': 0, 'match': {'1': entry, '2': '$1.00'}, 'token': token}
+    b.update(extra)
+    return b
+
+
+def test_position_key_sources():
+    """Key from the static cells, else the row token, never from parsed values"""
+    assert position_key(bet('64,000.5')) == '1=64,000.5|2=$1.00'
+    assert position_key(bet('64,000.5', pnl=3.0, entry_price=1.0)) == '1=64,000.5|2=$1.00'
+    assert position_key({'match': {}, 'token': 'r7', 'entry_price': 64000.0}) == 'row:r7'
+    assert position_key({'match': {'10': 'b', '2': 'a'}}) == '2=a|10=b'
+
+
+def test_assign_position_ids_duplicates():
+    """Identical positions are told apart by table order"""
+    bets = assign_position_ids([bet('64,000.5'), bet('3,100'), bet('64,000.5'), bet('64,000.5')])
+    assert [b['id'] for b in bets] == ['1=64,000.5|2=$1.00', '1=3,100|2=$1.00',
+                                       '1=64,000.5|2=$1.00#2', '1=64,000.5|2=$1.00#3']
+
+
+def test_row_instrument():
+    """Instrument cell first, then row text / hints; ambiguous or absent -> None"""
+    known = {'BTC', 'ETH', 'SOL'}
+    assert row_instrument(['ETH-PERP', 'BTC 64,000'], known) == 'ETH'
+    assert row_instrument(['', 'Long SOLUSD 150.2'], known) == 'SOL'
+    assert row_instrument(['', 'Long 2,500.0 x10', 'icon btc', 'BTC'], known) == 'BTC'
+    assert row_instrument(['BTC/ETH'], known) is None
+    assert row_instrument(['', 'Long 2,500.0 x10 $1.00'], known) is None
+    assert row_instrument(['ETH'], set()) is None
+
+
+def test_tracker_diff():
+    tracker = PositionTracker()
+    diff = tracker.update([bet('100', token='r1'), bet('200', token='r2')])
+    assert len(diff.opened) == 2 and not diff.updated and not diff.closed
+    # Row above closes: the other keeps its id even though its row index moved
+    diff = tracker.update([bet('200', token='r2', row_index=0)])
+    assert [b['id'] for b in diff.closed] == ['1=100|2=$1.00']
+    assert not diff.opened
+    diff = tracker.update([bet('200', pnl=0.5, token='r2')])
+    assert [b['pnl'] for b in diff.updated] == [0.5]
+    assert not tracker.update([bet('200', pnl=0.5, token='r2')])
+    assert tracker.stats() == {'open': 1, 'opened': 2, 'closed': 1, 'snapshots': 4}
+
+
+def test_snapshot_cache_ttl_and_invalidate():
+    cache = SnapshotCache(ttl=0.2)
+    loads = []
+    load = lambda: loads.append(1) or len(loads)
+    assert cache.get(load) == 1
+    assert cache.get(load) == 1                   # within TTL
+    assert cache.get(load, max_age=0) == 2        # forced fresh read
+    cache.invalidate()
+    assert cache.get(load) == 3
+    time.sleep(0.25)
+    assert cache.get(load) == 4
+    assert cache.stats() == {'hits': 1, 'joined': 0, 'loads': 4, 'invalidations': 1}
+
+
+def test_snapshot_cache_load_error_caches_nothing():
+    cache = SnapshotCache(ttl=10)
+
+    def broken():
+        raise RuntimeError("driver gone")
+    try:
+        cache.get(broken)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("load error swallowed")
+    assert cache.taken_at is None
+    assert cache.get(lambda: 'ok') == 'ok'
+
+
+def test_snapshot_cache_single_flight():
+    """Callers queued behind a load (owner's lock) join it instead of loading again"""
+    cache = SnapshotCache(ttl=0.0)
+    lock = threading.Lock()
+    loads = []
+    results = []
+
+    def slow_load():
+        loads.append(1)
+        time.sleep(0.1)
+        return 'snapshot'
+
+    def caller():
+        arrived = time.monotonic()
+        with lock:
+            results.append(cache.get(slow_load, arrived, max_age=0))
+
+    threads = [threading.Thread(target=caller) for _ in range(6)]
+    for t in threads:
+        t.start()
+        time.sleep(0.005)
+    for t in threads:
+        t.join()
+    assert results == ['snapshot'] * 6
+    assert len(loads) == 1
+    assert cache.stats()['joined'] == 5
+
+
+def main():
+    """Run all positions tests"""
+    print("🧪 POSITIONS TESTS")
+    print("=" * 50)
+    tests = [
+        test_position_key_sources,
+        test_assign_position_ids_duplicates,
+        test_row_instrument,
+        test_tracker_diff,
+        test_snapshot_cache_ttl_and_invalidate,
+        test_snapshot_cache_load_error_caches_nothing,
+        test_snapshot_cache_single_flight,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"   ❌ {test.__name__}: {e!r}")
+    print("=" * 50)
+    print(f"   Passed: {passed}/{len(tests)}")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Signal pipeline tests: SignalQueue overflow policies and BurstCoalescer merging / expiry.
+Runs headless (no browser, no socket): python test_signal_pipeline.py, or under pytest.
+"""
+
+import sys
+import time
+
+from signal_pipeline import BurstCoalescer, SignalQueue
+
+
+def test_queue_drop_oldest():
+    """Full queue evicts the head; the incoming item is kept"""
+    dropped = []
+    q = SignalQueue(maxsize=2, policy='drop_oldest', on_discard=lambda item, reason: dropped.append((item, reason)))
+    assert q.put('a') and q.put('b') and q.put('c')
+    assert [q.get(0), q.get(0)] == ['b', 'c']
+    assert dropped == [('a', 'dropped')]
+    assert q.stats()['dropped'] == 1
+
+
+def test_queue_drop_newest():
+    """Full queue rejects the incoming item and keeps what is queued"""
+    dropped = []
+    q = SignalQueue(maxsize=2, policy='drop_newest', on_discard=lambda item, reason: dropped.append((item, reason)))
+    assert q.put('a') and q.put('b')
+    assert q.put('c') is False
+    assert [q.get(0), q.get(0)] == ['a', 'b']
+    assert dropped == [('c', 'dropped')]
+
+
+def test_queue_coalesce():
+    """Same key replaces the pending item in place; other keys overflow like drop_oldest"""
+    dropped = []
+    q = SignalQueue(maxsize=2, policy='coalesce', key=lambda item: item[0],
+                    on_discard=lambda item, reason: dropped.append((item, reason)))
+    q.put(('BTC', 1))
+    q.put(('ETH', 1))
+    q.put(('BTC', 2))
+    assert len(q) == 2
+    assert dropped == [(('BTC', 1), 'coalesced')]
+    q.put(('SOL', 1))
+    assert dropped[-1] == (('BTC', 2), 'dropped')
+    assert [q.get(0), q.get(0)] == [('ETH', 1), ('SOL', 1)]
+    assert q.get(0) is None
+    st = q.stats()
+    assert (st['coalesced'], st['dropped']) == (1, 1)
+
+
+def test_queue_rejects_unknown_policy():
+    try:
+        SignalQueue(policy='block')
+    except ValueError:
+        return
+    raise AssertionError("unknown policy accepted")
+
+
+def test_coalescer_merges_within_window():
+    """First burst passes through; later ones in the window collapse into the latest"""
+    emitted, merged = [], []
+    c = BurstCoalescer(emitted.append, window_ms=50, on_discard=lambda item, reason: merged.append(reason))
+    now_ms = time.time() * 1000.0
+    for i in range(4):
+        c.offer(({'s': 'BTCUSDT', 'ts': now_ms, 'delta': i}, None))
+    assert [item[0]['delta'] for item in emitted] == [0]
+    time.sleep(0.15)
+    assert [item[0]['delta'] for item in emitted] == [0, 3]
+    assert merged == ['merged', 'merged']
+    assert c.stats()['pending'] == 0
+    c.stop()
+
+
+def test_coalescer_strongest():
+    """Mode 'strongest' keeps the pending burst with the largest |delta|"""
+    emitted = []
+    c = BurstCoalescer(emitted.append, window_ms=50, mode='strongest')
+    for delta in (1, -9, 4):
+        c.offer(({'s': 'ETHUSDT', 'delta': delta}, None))
+    time.sleep(0.15)
+    assert [item[0]['delta'] for item in emitted] == [1, -9]
+    c.stop()
+
+
+def test_coalescer_expiry():
+    """Bursts older than max_age_ms are expired on offer and again when their window closes"""
+    emitted, discarded = [], []
+    c = BurstCoalescer(emitted.append, window_ms=0, max_age_ms=100,
+                       on_discard=lambda item, reason: discarded.append(reason))
+    now_ms = time.time() * 1000.0
+    c.offer(({'s': 'BTCUSDT', 'ts': now_ms - 500}, None))
+    c.offer(({'s': 'BTCUSDT', 'ts': now_ms}, None))
+    c.offer(({'s': 'BTCUSDT'}, None))   # no ts: never expired
+    assert len(emitted) == 2
+    assert discarded == ['expired']
+
+    emitted.clear()
+    c = BurstCoalescer(emitted.append, window_ms=150, max_age_ms=100)
+    c.offer(({'s': 'SOLUSDT', 'ts': time.time() * 1000.0}, None))
+    c.offer(({'s': 'SOLUSDT', 'ts': time.time() * 1000.0}, None))   # held; ages past max_age in the window
+    time.sleep(0.3)
+    assert len(emitted) == 1
+    assert c.stats()['expired'] == 1
+    c.stop()
+
+
+def main():
+    """Run all signal pipeline tests"""
+    print("🧪 SIGNAL PIPELINE TESTS")
+    print("=" * 50)
+    tests = [
+        test_queue_drop_oldest,
+        test_queue_drop_newest,
+        test_queue_coalesce,
+        test_queue_rejects_unknown_policy,
+        test_coalescer_merges_within_window,
+        test_coalescer_strongest,
+        test_coalescer_expiry,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"   ✅ {test.__name__}")
+            passed += 1
+        except Exception as e:
+            print(f"   ❌ {test.__name__}: {e!r}")
+    print("=" * 50)
+    print(f"   Passed: {passed}/{len(tests)}")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
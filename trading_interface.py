@@ -2,7 +2,14 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import StaleElementReferenceException
 from config import SELECTORS
+from latency import LatencyRecorder, SignalStats, SignalTrace
+from positions import SnapshotCache, assign_position_ids, position_key, row_instrument
+import functools
+import json
+import re
+import threading
 import time
 import logging
 
@@ -11,10 +18,832 @@ class NavigationRedirectedError(Exception):
     """Raised when an unexpected navigation happens during a click step."""
     pass
 
-class TradingInterface:
+
+# Positions table row capture shared by the snapshot and the stream below: header texts, and per row
+# the cell texts, row text, direction hints (descendant attributes), first-cell color, cash-out
+# presence and a token naming the <tr> element for as long as it lives (kept in a WeakMap on window)
+_POSITIONS_ROW_JS = """
+function __sentinelTxt(el){ try{ return (el.innerText || el.textContent || '').trim(); }catch(e){ return ''; } }
+function __sentinelRowToken(tr){
+  var T = window.__sentinelRowIds;
+  if(!T){ T = window.__sentinelRowIds = {ids: new WeakMap(), next: 1}; }
+  var id = T.ids.get(tr);
+  if(!id){ id = 'r' + (T.next++); T.ids.set(tr, id); }
+  return id;
+}
+function __sentinelPositionRows(root){
+  root = root || document;
+  var rows = root.querySelectorAll('tbody tr');
+  if(!rows.length){ rows = root.querySelectorAll('tr[class*="css-"]'); }
+  return rows;
+}
+function __sentinelPositionHeaders(){
+  return Array.prototype.map.call(document.querySelectorAll('thead th'), __sentinelTxt);
+}
+function __sentinelPositionRow(row, cashSel){
+  var attrs = ['class','aria-label','title','alt'];
+  var tds = row.querySelectorAll('td');
+  var nodes = row.querySelectorAll('*');
+  var hints = [];
+  for(var j=0;j<nodes.length&&j<20;j++){
+    for(var k=0;k<attrs.length;k++){
+      var v = nodes[j].getAttribute(attrs[k]);
+      if(v){ hints.push(String(v)); }
+    }
+  }
+  var color = '';
+  if(tds.length){ try{ color = getComputedStyle(tds[0]).color || ''; }catch(e){} }
+  var cash = false;
+  try{ cash = !!(cashSel && row.querySelector(cashSel)); }catch(e){}
+  if(!cash){
+    var bs = row.querySelectorAll('button');
+    for(var b=0;b<bs.length;b++){ if(/cash\\s*out/i.test(__sentinelTxt(bs[b]))){ cash = true; break; } }
+  }
+  return {cells: Array.prototype.map.call(tds, __sentinelTxt), text: __sentinelTxt(row), hints: hints, color: color, cashout: cash,
+          token: __sentinelRowToken(row)};
+}
+"""
+
+# Positions table snapshot: everything get_active_bets needs, collected in one round trip.
+# arguments[0] = cash-out button selector
+_POSITIONS_SNAPSHOT_JS = _POSITIONS_ROW_JS + """
+var cashSel = arguments[0];
+var rows = __sentinelPositionRows();
+var out = [];
+for(var i=0;i<rows.length;i++){ out.push(__sentinelPositionRow(rows[i], cashSel)); }
+return {headers: __sentinelPositionHeaders(), rows: out};
+"""
+
+# Positions stream: a MutationObserver on the positions table (installed on first call, kept on
+# window; the table is the one holding a cash-out button, else the first with body rows, and a
+# replaced table gets a new observer and generation) turns row additions, removals and cell text
+# changes into events in a ring of `cap` slots numbered by a sequence. Until a table exists every call
+# answers with an (empty) resync. Each
+# call drains the events after `cursor`, latest per row only, plus the current row order. A reader
+# that is behind by more than the ring, passes cursor < 0 or holds another observer's gen (page
+# reloaded) gets a full resync instead. Rows are told apart by their __sentinelRowToken.
+# arguments: cash-out selector, gen, cursor, cap
+_POSITIONS_STREAM_JS = _POSITIONS_ROW_JS + """
+var cashSel = arguments[0], gen = arguments[1], cursor = arguments[2], cap = arguments[3];
+function __sentinelPositionTable(){
+  var btn = null;
+  try{ btn = cashSel ? document.querySelector(cashSel) : null; }catch(e){}
+  var tr = (btn && btn.closest('tbody tr')) || __sentinelPositionRows()[0];
+  return tr ? (tr.closest('table') || tr.parentElement) : null;
+}
+var S = window.__sentinelPositions;
+if(S && S.observer && !S.root.isConnected){ S.observer.disconnect(); S = null; }
+var root = (S && S.observer) ? S.root : __sentinelPositionTable();
+if(!root){
+  return {gen: null, seq: 0, resync: true, overflow: false, headers: __sentinelPositionHeaders(), rows: [], order: []};
+}
+if(!S || !S.observer){
+  S = window.__sentinelPositions = {
+    gen: Date.now().toString(36) + Math.random().toString(36).slice(2, 8),
+    seq: 0, cap: cap, ring: new Array(cap), cashSel: cashSel, observer: null, root: root
+  };
+  var tracked = function(tr){ return tr.matches('tbody tr, tr[class*="css-"]') && !tr.closest('thead'); };
+  var push = function(ev){ ev.seq = ++S.seq; S.ring[S.seq % S.cap] = ev; };
+  var rowsIn = function(node, into){
+    if(node.nodeType !== 1){ return; }
+    if(node.tagName === 'TR'){ into.push(node); return; }
+    var trs = node.querySelectorAll('tr');
+    for(var i=0;i<trs.length;i++){ into.push(trs[i]); }
+  };
+  S.observer = new MutationObserver(function(muts){
+    var dirty = [], gone = [], head = false;
+    for(var i=0;i<muts.length;i++){
+      var m = muts[i];
+      var el = m.target.nodeType === 1 ? m.target : m.target.parentElement;
+      if(!el || !el.closest){ continue; }
+      if(el.closest('thead')){ head = true; continue; }
+      var tr = el.closest('tr');
+      if(tr){ dirty.push(tr); }
+      for(var a=0;a<m.addedNodes.length;a++){
+        if(m.addedNodes[a].nodeType === 1 && (m.addedNodes[a].tagName === 'THEAD' || m.addedNodes[a].querySelector('thead'))){ head = true; }
+        rowsIn(m.addedNodes[a], dirty);
+      }
+      for(var r=0;r<m.removedNodes.length;r++){ rowsIn(m.removedNodes[r], gone); }
+    }
+    for(var g=0;g<gone.length;g++){
+      var id = window.__sentinelRowIds && window.__sentinelRowIds.ids.get(gone[g]);
+      if(id && !gone[g].isConnected){ push({t: 'del', id: id}); }
+    }
+    var seen = new Set();
+    for(var d=0;d<dirty.length;d++){
+      var row = dirty[d];
+      if(seen.has(row) || !row.isConnected || !tracked(row)){ continue; }
+      seen.add(row);
+      var snap = __sentinelPositionRow(row, S.cashSel);
+      push({t: 'row', id: snap.token, row: snap});
+    }
+    if(head){ push({t: 'head'}); }
+  });
+  S.observer.observe(root, {childList: true, subtree: true, characterData: true});
+}
+var rows = __sentinelPositionRows(root);
+if(gen !== S.gen || cursor < 0 || S.seq - cursor > S.cap){
+  var out = [], order = [];
+  for(var i=0;i<rows.length;i++){
+    var snap = __sentinelPositionRow(rows[i], cashSel);
+    snap.id = snap.token;
+    order.push(snap.token);
+    out.push(snap);
+  }
+  return {gen: S.gen, seq: S.seq, resync: true, overflow: gen === S.gen && cursor >= 0,
+          headers: __sentinelPositionHeaders(), rows: out, order: order};
+}
+if(cursor >= S.seq){ return {gen: S.gen, seq: S.seq, events: []}; }
+var events = [], latest = new Set();
+for(var s=S.seq;s>cursor;s--){
+  var ev = S.ring[s % S.cap];
+  if(ev.t !== 'head'){
+    if(latest.has(ev.id)){ continue; }
+    latest.add(ev.id);
+  }
+  events.push(ev);
+}
+events.reverse();
+return {gen: S.gen, seq: S.seq, events: events, headers: __sentinelPositionHeaders(),
+        order: Array.prototype.map.call(rows, __sentinelRowToken)};
+"""
+
+
+# Order panel locator shared by every in-page script that needs the panel. The PLACE BET button
+# walked up 12 parents is resolved once, tagged with data-sentinel-panel and cached on window;
+# a MutationObserver (plus popstate/hashchange) invalidates the cache when the panel is detached
+# or the URL changes. Usage: _ORDER_PANEL_JS + "... __sentinelPanel(placeBetSelector) ..."
+_ORDER_PANEL_JS = """
+function __sentinelPanel(sel){
+  var c = window.__sentinelPanelCache;
+  if(c && c.valid && c.href === location.href && c.el && c.el.isConnected){ c.hits++; return c.el; }
+  if(c && c.observer){ try{ c.observer.disconnect(); }catch(e){} }
+  var builds = (c && c.builds) || 0;
+  window.__sentinelPanelCache = null;
+  var btn = null;
+  try{ btn = document.querySelector(sel); }catch(e){}
+  if(!btn){ return null; }
+  var el = btn;
+  for(var i=0;i<12 && el.parentElement;i++){ el = el.parentElement; }
+  try{ el.setAttribute('data-sentinel-panel', String(builds + 1)); }catch(e){}
+  var cache = {el: el, href: location.href, valid: true, hits: 0, builds: builds + 1};
+  var invalidate = function(){ cache.valid = false; try{ cache.observer.disconnect(); }catch(e){} };
+  cache.observer = new MutationObserver(function(){
+    if(!cache.el.isConnected || location.href !== cache.href){ invalidate(); }
+  });
+  cache.observer.observe(document.body || document.documentElement, {childList: true, subtree: true});
+  window.addEventListener('popstate', invalidate, {once: true});
+  window.addEventListener('hashchange', invalidate, {once: true});
+  window.__sentinelPanelCache = cache;
+  return el;
+}
+"""
+
+# Wager/multiplier input lookup shared by the control registry and the atomic input setter:
+# SELECTORS first (same rules as set_wager/set_multiplier), then placeholder/aria/name keywords
+# inside the order panel, then position (first = wager, second = multiplier).
+_ORDER_INPUTS_JS = """
+function __sentinelOrderInputs(S, panel){
+  function q(root, sel){ try{ return sel ? Array.prototype.slice.call(root.querySelectorAll(sel)) : []; }catch(e){ return []; } }
+  var wager = q(document, S.wager_input)[0] || null;
+  var multList = q(document, S.multiplier_input || S.wager_input);
+  var mult = null;
+  if(multList.length){ mult = (S.multiplier_input === S.wager_input && multList.length >= 2) ? multList[1] : multList[0]; }
+  if((!wager || !mult) && panel){
+    var ins = q(panel, 'input[type="text"], input[type="number"]');
+    var pw = null, pm = null;
+    ins.forEach(function(inp){
+      var key = ((inp.getAttribute('placeholder') || '') + (inp.getAttribute('aria-label') || '') + (inp.getAttribute('name') || '')).toLowerCase();
+      if(/wager|stake|amount|size/.test(key)){ pw = inp; }
+      if(/multiplier|leverage|x|payout/.test(key)){ pm = inp; }
+    });
+    if(!pw && ins.length >= 1){ pw = ins[0]; }
+    if(!pm && ins.length >= 2){ pm = ins[1]; }
+    if(!wager){ wager = pw; }
+    if(!mult){ mult = pm; }
+  }
+  return {wager: wager, multiplier: mult};
+}
+"""
+
+# Atomic React-safe setter for wager and multiplier. Uses the native HTMLInputElement value setter
+# (React's value tracker then sees the change on the input event), skips fields that already hold
+# the wanted value, and re-reads the values after a tick so React-side rejections show up.
+# Prepend _ORDER_PANEL_JS + _ORDER_INPUTS_JS. arguments: SELECTORS, {wager, multiplier} (missing/null
+# = leave alone), wager element or null, multiplier element or null
+_SET_ORDER_INPUTS_JS = """
+var done = arguments[arguments.length - 1];
+var S = arguments[0] || {}, want = arguments[1] || {};
+var els = {wager: arguments[2] || null, multiplier: arguments[3] || null};
+if((want.wager != null && !els.wager) || (want.multiplier != null && !els.multiplier)){
+  var found = __sentinelOrderInputs(S, __sentinelPanel(S.place_bet_button || ''));
+  els.wager = els.wager || found.wager;
+  els.multiplier = els.multiplier || found.multiplier;
+}
+var setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+function same(a, b){
+  var x = parseFloat(String(a == null ? '' : a).replace(/[^0-9.eE+-]/g, ''));
+  var y = parseFloat(String(b));
+  if(isNaN(x) || isNaN(y)){ return String(a) === String(b); }
+  return Math.abs(x - y) <= 1e-9 * Math.max(1, Math.abs(y));
+}
+var out = {};
+['wager', 'multiplier'].forEach(function(k){
+  if(want[k] == null){ return; }
+  var el = els[k];
+  if(!el){ out[k] = {found: false, changed: false, ok: false, value: null}; return; }
+  if(same(el.value, want[k])){ out[k] = {found: true, changed: false, ok: true, value: el.value}; return; }
+  try{ el.focus(); }catch(e){}
+  setter.call(el, String(want[k]));
+  el.dispatchEvent(new Event('input', {bubbles: true}));
+  el.dispatchEvent(new Event('change', {bubbles: true}));
+  out[k] = {found: true, changed: true, ok: false, value: el.value};
+});
+setTimeout(function(){
+  Object.keys(out).forEach(function(k){
+    if(out[k].found){ out[k].value = els[k].value; out[k].ok = same(els[k].value, want[k]); }
+  });
+  done(out);
+}, 0);
+"""
+
+# Order control registry: resolves wager/multiplier inputs, Up/Down chips and PLACE BET with the
+# same strategies as the Python locators (SELECTORS CSS, text matches, chip size/distance scoring)
+# and reports their state, all in one call. Prepend _ORDER_PANEL_JS + _ORDER_INPUTS_JS.
+# arguments[0] = SELECTORS
+_ORDER_CONTROLS_JS = """
+var S = arguments[0] || {};
+function txt(el){ try{ return (el.innerText || el.textContent || '').replace(/\\s+/g, ' ').trim(); }catch(e){ return ''; } }
+function shown(el){
+  if(!el){ return false; }
+  try{
+    var cs = getComputedStyle(el);
+    if(cs.display === 'none' || cs.visibility === 'hidden' || parseFloat(cs.opacity) === 0){ return false; }
+    var r = el.getBoundingClientRect();
+    return r.width > 0 && r.height > 0;
+  }catch(e){ return false; }
+}
+function enabled(el){ return !!el && !el.disabled; }
+function all(root, sel){ try{ return sel ? Array.prototype.slice.call((root || document).querySelectorAll(sel)) : []; }catch(e){ return []; } }
+function firstText(el){
+  for(var n = el.firstChild; n; n = n.nextSibling){ if(n.nodeType === 3){ return n.nodeValue.replace(/\\s+/g, ' ').trim(); } }
+  return null;
+}
+function rect(el){ var r = el.getBoundingClientRect(); return {left: r.left, top: r.top, width: r.width, height: r.height}; }
+function color(el){ try{ return getComputedStyle(el).color || ''; }catch(e){ return ''; } }
+
+var panel = __sentinelPanel(S.place_bet_button || '');
+
+function findPlaceBet(){
+  var i, t;
+  if(panel){
+    var bs = all(panel, 'button');
+    for(i = 0; i < bs.length; i++){
+      t = txt(bs[i]).toUpperCase();
+      if((t.indexOf('BET') >= 0 || bs[i].getAttribute('type') === 'submit') && shown(bs[i])){ return bs[i]; }
+    }
+    var rs = all(panel, '[role="button"]');
+    for(i = 0; i < rs.length; i++){
+      t = txt(rs[i]).toUpperCase();
+      if((t.indexOf('PLACE') >= 0 || t.indexOf('BET') >= 0) && shown(rs[i])){ return rs[i]; }
+    }
+  }
+  var g = all(document, S.place_bet_button)[0];
+  if(g && shown(g)){ return g; }
+  var gb = all(document, 'button');
+  for(i = 0; i < gb.length; i++){
+    t = gb[i].textContent || '';
+    if(t.indexOf('PLACE BET') >= 0 || t.indexOf('Place Bet') >= 0 || t.indexOf('BET') >= 0){ return shown(gb[i]) ? gb[i] : null; }
+  }
+  return null;
+}
+var place = findPlaceBet();
+
+var chips = {UP: null, DOWN: null};
+if(panel){
+  var isChipText = function(el){ var t = firstText(el); return t === 'Up' || t === 'Down'; };
+  var cand = all(panel, [S.up_button, S.down_button].filter(Boolean).join(', '));
+  all(panel, '*').forEach(function(el){ if(isChipText(el)){ cand.push(el); } });
+  if(place){
+    var n = place;
+    for(var k = 0; k < 6 && n; n = n.previousElementSibling, k++){
+      all(n, '*').forEach(function(el){ if(isChipText(el)){ cand.push(el); } });
+    }
+  }
+  var seen = new Set();
+  var br = place ? rect(place) : {left: 0, top: 0, width: 0, height: 0};
+  var scored = [];
+  cand.forEach(function(el){
+    if(seen.has(el)){ return; }
+    seen.add(el);
+    if(!(shown(el) && enabled(el))){ return; }
+    var t = txt(el).toUpperCase();
+    if(t !== 'UP' && t !== 'DOWN'){ return; }
+    var r = rect(el);
+    var pen = 0;
+    if(r.width > 160){ pen += r.width - 160; }
+    if(r.height > 60){ pen += r.height - 60; }
+    var d = Math.hypot((r.left + r.width / 2) - (br.left + br.width / 2), (r.top + r.height / 2) - (br.top + br.height / 2));
+    scored.push([pen, d, t, el]);
+  });
+  scored.sort(function(a, b){ return (a[0] - b[0]) || (a[1] - b[1]); });
+  scored.forEach(function(s){ if(!chips[s[2]]){ chips[s[2]] = s[3]; } });
+}
+var upCol = chips.UP ? color(chips.UP) : '';
+var downCol = chips.DOWN ? color(chips.DOWN) : '';
+function isGreen(c){ return c.indexOf('114') >= 0 && c.indexOf('242') >= 0 && c.indexOf('56') >= 0; }
+function isRed(c){ return c.indexOf('255') >= 0 && (c.indexOf('73') >= 0 || c.indexOf('37') >= 0); }
+var dir = '';
+if(isGreen(upCol) && !isRed(downCol)){ dir = 'UP'; }
+else if(isRed(downCol) && !isGreen(upCol)){ dir = 'DOWN'; }
+
+var inputs = __sentinelOrderInputs(S, panel);
+var wager = inputs.wager, mult = inputs.multiplier;
+
+return {
+  panel: panel, wager_input: wager, multiplier_input: mult, up: chips.UP, down: chips.DOWN, place_bet: place,
+  state: {
+    direction: dir, up_color: upCol, down_color: downCol,
+    wager_value: wager ? wager.value : null, multiplier_value: mult ? mult.value : null,
+    place_bet_enabled: place ? enabled(place) : false, place_bet_displayed: place ? shown(place) : false
+  }
+};
+"""
+
+# Order acknowledgement watcher, armed right before PLACE BET. Records the first page reaction:
+# a new visible cash-out button ('position'), a new toast/alert ('toast'), a confirm modal ('modal')
+# or a URL change/unload ('navigation'). arguments[0] = cash-out button selector; returns baseline.
+_ORDER_ACK_ARM_JS = """
+var cashSel = arguments[0];
+var toastSel = '[role="alert"], [class*="toast"], [class*="notification"]';
+var modalSel = '[class*="modal"], [class*="dialog"], [role="dialog"]';
+function txt(el){ try{ return (el.innerText || el.textContent || '').trim(); }catch(e){ return ''; } }
+function shown(el){
+  try{
+    var cs = getComputedStyle(el);
+    if(cs.display === 'none' || cs.visibility === 'hidden' || parseFloat(cs.opacity) === 0){ return false; }
+    var r = el.getBoundingClientRect();
+    return r.width > 0 && r.height > 0;
+  }catch(e){ return false; }
+}
+function visibleCount(){
+  var n = 0;
+  try{ document.querySelectorAll(cashSel).forEach(function(b){ if(shown(b)){ n++; } }); }catch(e){}
+  return n;
+}
+var prev = window.__sentinelAck;
+if(prev && prev.observer){ try{ prev.observer.disconnect(); }catch(e){} }
+var seenToasts = new WeakSet();
+document.querySelectorAll(toastSel).forEach(function(t){ if(shown(t) && txt(t)){ seenToasts.add(t); } });
+var ack = {t0: performance.now(), href: location.href, baseline: visibleCount(), event: null, ignore: [], waiter: null};
+ack.found = function(kind, extra){
+  if(ack.ignore.indexOf(kind) >= 0){ return null; }
+  var ev = extra || {};
+  ev.kind = kind;
+  ev.elapsed_ms = performance.now() - ack.t0;
+  ev.baseline = ack.baseline;
+  return ev;
+};
+ack.check = function(){
+  if(ack.event){ return ack.event; }
+  var ev = null;
+  if(location.href !== ack.href){ ev = ack.found('navigation', {href: location.href}); }
+  if(!ev){
+    var c = visibleCount();
+    if(c > ack.baseline){ ev = ack.found('position', {count: c}); }
+  }
+  if(!ev){
+    var ts = document.querySelectorAll(toastSel);
+    for(var i = 0; i < ts.length && !ev; i++){
+      if(!seenToasts.has(ts[i]) && shown(ts[i]) && txt(ts[i])){ ev = ack.found('toast', {text: txt(ts[i]).slice(0, 300)}); }
+    }
+  }
+  if(!ev){
+    var ms = document.querySelectorAll(modalSel);
+    for(var j = 0; j < ms.length && !ev; j++){
+      if(!shown(ms[j])){ continue; }
+      var bs = ms[j].querySelectorAll('button, [role="button"]');
+      for(var k = 0; k < bs.length; k++){
+        if(/CONFIRM|PLACE|SUBMIT|OK/.test(txt(bs[k]).toUpperCase())){ ev = ack.found('modal', {text: txt(bs[k])}); break; }
+      }
+    }
+  }
+  ack.event = ev;
+  return ev;
+};
+ack.observer = new MutationObserver(function(){
+  if(ack.waiter && ack.check()){ ack.waiter(ack.event); }
+});
+ack.observer.observe(document.body || document.documentElement, {childList: true, subtree: true});
+window.addEventListener('beforeunload', function(){
+  if(!ack.event){ ack.event = ack.found('navigation', {href: location.href}); }
+}, {once: true});
+window.__sentinelAck = ack;
+return ack.baseline;
+"""
+
+# Visible cash-out buttons (one per open position), counted like the ack watcher's baseline.
+# arguments[0] = cash-out button selector
+_CASHOUT_COUNT_JS = """
+var n = 0;
+try{
+  document.querySelectorAll(arguments[0]).forEach(function(b){
+    var cs = getComputedStyle(b);
+    if(cs.display === 'none' || cs.visibility === 'hidden' || parseFloat(cs.opacity) === 0){ return; }
+    var r = b.getBoundingClientRect();
+    if(r.width > 0 && r.height > 0){ n++; }
+  });
+}catch(e){ return -1; }
+return n;
+"""
+
+# Async half of the watcher: resolves with the first recorded event, or 'timeout'.
+# arguments[0] = timeout ms, arguments[1] = event kinds to ignore (e.g. ['modal'] after confirming)
+_ORDER_ACK_WAIT_JS = """
+var done = arguments[arguments.length - 1];
+var timeoutMs = arguments[0], ignore = arguments[1] || [];
+var ack = window.__sentinelAck;
+if(!ack){ done({kind: 'unarmed', elapsed_ms: 0}); return; }
+ack.ignore = ignore;
+if(ack.event && ignore.indexOf(ack.event.kind) >= 0){ ack.event = null; }
+var finished = false, poll = null, timer = null;
+function finish(ev){
+  if(finished){ return; }
+  finished = true;
+  clearTimeout(timer);
+  clearInterval(poll);
+  ack.waiter = null;
+  done(ev);
+}
+if(ack.check()){ finish(ack.event); return; }
+ack.waiter = finish;
+// Safety net for changes the observer cannot see (style-only visibility flips)
+poll = setInterval(function(){ if(ack.check()){ finish(ack.event); } }, 100);
+timer = setTimeout(function(){
+  finish({kind: 'timeout', elapsed_ms: performance.now() - ack.t0, baseline: ack.baseline});
+}, timeoutMs);
+"""
+
+# Waits until the Up/Down chip colors report the wanted side (same color rules as the registry).
+# arguments: up element, down element, 'UP'|'DOWN', timeout ms
+_DIRECTION_WAIT_JS = """
+var done = arguments[arguments.length - 1];
+var up = arguments[0], down = arguments[1], want = arguments[2], timeoutMs = arguments[3];
+var t0 = performance.now();
+function color(el){ try{ return el ? (getComputedStyle(el).color || '') : ''; }catch(e){ return ''; } }
+function isGreen(c){ return c.indexOf('114') >= 0 && c.indexOf('242') >= 0 && c.indexOf('56') >= 0; }
+function isRed(c){ return c.indexOf('255') >= 0 && (c.indexOf('73') >= 0 || c.indexOf('37') >= 0); }
+function state(){
+  var u = color(up), d = color(down);
+  if(isGreen(u) && !isRed(d)){ return 'UP'; }
+  if(isRed(d) && !isGreen(u)){ return 'DOWN'; }
+  return '';
+}
+(function tick(){
+  var s = state();
+  if(s === want || performance.now() - t0 >= timeoutMs){ done({direction: s, elapsed_ms: performance.now() - t0}); return; }
+  setTimeout(tick, 16);
+})();
+"""
+
+# Order-ticket check for repeat trades, in one call: are the cached control handles still attached,
+# do the inputs still hold the cached wager/multiplier, which side do the chips show and is PLACE BET
+# clickable. When all of it matches the wanted ticket it also arms the order-ack watcher (prepend
+# "function __sentinelArmAck(){" + _ORDER_ACK_ARM_JS + "}"). Same value rules as the input setter and
+# color rules as the registry. arguments: {wager_input, multiplier_input, up, down, place_bet},
+# {wager, multiplier, direction}, cash-out button selector
+_TICKET_CHECK_JS = """
+var h = arguments[0] || {}, want = arguments[1] || {}, cashSel = arguments[2];
+function same(a, b){
+  var x = parseFloat(String(a == null ? '' : a).replace(/[^0-9.eE+-]/g, ''));
+  var y = parseFloat(String(b));
+  if(isNaN(x) || isNaN(y)){ return String(a) === String(b); }
+  return Math.abs(x - y) <= 1e-9 * Math.max(1, Math.abs(y));
+}
+function color(el){ try{ return getComputedStyle(el).color || ''; }catch(e){ return ''; } }
+function isGreen(c){ return c.indexOf('114') >= 0 && c.indexOf('242') >= 0 && c.indexOf('56') >= 0; }
+function isRed(c){ return c.indexOf('255') >= 0 && (c.indexOf('73') >= 0 || c.indexOf('37') >= 0); }
+function shown(el){
+  try{
+    var cs = getComputedStyle(el);
+    if(cs.display === 'none' || cs.visibility === 'hidden' || parseFloat(cs.opacity) === 0){ return false; }
+    var r = el.getBoundingClientRect();
+    return r.width > 0 && r.height > 0;
+  }catch(e){ return false; }
+}
+var out = {href: location.href, attached: true, wager_ok: false, multiplier_ok: false, direction: '', place_bet_ok: false, baseline: null};
+['wager_input', 'multiplier_input', 'up', 'down', 'place_bet'].forEach(function(k){
+  if(!h[k] || !h[k].isConnected){ out.attached = false; }
+});
+if(!out.attached){ return out; }
+out.wager_ok = same(h.wager_input.value, want.wager);
+out.multiplier_ok = same(h.multiplier_input.value, want.multiplier);
+var u = color(h.up), d = color(h.down);
+if(isGreen(u) && !isRed(d)){ out.direction = 'UP'; }
+else if(isRed(d) && !isGreen(u)){ out.direction = 'DOWN'; }
+out.place_bet_ok = !h.place_bet.disabled && shown(h.place_bet);
+if(out.wager_ok && out.multiplier_ok && out.direction === want.direction && out.place_bet_ok){
+  out.baseline = __sentinelArmAck(cashSel);
+}
+return out;
+"""
+
+# Click with navigation watchers: wraps pushState/replaceState and listens for beforeunload,
+# popstate and hashchange around el.click(), optionally neutralizing links (document-level
+# capture guard), then reports whether navigation started, synchronously or after a short window.
+# arguments: element, guard links (bool), window ms
+_NAV_AWARE_CLICK_JS = """
+var done = arguments[arguments.length - 1];
+var el = arguments[0], guardLinks = arguments[1], windowMs = arguments[2];
+var startHref = location.href;
+var info = {href: startHref, post_href: startHref, navigated: false, nav_kind: '', tag: '', text: '', classes: '', link_href: '', onclick: ''};
+try{
+  info.tag = (el.tagName || '').toLowerCase();
+  info.text = (el.innerText || '').trim().slice(0, 80);
+  info.classes = String(el.getAttribute('class') || '');
+  info.link_href = el.getAttribute('href') || '';
+  info.onclick = el.getAttribute('onclick') || '';
+}catch(e){}
+var isLink = info.tag === 'a' || !!info.link_href;
+function mark(kind){ if(!info.navigated){ info.navigated = true; info.nav_kind = kind; } }
+var origPush = history.pushState, origReplace = history.replaceState;
+history.pushState = function(){ mark('pushState'); return origPush.apply(this, arguments); };
+history.replaceState = function(){ mark('replaceState'); return origReplace.apply(this, arguments); };
+var onUnload = function(){ mark('unload'); };
+var onPop = function(){ mark('popstate'); };
+var onHash = function(){ mark('hashchange'); };
+window.addEventListener('beforeunload', onUnload);
+window.addEventListener('popstate', onPop);
+window.addEventListener('hashchange', onHash);
+var stop = function(e){ try{ e.preventDefault(); e.stopPropagation(); e.stopImmediatePropagation(); }catch(_){} };
+var guarded = guardLinks && isLink;
+if(guarded){
+  document.addEventListener('click', stop, true);
+  ['click','mousedown','mouseup','pointerdown','pointerup'].forEach(function(t){ el.addEventListener(t, stop, {once: true, capture: true}); });
+}
+function finish(){
+  history.pushState = origPush;
+  history.replaceState = origReplace;
+  window.removeEventListener('beforeunload', onUnload);
+  window.removeEventListener('popstate', onPop);
+  window.removeEventListener('hashchange', onHash);
+  if(guarded){ document.removeEventListener('click', stop, true); }
+  if(location.href !== startHref){ mark('href'); }
+  info.post_href = location.href;
+  done(info);
+}
+try{ el.click(); }catch(e){ info.error = String(e); }
+if(info.navigated || location.href !== startHref || !(windowMs > 0)){ finish(); }
+else{ setTimeout(finish, windowMs); }
+"""
+
+# Single-position close: row `index` if it still matches (the <tr> the row token names, if given, with
+# the expected static cells), else the first row that matches, then its visible enabled cash-out
+# button. Without match cells or token the index alone decides.
+# arguments: cash-out button selector, row index, {cell index: expected text}, row token ('' = any row)
+_CLOSE_POSITION_JS = """
+var cashSel = arguments[0], index = arguments[1], match = arguments[2] || {}, token = arguments[3] || '';
+function txt(el){ try{ return (el.innerText || el.textContent || '').trim(); }catch(e){ return ''; } }
+function usable(b){
+  try{
+    if(b.disabled){ return false; }
+    var r = b.getBoundingClientRect();
+    return r.width > 0 && r.height > 0;
+  }catch(e){ return false; }
+}
+var rows = document.querySelectorAll('tbody tr');
+if(!rows.length){ rows = document.querySelectorAll('tr[class*="css-"]'); }
+var keys = Object.keys(match);
+var T = window.__sentinelRowIds;
+function matches(row){
+  if(token && !(T && T.ids.get(row) === token)){ return false; }
+  var tds = row.querySelectorAll('td');
+  for(var k = 0; k < keys.length; k++){
+    var td = tds[parseInt(keys[k], 10)];
+    if(!td || txt(td) !== match[keys[k]]){ return false; }
+  }
+  return true;
+}
+var row = (index >= 0 && index < rows.length && matches(rows[index])) ? rows[index] : null;
+if(!row && (keys.length || token)){
+  for(var i = 0; i < rows.length; i++){ if(matches(rows[i])){ row = rows[i]; index = i; break; } }
+}
+if(!row){ return {closed: false, reason: 'row not found', rows: rows.length}; }
+var btn = null;
+try{ if(cashSel){ row.querySelectorAll(cashSel).forEach(function(b){ if(!btn && usable(b)){ btn = b; } }); } }catch(e){}
+if(!btn){
+  var bs = row.querySelectorAll('button');
+  for(var j = 0; j < bs.length; j++){ if(/cash\\s*out/i.test(txt(bs[j])) && usable(bs[j])){ btn = bs[j]; break; } }
+}
+if(!btn){ return {closed: false, reason: 'cash out button not found in row', index: index, rows: rows.length}; }
+btn.click();
+return {closed: true, index: index, rows: rows.length};
+"""
+
+# Close-all in one dispatch: clicks every visible, enabled cash-out button in the same JS tick,
+# then waits for the clicked buttons' position rows to leave the table. The click count is left on
+# window under the caller's run id before anything is awaited, so a caller whose wait failed can
+# tell whether the clicks happened (_CLOSE_ALL_PROBE_JS). arguments: cash-out selector, timeout ms, run id
+_CLOSE_ALL_JS = """
+var done = arguments[arguments.length - 1];
+var sel = arguments[0], timeoutMs = arguments[1], runId = arguments[2];
+var t0 = performance.now();
+function txt(el){ try{ return (el.innerText || el.textContent || '').trim(); }catch(e){ return ''; } }
+function shown(el){
+  try{
+    if(!el.isConnected){ return false; }
+    var cs = getComputedStyle(el);
+    if(cs.display === 'none' || cs.visibility === 'hidden' || parseFloat(cs.opacity) === 0){ return false; }
+    var r = el.getBoundingClientRect();
+    return r.width > 0 && r.height > 0;
+  }catch(e){ return false; }
+}
+var btns = [];
+try{ btns = Array.prototype.slice.call(document.querySelectorAll(sel)).filter(function(b){ return shown(b) && !b.disabled; }); }catch(e){}
+var results = btns.map(function(b, i){
+  var row = b.closest('tr');
+  var index = row && row.parentNode ? Array.prototype.indexOf.call(row.parentNode.children, row) : i;
+  return {index: index, row_text: row ? txt(row).slice(0, 200) : '', ok: false, closed: false, error: null, btn: b, row: row};
+});
+window.__sentinelCloseAll = {run: runId, clicked: 0};
+results.forEach(function(r){ try{ r.btn.click(); r.ok = true; window.__sentinelCloseAll.clicked++; }catch(e){ r.error = String(e); } });
+var clickedMs = performance.now() - t0;
+var observer = null, poll = null, timer = null, finished = false;
+// A position is closed once its row is gone (a button outside any row: once the button is)
+function gone(r){ return r.row ? !r.row.isConnected : !shown(r.btn); }
+function settled(){ return results.every(function(r){ return !r.ok || gone(r); }); }
+function finish(timedOut){
+  if(finished){ return; }
+  finished = true;
+  if(observer){ observer.disconnect(); }
+  clearInterval(poll);
+  clearTimeout(timer);
+  results.forEach(function(r){ r.closed = r.ok && gone(r); delete r.btn; delete r.row; });
+  done({
+    results: results,
+    clicked: results.filter(function(r){ return r.ok; }).length,
+    remaining: results.filter(function(r){ return !r.closed; }).length,
+    timed_out: timedOut, clicked_ms: clickedMs, elapsed_ms: performance.now() - t0
+  });
+}
+if(!results.length || settled()){ finish(false); }
+else{
+  observer = new MutationObserver(function(){ if(settled()){ finish(false); } });
+  observer.observe(document.body || document.documentElement, {childList: true, subtree: true, attributes: true, attributeFilter: ['class', 'style', 'disabled']});
+  poll = setInterval(function(){ if(settled()){ finish(false); } }, 100);
+  timer = setTimeout(function(){ finish(true); }, timeoutMs);
+}
+"""
+
+# Clicks a _CLOSE_ALL_JS run made, or null if that run never got as far as clicking. arguments[0] = run id
+_CLOSE_ALL_PROBE_JS = """
+var c = window.__sentinelCloseAll;
+return (c && c.run === arguments[0]) ? c.clicked : null;
+"""
+
+# Inbound price tap: taps the page's own WebSocket market-data feed. New sockets are tapped through
+# a WebSocket constructor wrapper, sockets opened before install on their next send(). Each text
+# frame that parses as JSON is scanned (3 levels deep) for objects with a symbol key and a positive
+# price key; matches for wanted instruments go into a ring of `cap` (ts, instrument code, price)
+# slots in typed arrays, numbered by a sequence. Symbols are normalised to the instrument:
+# 'BTCUSDT', 'BTC-USD', 'BTC-PERP' -> 'BTC'. Installed as an IIFE taking the config object (see
+# TradingInterface._price_tap_source); a no-op when already installed.
+_PRICE_TAP_INSTALL_JS = """
+(function(cfg){
+  if(window.__sentinelPrices){ return true; }
+  var WS = window.WebSocket;
+  if(!WS){ return false; }
+  var T = window.__sentinelPrices = {
+    gen: Date.now().toString(36) + Math.random().toString(36).slice(2, 8),
+    seq: 0, cap: cfg.cap, ts: new Float64Array(cfg.cap), px: new Float64Array(cfg.cap),
+    inst: new Int16Array(cfg.cap), codes: [], code: {}, frames: 0, sockets: 0
+  };
+  var urlRe = cfg.url ? new RegExp(cfg.url) : null;
+  var want = cfg.instruments && cfg.instruments.length ? new Set(cfg.instruments) : null;
+  function norm(sym){
+    var n = String(sym).toUpperCase().replace(/[-_/:]?PERP(ETUAL)?$/, '').replace(/[-_/:]/g, '');
+    return n.replace(/(USDT|USDC|USD)$/, '') || n;
+  }
+  function push(name, price, ts){
+    var c = T.code[name];
+    if(c === undefined){ c = T.code[name] = T.codes.length; T.codes.push(name); }
+    var i = (++T.seq) % T.cap;
+    T.ts[i] = ts; T.px[i] = price; T.inst[i] = c;
+  }
+  function scan(o, depth, ts){
+    if(!o || typeof o !== 'object' || depth > 3){ return; }
+    if(Array.isArray(o)){ for(var a=0;a<o.length&&a<200;a++){ scan(o[a], depth + 1, ts); } return; }
+    var sym = null;
+    for(var k=0;k<cfg.symbolKeys.length;k++){ if(typeof o[cfg.symbolKeys[k]] === 'string'){ sym = o[cfg.symbolKeys[k]]; break; } }
+    if(sym !== null){
+      for(var p=0;p<cfg.priceKeys.length;p++){
+        var v = o[cfg.priceKeys[p]];
+        var n = typeof v === 'number' ? v : (typeof v === 'string' ? parseFloat(v) : NaN);
+        if(n > 0 && isFinite(n)){
+          var name = norm(sym);
+          if(!want || want.has(name)){ push(name, n, ts); }
+          return;
+        }
+      }
+    }
+    for(var key in o){ if(o[key] && typeof o[key] === 'object'){ scan(o[key], depth + 1, ts); } }
+  }
+  function onMessage(ev){
+    T.frames++;
+    var d = ev.data;
+    if(typeof d !== 'string' || d.length > cfg.maxFrame){ return; }
+    var m = /^[0-9]+/.exec(d);  // socket.io style packet prefix, e.g. 42["price",{...}]
+    if(m){ d = d.slice(m[0].length); }
+    var f = d.charAt(0);
+    if(f !== '{' && f !== '['){ return; }
+    try{ scan(JSON.parse(d), 0, Date.now()); }catch(e){}
+  }
+  function tap(ws){
+    if(ws.__sentinelTapped || (urlRe && !urlRe.test(ws.url || ''))){ return; }
+    ws.__sentinelTapped = true;
+    T.sockets++;
+    ws.addEventListener('message', onMessage);
+  }
+  var send = WS.prototype.send;
+  WS.prototype.send = function(){ try{ tap(this); }catch(e){} return send.apply(this, arguments); };
+  var Tapped = function(url, protocols){
+    var ws = protocols === undefined ? new WS(url) : new WS(url, protocols);
+    try{ tap(ws); }catch(e){}
+    return ws;
+  };
+  Tapped.prototype = WS.prototype;
+  ['CONNECTING', 'OPEN', 'CLOSING', 'CLOSED'].forEach(function(k){ Tapped[k] = WS[k]; });
+  window.WebSocket = Tapped;
+  return true;
+})"""
+
+# Drain the price tap after `cursor`, as columns. A reader holding another gen starts from the oldest
+# tick still in the ring; ticks that were overwritten before being drained are counted in `lost`.
+# arguments: gen, cursor. Returns null when the tap is not installed on this page.
+_PRICE_TAP_DRAIN_JS = """
+var gen = arguments[0], cursor = arguments[1];
+var T = window.__sentinelPrices;
+if(!T){ return null; }
+var oldest = Math.max(0, T.seq - T.cap);
+var from = (gen === T.gen && cursor >= 0) ? cursor : oldest;
+var lost = Math.max(0, oldest - from);
+from = Math.max(from, oldest);
+var ts = [], inst = [], px = [];
+for(var s=from+1;s<=T.seq;s++){
+  var i = s % T.cap;
+  ts.push(T.ts[i]); inst.push(T.inst[i]); px.push(T.px[i]);
+}
+return {gen: T.gen, seq: T.seq, lost: lost, codes: ts.length ? T.codes : [], ts: ts, inst: inst, px: px,
+        frames: T.frames, sockets: T.sockets};
+"""
+
+
+def _num(s: str) -> float:
+    try:
+        t = (s or '')
+        # normalize Unicode minus (U+2212) to ASCII hyphen
+        t = t.replace('\u2212', '-').replace('−', '-')
+        t = t.replace(',', '').replace('$', '').replace('%', '').strip()
+        if t.lower().endswith('x'):
+            t = t[:-1]
+        # handle parentheses negatives e.g., (0.01)
+        if len(t) >= 3 and t[0] == '(' and t[-1] == ')':
+            t = '-' + t[1:-1]
+        return float(t)
+    except Exception:
+        return 0.0
+
+
+def _norm_dir_text(s: str) -> str:
+    t = (s or '').strip().lower()
+    if any(k in t for k in ['down', 'sell', 'short', 'bear']):
+        return 'down'
+    if any(k in t for k in ['up', 'buy', 'long', 'bull']):
+        return 'up'
+    return ''
+
+
+def _driver_locked(method):
+    """Serialise a TradingInterface entry point on the shared WebDriver session, which is not
+    thread-safe (the signal worker and the Tk thread both drive it)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.driver_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class BrowserSession:
+    """State of one browser session, shared by every per-instrument TradingInterface on it (see
+    TradingInterface.for_instrument): the driver and its lock, latency and signal stats, and the
+    page-level caches. Siblings reference one BrowserSession, so assignments through any of them
+    are seen by all; only the instrument and per-trade results live on the interface itself."""
+
     def __init__(self, driver):
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
+        self.lock = threading.RLock()
+        self.interfaces = {}   # instrument -> TradingInterface
         # Set up module-level logger once
         self.logger = logging.getLogger("sentinel.trading")
         if not self.logger.handlers:
@@ -24,6 +853,62 @@ class TradingInterface:
             file_handler.setFormatter(formatter)
             self.logger.addHandler(file_handler)
         self.logger.propagate = False
+        # Per-stage latency histograms (monotonic time + WebDriver command count per stage)
+        self.latency = LatencyRecorder(driver)
+        self.signal_stats = SignalStats(self.latency)
+        # Last confirmed order ticket (see _reuse_order_ticket)
+        self.ticket = {}
+        # Order panel element and the trading URL it was found on (see _find_order_panel_container)
+        self.panel = None
+        self.panel_url = None
+        self.panel_stats = {'hits': 0, 'lookups': 0, 'stale': 0}
+        # Positions snapshot cache and the Python mirror of the in-page positions stream (see poll_active_bets)
+        from config import POSITIONS_CACHE_TTL
+        self.bets_cache = SnapshotCache(POSITIONS_CACHE_TTL)
+        self.positions_stream = {'gen': None, 'seq': -1, 'rows': {}, 'order': [], 'headers': [], 'bets': [],
+                                 'synced_at': 0.0, 'polls': 0, 'drained': 0, 'resyncs': 0, 'overflows': 0}
+        # Cursor and last prices of the inbound price tap (see start_price_tap)
+        self.price_tap = {'installed': False, 'source': None, 'gen': None, 'seq': -1, 'last': {}, 'levels': {},
+                          'ticks': 0, 'lost': 0, 'rejected': 0, 'reanchors': 0, 'frames': 0, 'sockets': 0}
+        # Recently requested order parameters, used to label positions whose direction can't be read
+        self.last_requested_direction = None
+        self.last_requested_wager = None
+        self.recent_directions = []
+
+
+def _session_attr(name: str):
+    """Interface attribute stored on its BrowserSession."""
+    return property(lambda self: getattr(self.session, name),
+                    lambda self, value: setattr(self.session, name, value))
+
+
+class TradingInterface:
+    driver = _session_attr('driver')
+    wait = _session_attr('wait')
+    driver_lock = _session_attr('lock')
+    logger = _session_attr('logger')
+    latency = _session_attr('latency')
+    signal_stats = _session_attr('signal_stats')
+    _siblings = _session_attr('interfaces')
+    _ticket = _session_attr('ticket')
+    _panel_stats = _session_attr('panel_stats')
+    _bets_cache = _session_attr('bets_cache')
+    _positions_stream = _session_attr('positions_stream')
+    _price_tap = _session_attr('price_tap')
+    _last_requested_direction = _session_attr('last_requested_direction')
+    _last_requested_wager = _session_attr('last_requested_wager')
+    _recent_directions = _session_attr('recent_directions')
+
+    def __init__(self, driver, instrument: str = 'BTC', session: BrowserSession = None):
+        self.session = session if session is not None else BrowserSession(driver)
+        self.instrument = instrument
+        self.session.interfaces.setdefault(instrument, self)
+        # Per-trade state of this interface
+        self._stage_timer = None
+        self._trace = None
+        self.last_order_result = None
+        self.last_trade_timings = {}
+        self.last_close_all_result = None
 
     # ============ Deep DOM Inspection Utilities (for accurate in-panel direction detection) ==========
     def _element_attrs(self, element) -> dict:
@@ -162,13 +1047,13 @@ class TradingInterface:
                 "contains(translate(normalize-space(.),'short','SHORT'),'SHORT'))]"
             )
             try:
-                candidates.extend(panel.find_elements(By.XPATH, xp))
+                candidates.extend(self._panel_elements(panel, By.XPATH, xp))
             except Exception:
                 pass
 
             # Include hidden radios + their labels if any
             try:
-                radios = panel.find_elements(By.XPATH, ".//input[@type='radio']")
+                radios = self._panel_elements(panel, By.XPATH, ".//input[@type='radio']")
                 for r in radios:
                     candidates.append(r)
                     try:
@@ -182,8 +1067,8 @@ class TradingInterface:
 
             # Broaden: any ARIA/role-based toggles inside panel
             try:
-                aria_role_candidates = panel.find_elements(
-                    By.CSS_SELECTOR,
+                aria_role_candidates = self._panel_elements(
+                    panel, By.CSS_SELECTOR,
                     "[role='button'], [role='tab'], [role='switch'], [role='radio'], [aria-pressed], [aria-selected], [aria-checked]"
                 )
                 candidates.extend(aria_role_candidates)
@@ -192,8 +1077,8 @@ class TradingInterface:
 
             # Broaden: segmented/toggle/tab UI by class heuristics
             try:
-                class_heuristics = panel.find_elements(
-                    By.CSS_SELECTOR,
+                class_heuristics = self._panel_elements(
+                    panel, By.CSS_SELECTOR,
                     "[class*='segment'], [class*='toggle'], [class*='switch'], [class*='tab'], [class*='pill']"
                 )
                 candidates.extend(class_heuristics)
@@ -482,51 +1367,298 @@ class TradingInterface:
             self.logger.error(f"Network spy dump failed: {e}")
             return []
 
-    def _place_trade_via_api(self, direction: str, wager: float, multiplier: float, instrument: str = 'BTC') -> bool:
-        """Attempt to place a trade directly via site API using in-page fetch. Returns True on success."""
+    def _price_tap_source(self, instruments=None) -> str:
+        from config import (PRICE_TAP_URL_PATTERN, PRICE_TAP_SYMBOL_KEYS, PRICE_TAP_PRICE_KEYS,
+                            PRICE_TAP_RING, PRICE_TAP_MAX_FRAME, SENTINEL_ROUTES)
+        if instruments is None:
+            instruments = sorted(set(SENTINEL_ROUTES.values()) | {self.instrument})
+        cfg = {
+            'url': PRICE_TAP_URL_PATTERN or '',
+            'symbolKeys': list(PRICE_TAP_SYMBOL_KEYS),
+            'priceKeys': list(PRICE_TAP_PRICE_KEYS),
+            'cap': int(PRICE_TAP_RING),
+            'maxFrame': int(PRICE_TAP_MAX_FRAME),
+            'instruments': [str(i).upper() for i in instruments],
+        }
+        return _PRICE_TAP_INSTALL_JS + "(" + json.dumps(cfg) + ");"
+
+    @_driver_locked
+    def start_price_tap(self, instruments=None) -> bool:
+        """Install the inbound price tap (see _PRICE_TAP_INSTALL_JS) on the current page and, where
+        the driver speaks CDP, ahead of the page's own scripts on every later load, so the market-data
+        socket is tapped from the moment it opens. instruments: which to keep (default: every routed
+        instrument plus this one). Ticks are read with drain_prices()."""
+        tap = self._price_tap
+        tap['source'] = self._price_tap_source(instruments)
+        try:
+            if hasattr(self.driver, 'execute_cdp_cmd'):
+                self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': tap['source']})
+        except Exception as e:
+            self.logger.info(f"Price tap: CDP pre-install unavailable ({e}); tapping the current page only")
+        try:
+            tap['installed'] = bool(self.driver.execute_script("return " + tap['source']))
+        except Exception as e:
+            self.logger.warning(f"Price tap install failed: {e}")
+            tap['installed'] = False
+        if tap['installed']:
+            self.logger.info("Price tap installed")
+        return tap['installed']
+
+    @_driver_locked
+    def drain_prices(self) -> list:
+        """Ticks captured by the price tap since the last drain, oldest first, as
+        [(ts_ms, instrument, price)]. One small round trip; [] when the tap is not installed.
+        A tick more than PRICE_TAP_MAX_JUMP (fraction) away from the instrument's last accepted
+        price is dropped as a misparse, unless PRICE_TAP_ANCHOR_TICKS such ticks in a row agree with
+        each other: then that is the new level (the first price of an instrument is accepted the same
+        way), so one bad tick can't lock out real prices. Reinstalls the tap when the page lost it
+        (reload without CDP)."""
+        from config import PRICE_TAP_MAX_JUMP, PRICE_TAP_ANCHOR_TICKS
+        tap = self._price_tap
+        if not tap['installed']:
+            return []
+        try:
+            res = self.driver.execute_script(_PRICE_TAP_DRAIN_JS, tap['gen'], tap['seq'])
+            if res is None:
+                self.driver.execute_script(tap['source'])
+                tap['gen'], tap['seq'] = None, -1
+                return []
+        except Exception as e:
+            self.logger.warning(f"Price tap drain failed: {e}")
+            return []
+        tap['gen'], tap['seq'] = res.get('gen'), res.get('seq', -1)
+        tap['lost'] += int(res.get('lost') or 0)
+        tap['frames'], tap['sockets'] = res.get('frames', 0), res.get('sockets', 0)
+        codes = res.get('codes') or []
+        last, levels = tap['last'], tap['levels']
+        ticks = []
+        for ts, code, price in zip(res.get('ts') or [], res.get('inst') or [], res.get('px') or []):
+            instrument = codes[code] if 0 <= code < len(codes) else None
+            if instrument is None or not price > 0:
+                continue
+            prev = last.get(instrument)
+            if PRICE_TAP_MAX_JUMP and (prev is None or abs(price / prev[1] - 1.0) > PRICE_TAP_MAX_JUMP):
+                # Off the accepted level (or none yet): count consecutive ticks that agree on a new one
+                level = levels.get(instrument)
+                n = level[1] + 1 if level is not None and abs(price / level[0] - 1.0) <= PRICE_TAP_MAX_JUMP else 1
+                if n < PRICE_TAP_ANCHOR_TICKS:
+                    levels[instrument] = (price, n)
+                    tap['rejected'] += 1
+                    continue
+                if prev is not None:
+                    tap['reanchors'] += 1
+                    self.logger.info(f"Price tap: {instrument} re-anchored {prev[1]} -> {price} after {n} consistent ticks")
+            levels.pop(instrument, None)
+            last[instrument] = (ts, price)
+            ticks.append((ts, instrument, price))
+        tap['ticks'] += len(ticks)
+        return ticks
+
+    def last_price(self, instrument: str = None):
+        """Last (ts_ms, price) the price tap accepted for an instrument, or None."""
+        return self._price_tap['last'].get(instrument or self.instrument)
+
+    def price_tap_stats(self) -> dict:
+        tap = self._price_tap
+        return {k: tap[k] for k in ('installed', 'seq', 'ticks', 'lost', 'rejected', 'reanchors', 'frames', 'sockets')}
+
+    def _validate_order(self, direction: str, wager, multiplier, instrument: str) -> str:
+        """Return a description of what is wrong with the order parameters, or '' if they are usable."""
+        import math
+        if (direction or '').lower() not in ('up', 'down'):
+            return f"direction must be 'up' or 'down', got {direction!r}"
+        try:
+            w = float(wager)
+            m = float(multiplier)
+        except (TypeError, ValueError):
+            return f"wager/multiplier must be numeric, got {wager!r}/{multiplier!r}"
+        if not math.isfinite(w) or w <= 0:
+            return f"wager must be > 0, got {wager!r}"
+        if not math.isfinite(m) or m < 1:
+            return f"multiplier must be >= 1, got {multiplier!r}"
+        if not instrument:
+            return "instrument is required"
+        return ''
+
+    def _parse_order_response(self, body) -> dict:
+        """Pull order id, entry price and status out of a /private/trade JSON body.
+        The fields are searched at the top level and inside common envelopes (data/trade/bet/position/result)."""
+        found = {'order_id': None, 'entry_price': None, 'status': None}
+        if not isinstance(body, dict):
+            return found
+        layers = [body]
+        for key in ('data', 'trade', 'bet', 'position', 'result'):
+            if isinstance(body.get(key), dict):
+                layers.append(body[key])
+                for inner in ('trade', 'bet', 'position'):
+                    if isinstance(body[key].get(inner), dict):
+                        layers.append(body[key][inner])
+        for layer in layers:
+            if found['order_id'] is None:
+                for k in ('id', 'trade_id', 'tradeId', 'bet_id', 'betId', 'uuid'):
+                    if layer.get(k) not in (None, ''):
+                        found['order_id'] = str(layer[k])
+                        break
+            if found['entry_price'] is None:
+                for k in ('entry_price', 'entryPrice', 'open_price', 'openPrice', 'price'):
+                    if layer.get(k) not in (None, ''):
+                        try:
+                            found['entry_price'] = float(layer[k])
+                            break
+                        except (TypeError, ValueError):
+                            continue
+            if found['status'] is None:
+                for k in ('status', 'state'):
+                    if layer.get(k) not in (None, ''):
+                        found['status'] = str(layer[k])
+                        break
+        return found
+
+    def place_order_via_api(self, direction: str, wager: float, multiplier: float, instrument: str = None, timeout: float = None) -> dict:
+        """Place a trade with one in-page fetch('/private/trade') from the authenticated page.
+
+        Returns a structured order result:
+          - ok: bool
+          - engine: 'api'
+          - order_id / entry_price / status: parsed from the JSON response (None when absent)
+          - http_status: int or None
+          - error_class: None on success, else one of 'validation' (bad params or HTTP 400/422),
+            'auth' (401/403), 'rate_limit' (429), 'server' (5xx), 'rejected' (2xx with an error body
+            or other 4xx), 'parse' (non-JSON body), 'timeout', 'network' (fetch failed), 'script'
+            (the WebDriver call itself failed; the request may or may not have been issued)
+          - error: message, latency_ms: WebDriver round trip, fetch_ms: in-page request time
+          - response: raw JSON body (or text preview)
+          - sent: False only when the request was never dispatched (pre-send validation); once the
+            script is issued a 'script'/'network'/'timeout' failure may still have reached the exchange
+
+        instrument defaults to the interface's own instrument.
+        """
+        from config import API_TRADE_TIMEOUT
+        timeout = API_TRADE_TIMEOUT if timeout is None else timeout
+        instrument = instrument or self.instrument
+        result = {
+            'ok': False, 'engine': 'api', 'order_id': None, 'entry_price': None, 'status': None,
+            'http_status': None, 'error_class': None, 'error': None, 'latency_ms': None, 'fetch_ms': None,
+            'response': None, 'sent': False,
+        }
+        problem = self._validate_order(direction, wager, multiplier, instrument)
+        if problem:
+            result.update(error_class='validation', error=problem)
+            self.logger.error(f"API order rejected before sending: {problem}")
+            return result
+
+        buy_flag = True if (direction or '').lower() == 'up' else False
+        payload = {
+            'instrument': instrument,
+            'wager': float(wager),
+            'multiplier': float(multiplier),
+            'take_profit_price': 0,
+            'take_profit_win': 0,
+            'stop_loss_price': 0,
+            'stop_loss_win': 0,
+            'buy': buy_flag,
+            'structure': 0,
+            'rlb': True,
+        }
+        script = (
+            "var done = arguments[arguments.length - 1];"
+            "var body = arguments[0]; var timeoutMs = arguments[1];"
+            "var ctl = new AbortController(); var timer = setTimeout(function(){ ctl.abort(); }, timeoutMs);"
+            "var t0 = performance.now();"
+            "fetch('/private/trade', {method:'POST', headers:{'content-type':'application/json'}, body: JSON.stringify(body), signal: ctl.signal})"
+            ".then(async function(r){ var text = ''; try{ text = await r.text(); }catch(e){}"
+            " var j = null; try{ j = JSON.parse(text); }catch(e){}"
+            " clearTimeout(timer); done({ok:r.ok, status:r.status, json:j, text:(j === null ? text.slice(0, 500) : null), ms: performance.now() - t0}); })"
+            ".catch(function(e){ clearTimeout(timer); done({ok:false, error:String(e), aborted:(e && e.name === 'AbortError'), ms: performance.now() - t0}); });"
+        )
+        started = time.monotonic()
+        self._mark_trace('click_issued')
+        result['sent'] = True
+        try:
+            res = self.driver.execute_async_script(script, payload, int(timeout * 1000))
+        except Exception as e:
+            result.update(error_class='script', error=str(e), latency_ms=(time.monotonic() - started) * 1000.0)
+            self.logger.error(f"API place trade failed: {e}")
+            return result
+        result['latency_ms'] = (time.monotonic() - started) * 1000.0
+        if not isinstance(res, dict):
+            result.update(error_class='script', error=f"unexpected script result: {res!r}")
+            return result
+
+        result['fetch_ms'] = res.get('ms')
+        status = res.get('status')
+        body = res.get('json')
+        result['http_status'] = status
+        result['response'] = body if body is not None else res.get('text')
+        if status is None:
+            result.update(error_class='timeout' if res.get('aborted') else 'network', error=res.get('error'))
+        elif status in (401, 403):
+            result.update(error_class='auth', error=f"HTTP {status}")
+        elif status == 429:
+            result.update(error_class='rate_limit', error=f"HTTP {status}")
+        elif status in (400, 422):
+            result.update(error_class='validation', error=f"HTTP {status}: {result['response']}")
+        elif status >= 500:
+            result.update(error_class='server', error=f"HTTP {status}")
+        elif not res.get('ok'):
+            result.update(error_class='rejected', error=f"HTTP {status}: {result['response']}")
+        elif body is None:
+            result.update(error_class='parse', error='non-JSON response')
+        elif isinstance(body, dict) and (body.get('error') or body.get('errors') or body.get('success') is False):
+            result.update(error_class='rejected', error=str(body.get('error') or body.get('errors') or body))
+        else:
+            result['ok'] = True
+            result.update(self._parse_order_response(body))
+
+        self.logger.info(
+            f"API order | ok={result['ok']} class={result['error_class']} http={status} id={result['order_id']} "
+            f"entry={result['entry_price']} status={result['status']} rtt={result['latency_ms']:.0f}ms"
+        )
+        return result
+
+    def _place_trade_via_api(self, direction: str, wager: float, multiplier: float, instrument: str = None) -> bool:
+        """Attempt to place a trade directly via site API using in-page fetch. Returns True on success.
+        Used as the last-resort fallback of the UI flow (gated by USE_API_FALLBACK)."""
         try:
             from config import USE_API_FALLBACK
             if not USE_API_FALLBACK:
                 return False
-            buy_flag = True if (direction or '').lower() == 'up' else False
-            payload = {
-                'instrument': instrument,
-                'wager': float(wager),
-                'multiplier': float(multiplier),
-                'take_profit_price': 0,
-                'take_profit_win': 0,
-                'stop_loss_price': 0,
-                'stop_loss_win': 0,
-                'buy': buy_flag,
-                'structure': 0,
-                'rlb': True,
-            }
-            script = (
-                "var done = arguments[arguments.length - 1];"
-                "var body = arguments[0];"
-                "fetch('/private/trade', {method:'POST', headers:{'content-type':'application/json'}, body: JSON.stringify(body)})"
-                ".then(async function(r){ try{ var j = await r.json(); done({ok:r.ok,status:r.status,json:j}); } catch(e){ done({ok:r.ok,status:r.status,text:'non-json'});} })"
-                ".catch(function(e){ done({ok:false,error:String(e)}); });"
-            )
-            res = self.driver.execute_async_script(script, payload)
-            ok = bool(res.get('ok')) if isinstance(res, dict) else False
-            self.logger.info(f"API place trade response: {res}")
-            return ok
+            order = self.place_order_via_api(direction, wager, multiplier, instrument=instrument)
+            self.last_order_result = order
+            return bool(order.get('ok'))
         except Exception as e:
             self.logger.error(f"API place trade failed: {e}")
             return False
 
+    @property
+    def trading_url(self) -> str:
+        from config import ROLLBIT_URL_TEMPLATE
+        return ROLLBIT_URL_TEMPLATE.format(instrument=self.instrument)
+
+    def _is_trading_href(self, href: str) -> bool:
+        return re.search(r"trading/" + re.escape(self.instrument) + r"(?:[/?#]|$)", href or "") is not None
+
     def _is_on_trading_page(self) -> bool:
-        current_url = self.driver.current_url or ""
-        return "trading/BTC" in current_url
+        return self._is_trading_href(self.driver.current_url)
 
     def _ensure_on_trading_page(self):
-        from config import ROLLBIT_URL
         if not self._is_on_trading_page():
-            self.logger.info(f"Navigating back to trading page: {ROLLBIT_URL}")
-            self.driver.get(ROLLBIT_URL)
+            self.logger.info(f"Navigating back to trading page: {self.trading_url}")
+            self._ticket.clear()
+            self._bets_cache.invalidate()
+            self._drop_order_panel()
+            self.driver.get(self.trading_url)
             time.sleep(2)
 
+    def for_instrument(self, instrument: str) -> 'TradingInterface':
+        """Interface bound to another instrument's trading page. Siblings share one BrowserSession:
+        the browser, its lock, the latency recorder, signal stats and page caches, so their driver
+        work is still serialised."""
+        sibling = self._siblings.get(instrument)
+        if sibling is None:
+            sibling = TradingInterface(self.driver, instrument, session=self.session)
+        return sibling
+
     def _element_details(self, element) -> str:
         try:
             tag = element.tag_name
@@ -538,11 +1670,22 @@ class TradingInterface:
         except Exception as e:
             return f"<unknown element: {e}>"
 
-    def _javascript_click(self, target, description: str, prevent_default_if_link: bool = True, allow_navigation: bool = False, retry_limit: int = 2):
-        """Click an element via JS with retries and URL monitoring.
+    def _javascript_click(self, target, description: str, prevent_default_if_link: bool = True, allow_navigation: bool = False, retry_limit: int = 2,
+                          idempotent: bool = True):
+        """Click an element via JS with retries and navigation monitoring.
 
         target can be a WebElement or a callable that returns a fresh WebElement each attempt.
+        The click script watches beforeunload/pushState/replaceState/popstate/hashchange around the
+        click (plus CLICK_NAV_WINDOW_MS afterwards) and returns right away when nothing happened;
+        only a detected navigation that left the trading page falls into recovery and a retry.
+
+        idempotent=False (PLACE BET, cash-out): once the click script has been dispatched the click
+        is never repeated. A script error, timeout or navigation afterwards returns True as
+        "clicked, outcome unknown" and the caller confirms the result (e.g. _await_order_ack).
+        Such clicks are only retried when the element could not be acquired or went stale before
+        the script ran.
         """
+        from config import CLICK_NAV_WINDOW_MS
         attempts = 0
         while attempts <= retry_limit:
             try:
@@ -553,71 +1696,55 @@ class TradingInterface:
                 time.sleep(0.5)
                 continue
 
-            pre_url = self.driver.current_url
-            self.logger.info(f"CLICK START | {description} | pre_url='{pre_url}' | {self._element_details(element)}")
+            dispatched = False
             try:
-                is_link = False
                 try:
-                    tag_name = (element.tag_name or '').lower()
-                    href = element.get_attribute("href")
-                    is_link = (tag_name == "a") or (href is not None and href != "")
-                except Exception:
-                    pass
-
-                # Strong navigation guard: only for links (to avoid breaking button handlers)
-                if prevent_default_if_link and is_link:
-                    try:
-                        self.driver.execute_script(
-                            """
-                            (function(el){
-                              try {
-                                if(!window.__sentinelNav){ window.__sentinelNav = {}; }
-                                var g = window.__sentinelNav;
-                                if(!g.installed){
-                                  g.origPushState = history.pushState; g.origReplaceState = history.replaceState;
-                                  history.pushState = function(){ try{ g.lastIntercept = Date.now(); }catch(e){}; return g.origPushState.apply(this, arguments); };
-                                  history.replaceState = function(){ try{ g.lastIntercept = Date.now(); }catch(e){}; return g.origReplaceState.apply(this, arguments); };
-                                  g.docClick = function(e){ try { e.preventDefault(); e.stopPropagation(); e.stopImmediatePropagation(); } catch(_){} };
-                                  document.addEventListener('click', g.docClick, true);
-                                  g.installed = true;
-                                }
-                                // Element-level stoppers
-                                var opts = { once: true, capture: true };
-                                var stopper = function(e){ try { e.preventDefault(); e.stopPropagation(); e.stopImmediatePropagation(); } catch(_){} };
-                                ['click','mousedown','mouseup','pointerdown','pointerup'].forEach(function(t){ el.addEventListener(t, stopper, opts); });
-                              } catch(e) {}
-                            })(arguments[0]);
-                            """,
-                            element
-                        )
-                    except Exception:
-                        pass
-                # Perform the click
-                self.driver.execute_script('arguments[0].click();', element)
-
-                time.sleep(1.0)
-                post_url = self.driver.current_url
-                self.logger.info(f"CLICK END | {description} | post_url='{post_url}'")
-
-                if not allow_navigation and not self._is_on_trading_page():
-                    self.logger.warning(f"Unexpected navigation detected after {description}. Returning to trading page and retrying (attempt {attempts+1}/{retry_limit})")
-                    self._ensure_on_trading_page()
-                    attempts += 1
-                    continue
+                    dispatched = True
+                    res = self.driver.execute_async_script(
+                        _NAV_AWARE_CLICK_JS, element, bool(prevent_default_if_link), int(CLICK_NAV_WINDOW_MS)
+                    ) or {}
+                except StaleElementReferenceException:
+                    # Rejected before the script ran: the click never happened
+                    dispatched = False
+                    raise
+                except Exception as e:
+                    if not idempotent:
+                        self.logger.warning(f"CLICK | {description} | outcome unknown after dispatch: {e}")
+                        return True
+                    # The page unloading mid-script aborts the async callback; treat it as a navigation
+                    if allow_navigation or self._is_on_trading_page():
+                        raise
+                    res = {'navigated': True, 'nav_kind': 'unload', 'error': str(e)}
+                if res.get('error') and not res.get('navigated'):
+                    if not idempotent:
+                        self.logger.warning(f"CLICK | {description} | click reported an error, not repeating: {res['error']}")
+                        return True
+                    raise Exception(res['error'])
+                self.logger.info(
+                    f"CLICK | {description} | pre_url='{res.get('href')}' post_url='{res.get('post_href')}' "
+                    f"| <{res.get('tag')}> text='{res.get('text')}' classes='{res.get('classes')}' "
+                    f"href='{res.get('link_href')}' onclick='{res.get('onclick')}' | nav={res.get('nav_kind') or 'none'}"
+                )
 
-                # Remove global guards after click
-                try:
-                    self.driver.execute_script(
-                        """
-                        try{ var g = window.__sentinelNav; if(g && g.installed){ if(g.docClick){ document.removeEventListener('click', g.docClick, true); } if(g.origPushState){ history.pushState = g.origPushState; } if(g.origReplaceState){ history.replaceState = g.origReplaceState; } g.installed=false; } }catch(e){}
-                        return true;
-                        """
-                    )
-                except Exception:
-                    pass
+                if res.get('navigated') and not allow_navigation:
+                    if res.get('nav_kind') == 'unload':
+                        # A full page load has started; give it a moment before reading the URL
+                        time.sleep(0.5)
+                    if not self._is_on_trading_page():
+                        if not idempotent:
+                            self.logger.warning(f"Unexpected navigation ({res.get('nav_kind')}) after {description}; returning to trading page without clicking again")
+                            self._ensure_on_trading_page()
+                            return True
+                        self.logger.warning(f"Unexpected navigation ({res.get('nav_kind')}) detected after {description}. Returning to trading page and retrying (attempt {attempts+1}/{retry_limit})")
+                        self._ensure_on_trading_page()
+                        attempts += 1
+                        continue
 
                 return True
             except Exception as e:
+                if dispatched and not idempotent:
+                    self.logger.warning(f"CLICK | {description} | outcome unknown after dispatch: {e}")
+                    return True
                 self.logger.error(f"Error during javascript click on {description}: {e}")
                 attempts += 1
                 time.sleep(0.5)
@@ -625,18 +1752,75 @@ class TradingInterface:
         raise NavigationRedirectedError(f"Navigation or click failure persisted after {retry_limit} retries for: {description}")
 
     def _find_order_panel_container(self):
-        """Locate the order panel by anchoring around the PLACE BET button and walking up the DOM."""
+        """Locate the order panel by anchoring around the PLACE BET button and walking up the DOM.
+
+        The element is kept on the session and returned without a WebDriver call until it goes
+        stale (see _panel_elements) or this interface navigates / wants another trading URL. The
+        lookup itself walks in-page once and reuses the tagged container (see _ORDER_PANEL_JS).
+        """
+        session = self.session
+        if session.panel is not None and session.panel_url == self.trading_url:
+            self._panel_stats['hits'] += 1
+            return session.panel
+        self._panel_stats['lookups'] += 1
         try:
-            place_bet = self.driver.find_element(By.CSS_SELECTOR, SELECTORS['place_bet_button'])
-        except Exception:
+            panel = self.driver.execute_script(
+                _ORDER_PANEL_JS + "return __sentinelPanel(arguments[0]);",
+                SELECTORS['place_bet_button']
+            )
+        except Exception as e:
+            self.logger.warning(f"Order panel lookup failed: {e}")
             return None
-        container = place_bet
-        for _ in range(12):
-            try:
-                container = container.find_element(By.XPATH, './..')
-            except Exception:
-                break
-        return container
+        self._remember_order_panel(panel)
+        return panel
+
+    def _remember_order_panel(self, panel):
+        self.session.panel = panel
+        self.session.panel_url = self.trading_url if panel is not None else None
+
+    def _drop_order_panel(self):
+        self.session.panel = None
+        self.session.panel_url = None
+
+    def _panel_elements(self, panel, by, value) -> list:
+        """panel.find_elements; a stale cached panel is dropped, looked up again and searched once more."""
+        try:
+            return panel.find_elements(by, value)
+        except StaleElementReferenceException:
+            self._panel_stats['stale'] += 1
+            self._drop_order_panel()
+            panel = self._find_order_panel_container()
+            return panel.find_elements(by, value) if panel is not None else []
+
+    def order_panel_cache_stats(self) -> dict:
+        """Return the panel cache counters for diagnostics: in-page ({'valid', 'hits', 'builds'}) and
+        Python-side ('py_hits', 'py_lookups', 'py_stale')."""
+        stats = {f"py_{k}": v for k, v in self._panel_stats.items()}
+        try:
+            stats.update(self.driver.execute_script(
+                "var c=window.__sentinelPanelCache;return c?{valid:!!c.valid,hits:c.hits,builds:c.builds}:{};"
+            ) or {})
+        except Exception:
+            pass
+        return stats
+
+    def _resolve_order_controls(self) -> dict:
+        """Resolve every order control and its state in a single in-page call.
+
+        Returns a dict with WebElement handles 'panel', 'wager_input', 'multiplier_input', 'up', 'down',
+        'place_bet' (None when not found) and 'state' = {'direction', 'up_color', 'down_color',
+        'wager_value', 'multiplier_value', 'place_bet_enabled', 'place_bet_displayed'}.
+        Returns {} if the script fails so callers can fall back to the per-control locators.
+        """
+        try:
+            res = self.driver.execute_script(_ORDER_PANEL_JS + _ORDER_INPUTS_JS + _ORDER_CONTROLS_JS, dict(SELECTORS))
+            if isinstance(res, dict):
+                if res.get('panel') is not None:
+                    self._remember_order_panel(res['panel'])
+                return res
+        except Exception as e:
+            self.logger.warning(f"Order control registry failed: {e}")
+        return {}
 
     def _find_order_inputs(self):
         """Find wager and multiplier inputs inside the order panel container.
@@ -646,7 +1830,7 @@ class TradingInterface:
         if panel is None:
             return (None, None)
         try:
-            inputs = panel.find_elements(By.XPATH, ".//input[@type='text' or @type='number']")
+            inputs = self._panel_elements(panel, By.XPATH, ".//input[@type='text' or @type='number']")
         except Exception:
             inputs = []
         wager_input = None
@@ -715,7 +1899,7 @@ class TradingInterface:
         try:
             panel = self._find_order_panel_container()
             if panel is not None:
-                candidates += panel.find_elements(By.XPATH, ".//*[contains(translate(normalize-space(.),'error','ERROR'),'ERROR') or contains(., '!')] ")
+                candidates += self._panel_elements(panel, By.XPATH, ".//*[contains(translate(normalize-space(.),'error','ERROR'),'ERROR') or contains(., '!')] ")
         except Exception:
             pass
         for el in candidates:
@@ -736,7 +1920,7 @@ class TradingInterface:
         if panel is not None:
             try:
                 xp = ".//button[contains(translate(normalize-space(.),'place bet','PLACE BET'),'PLACE BET') or contains(translate(normalize-space(.),'bet','BET'),'BET') or @type='submit']"
-                elems = panel.find_elements(By.XPATH, xp)
+                elems = self._panel_elements(panel, By.XPATH, xp)
                 for e in elems:
                     if e.is_displayed():
                         return e
@@ -744,7 +1928,7 @@ class TradingInterface:
                 pass
             try:
                 xp2 = ".//*[@role='button' and (contains(translate(normalize-space(.),'place','PLACE'),'PLACE') or contains(translate(normalize-space(.),'bet','BET'),'BET'))]"
-                elems = panel.find_elements(By.XPATH, xp2)
+                elems = self._panel_elements(panel, By.XPATH, xp2)
                 for e in elems:
                     if e.is_displayed():
                         return e
@@ -848,7 +2032,7 @@ class TradingInterface:
         try:
             css = SELECTORS.get('up_button') if want_up else SELECTORS.get('down_button')
             if css:
-                elems = container.find_elements(By.CSS_SELECTOR, css)
+                elems = self._panel_elements(container, By.CSS_SELECTOR, css)
                 for e in elems:
                     if not (e.is_displayed() and e.is_enabled()):
                         continue
@@ -870,7 +2054,7 @@ class TradingInterface:
                 "contains(translate(normalize-space(.),'up','UP'),'UP') or "
                 "contains(translate(normalize-space(.),'down','DOWN'),'DOWN'))]"
             )
-            elems = container.find_elements(By.XPATH, xp)
+            elems = self._panel_elements(container, By.XPATH, xp)
             for e in elems:
                 if not (e.is_displayed() and e.is_enabled()):
                     continue
@@ -920,12 +2104,12 @@ class TradingInterface:
         candidates = []
         # 1) Known chip classes if present
         try:
-            candidates += panel.find_elements(By.CSS_SELECTOR, '.css-1p91j2k, .css-qv9fap')
+            candidates += self._panel_elements(panel, By.CSS_SELECTOR, '.css-1p91j2k, .css-qv9fap')
         except Exception:
             pass
         # 2) Text-based 'Up'/'Down' inside panel
         try:
-            candidates += panel.find_elements(By.XPATH, ".//*[normalize-space(text())='Up' or normalize-space(text())='Down']")
+            candidates += self._panel_elements(panel, By.XPATH, ".//*[normalize-space(text())='Up' or normalize-space(text())='Down']")
         except Exception:
             pass
         # 3) Nearby siblings before PLACE BET button
@@ -1060,7 +2244,7 @@ class TradingInterface:
         if panel is None:
             return False
         try:
-            radios = panel.find_elements(By.XPATH, ".//input[@type='radio']")
+            radios = self._panel_elements(panel, By.XPATH, ".//input[@type='radio']")
         except Exception:
             radios = []
         if not radios:
@@ -1149,7 +2333,7 @@ class TradingInterface:
         if panel is None:
             return False
         try:
-            radios = panel.find_elements(By.CSS_SELECTOR, "[role='radio']")
+            radios = self._panel_elements(panel, By.CSS_SELECTOR, "[role='radio']")
         except Exception:
             radios = []
         if not radios:
@@ -1231,11 +2415,45 @@ class TradingInterface:
             print(f"Failed to click DOWN button: {e}")
             return False
 
-    def set_wager(self, amount):
-        """Set the wager amount"""
+    def set_order_inputs(self, wager=None, multiplier=None, wager_input=None, multiplier_input=None):
+        """Set wager and/or multiplier in a single in-page call (see _SET_ORDER_INPUTS_JS).
+
+        Fields passed as None are left alone; fields already holding the value are skipped without
+        touching the DOM. Inputs are looked up in-page unless already-resolved elements are given.
+        Returns {'wager': {...}, 'multiplier': {...}} with found/changed/ok/value per field, or None
+        if the script itself failed (callers then fall back to typing into the inputs).
+        """
+        want = {}
+        if wager is not None:
+            want['wager'] = str(wager)
+        if multiplier is not None:
+            want['multiplier'] = str(multiplier)
+        try:
+            res = self.driver.execute_async_script(
+                _ORDER_PANEL_JS + _ORDER_INPUTS_JS + _SET_ORDER_INPUTS_JS,
+                dict(SELECTORS), want, wager_input, multiplier_input
+            )
+            if isinstance(res, dict):
+                self.logger.info(f"Order inputs: {res}")
+                return res
+        except Exception as e:
+            self.logger.warning(f"Atomic input setter failed, falling back to typing: {e}")
+        return None
+
+    def set_wager(self, amount, element=None):
+        """Set the wager amount. element: an already-resolved wager input (skips the lookup)."""
+        res = self.set_order_inputs(wager=amount, wager_input=element)
+        field = (res or {}).get('wager') or {}
+        if field.get('ok'):
+            print(f"Wager set to: {amount}")
+            return True
+        if res is not None and not field.get('found'):
+            print("Wager input not found")
+            return False
+        # Script failed or the value did not stick: type it in
         try:
             # Find all wager inputs and use the first one (wager input)
-            wager_inputs = self.driver.find_elements(By.CSS_SELECTOR, SELECTORS['wager_input'])
+            wager_inputs = [element] if element is not None else self.driver.find_elements(By.CSS_SELECTOR, SELECTORS['wager_input'])
             if wager_inputs:
                 wager_input = wager_inputs[0]  # First input is the wager
                 try:
@@ -1273,14 +2491,26 @@ class TradingInterface:
             print(f"Failed to set wager: {e}")
             return False
 
-    def set_multiplier(self, multiplier):
-        """Set the multiplier"""
+    def set_multiplier(self, multiplier, element=None):
+        """Set the multiplier. element: an already-resolved multiplier input (skips the lookup)."""
+        res = self.set_order_inputs(multiplier=multiplier, multiplier_input=element)
+        field = (res or {}).get('multiplier') or {}
+        if field.get('ok'):
+            print(f"Multiplier set to: {multiplier}")
+            return True
+        if res is not None and not field.get('found'):
+            print("Multiplier input not found")
+            return False
+        # Script failed or the value did not stick: type it in
         try:
             # Prefer dedicated selector; fallback to second wager input
-            multiplier_inputs = self.driver.find_elements(By.CSS_SELECTOR, SELECTORS.get('multiplier_input', SELECTORS['wager_input']))
+            if element is not None:
+                multiplier_inputs = [element]
+            else:
+                multiplier_inputs = self.driver.find_elements(By.CSS_SELECTOR, SELECTORS.get('multiplier_input', SELECTORS['wager_input']))
             if multiplier_inputs:
                 # If same list as wager_input, use index 1 when available
-                if SELECTORS.get('multiplier_input') == SELECTORS['wager_input'] and len(multiplier_inputs) >= 2:
+                if element is None and SELECTORS.get('multiplier_input') == SELECTORS['wager_input'] and len(multiplier_inputs) >= 2:
                     multiplier_input = multiplier_inputs[1]
                 else:
                     multiplier_input = multiplier_inputs[0]
@@ -1321,333 +2551,552 @@ class TradingInterface:
         """Simplified place bet - just click the button"""
         try:
             button = self.driver.find_element(By.CSS_SELECTOR, SELECTORS['place_bet_button'])
-            self._javascript_click(button, description="PLACE BET", prevent_default_if_link=True, allow_navigation=False)
+            self._javascript_click(button, description="PLACE BET", prevent_default_if_link=True, allow_navigation=False, idempotent=False)
             return True
         except Exception as e:
             print(f"Failed to place bet: {e}")
             return False
 
+    @_driver_locked
     def cash_out(self):
         """Click cash out button"""
+        self._bets_cache.invalidate()  # lock held until we return, so nobody reloads it in between
         try:
             button = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, SELECTORS['cash_out_button'])))
-            button.click()
+            self._javascript_click(button, description="CASH OUT", idempotent=False)
             print("Cashed out")
             return True
         except Exception as e:
             print(f"Failed to cash out: {e}")
             return False
 
-    def get_active_bets(self):
-        """Get active bets from the interface with robust parsing and dynamic P&L.
+    def _snapshot_positions(self) -> dict:
+        """Capture the positions table as plain data: header texts plus, per row, the cell texts,
+        row text, direction hints (descendant attributes), first-cell color and cash-out presence.
 
-        Returns a list of dicts with keys:
-          - direction: 'up' or 'down' or 'unknown'
-          - entry_price: float
-          - current_price: float
-          - wager: float
-          - multiplier: float
-          - pnl: float (prefer dynamic calc, else fallback to displayed P&L)
-          - bias: 'Bullish'|'Bearish'|'Unknown'
-          - row_index: int (position id proxy)
+        Uses a single execute_script round trip when USE_POSITIONS_SNAPSHOT is enabled and falls
+        back to the per-element WebDriver scrape otherwise (or if the script fails).
         """
+        from config import USE_POSITIONS_SNAPSHOT
+        if USE_POSITIONS_SNAPSHOT:
+            try:
+                snap = self.driver.execute_script(_POSITIONS_SNAPSHOT_JS, SELECTORS.get('cash_out_button', ''))
+                if isinstance(snap, dict) and isinstance(snap.get('rows'), list):
+                    return snap
+            except Exception as e:
+                self.logger.warning(f"Positions snapshot script failed, falling back to WebDriver scrape: {e}")
+        return self._snapshot_positions_webdriver()
+
+    def _snapshot_positions_webdriver(self) -> dict:
+        """Legacy scrape producing the same shape as _snapshot_positions, one WebDriver call per
+        cell/attribute. Direction hints and colors are only read when the row text is inconclusive."""
+        snapshot = {'headers': [], 'rows': []}
         try:
-            # Look for table header to map columns
             header_cells = self.driver.find_elements(By.CSS_SELECTOR, 'thead th')
-            header_map = {}
-            if header_cells:
-                headers = [ (c.text or '').strip().lower() for c in header_cells ]
-                def idx_of(keys):
-                    for k in keys:
-                        for i,h in enumerate(headers):
-                            if k in h:
-                                return i
-                    return -1
-                header_map = {
-                    'entry': idx_of(['entry']),
-                    'current': idx_of(['current','mark']),
-                    'wager': idx_of(['wager','stake','amount']),
-                    'mult': idx_of(['mult','multiplier','x']),
-                    'pnl': idx_of(['p&l','pnl','profit']),
-                    'cashout': idx_of(['cash out','cashout']),
-                }
-
-            # Look for all table rows in the active bets section
-            bet_rows = self.driver.find_elements(By.CSS_SELECTOR, 'tbody tr')
-            if not bet_rows:
-                bet_rows = self.driver.find_elements(By.CSS_SELECTOR, 'tr[class*="css-"]')
+            snapshot['headers'] = [(c.text or '').strip() for c in header_cells]
+        except Exception:
+            pass
 
-            import re, time
+        bet_rows = self.driver.find_elements(By.CSS_SELECTOR, 'tbody tr')
+        if not bet_rows:
+            bet_rows = self.driver.find_elements(By.CSS_SELECTOR, 'tr[class*="css-"]')
 
-            def _num(s: str) -> float:
-                try:
-                    t = (s or '')
-                    # normalize Unicode minus (U+2212) to ASCII hyphen
-                    t = t.replace('\u2212', '-').replace('−', '-')
-                    t = t.replace(',', '').replace('$', '').replace('%', '').strip()
-                    if t.lower().endswith('x'):
-                        t = t[:-1]
-                    # handle parentheses negatives e.g., (0.01)
-                    if len(t) >= 3 and t[0] == '(' and t[-1] == ')':
-                        t = '-' + t[1:-1]
-                    return float(t)
-                except Exception:
-                    return 0.0
-
-            def _norm_dir_text(s: str) -> str:
-                t = (s or '').strip().lower()
-                if any(k in t for k in ['down', 'sell', 'short', 'bear']):
-                    return 'down'
-                if any(k in t for k in ['up', 'buy', 'long', 'bull']):
-                    return 'up'
-                return ''
-
-            def _dir_from_row(row) -> str:
-                # 1) scan entire row text
-                try:
-                    t = (row.text or '').lower()
-                    d = _norm_dir_text(t)
-                    if d:
-                        return d
-                except Exception:
-                    pass
-                # 2) scan attributes of descendants
+        for row in bet_rows:
+            entry = {'cells': [], 'text': '', 'hints': [], 'color': '', 'cashout': False}
+            try:
+                cells = row.find_elements(By.TAG_NAME, 'td')
+                entry['cells'] = [(c.text or '') for c in cells]
+            except Exception:
+                cells = []
+            try:
+                entry['text'] = row.text or ''
+            except Exception:
+                pass
+            if not _norm_dir_text(entry['text']):
                 try:
                     nodes = row.find_elements(By.XPATH, './/*')
                     for n in nodes[:20]:
                         for attr in ('class', 'aria-label', 'title', 'alt'):
                             try:
-                                v = (n.get_attribute(attr) or '').lower()
-                                d = _norm_dir_text(v)
-                                if d:
-                                    return d
+                                v = n.get_attribute(attr) or ''
                             except Exception:
                                 continue
+                            if v:
+                                entry['hints'].append(v)
+                        if any(_norm_dir_text(h) for h in entry['hints']):
+                            break
                 except Exception:
                     pass
-                # 3) color heuristic on first cell
-                try:
-                    first_cell = row.find_elements(By.TAG_NAME, 'td')[0]
-                    rgb = self.driver.execute_script('const cs=getComputedStyle(arguments[0]); return cs.color;', first_cell)
-                    if isinstance(rgb, str):
-                        m = re.search(r"rgba?\((\d+)\s*,\s*(\d+)\s*,\s*(\d+)", rgb)
-                        if m:
-                            r, g, b = int(m.group(1)), int(m.group(2)), int(m.group(3))
-                            if g > r + 30 and g > b + 30:
-                                return 'up'
-                            if r > g + 30 and r > b + 30:
-                                return 'down'
-                except Exception:
-                    pass
-                return 'unknown'
-
-            def _extract_numbers_with_context(cell):
-                txt = cell.text or ''
-                low = txt.lower()
-                has_dollar = '$' in txt
-                has_percent = '%' in txt
-                has_x = 'x' in low
-                # find all numeric tokens (including negatives)
-                nums = []
-                for m in re.finditer(r"-?\d+(?:,\d{3})*(?:\.\d+)?", txt):
-                    val = _num(m.group(0))
-                    nums.append(val)
-                return {
-                    'text': txt,
-                    'has_dollar': has_dollar,
-                    'has_percent': has_percent,
-                    'has_x': has_x,
-                    'numbers': nums,
-                }
+                if cells and not any(_norm_dir_text(h) for h in entry['hints']):
+                    try:
+                        entry['color'] = self.driver.execute_script('const cs=getComputedStyle(arguments[0]); return cs.color;', cells[0]) or ''
+                    except Exception:
+                        pass
+            snapshot['rows'].append(entry)
+        return snapshot
 
-            active_bets = []
-            print(f"Found {len(bet_rows)} total rows")
+    def get_active_bets(self, max_age: float = None):
+        """Get active bets from the interface with robust parsing and dynamic P&L.
 
-            for i, row in enumerate(bet_rows):
-                try:
-                    cells = row.find_elements(By.TAG_NAME, 'td')
-                    if len(cells) < 2:
-                        continue
+        Returns a list of dicts with keys:
+          - direction: 'up' or 'down' or 'unknown'
+          - entry_price: float
+          - current_price: float
+          - wager: float
+          - multiplier: float
+          - pnl: float (prefer dynamic calc, else fallback to displayed P&L)
+          - bias: 'Bullish'|'Bearish'|'Unknown'
+          - row_index: int (table row, shifts when rows above close)
+          - has_cashout: bool (row shows a CASH OUT control)
+          - id: stable position id from the row's static cells or row token (see positions.py); pass it to close_trade
 
-                    direction = _dir_from_row(row)
+        Every caller shares one scrape through a snapshot cache: a result up to POSITIONS_CACHE_TTL
+        old (or max_age; 0 forces a scrape) is reused, a caller queued on the driver lock behind a
+        scrape takes that scrape's result, and trades / closes / navigation invalidate it.
+        """
+        arrived = time.monotonic()
+        try:
+            with self.driver_lock:
+                return list(self._bets_cache.get(self._load_active_bets, arrived, max_age))
+        except Exception as e:
+            print(f"Error getting active bets: {e}")
+            return []
 
-                    # Collect numeric tokens per cell
-                    metas = [_extract_numbers_with_context(c) for c in cells]
-                    all_numbers = [n for meta in metas for n in meta['numbers']]
+    @property
+    def bets_taken_at(self):
+        """When the snapshot get_active_bets last served was started (monotonic), for consumers
+        that reconcile against it (admission control)."""
+        return self._bets_cache.taken_at
 
-                    # Identify multiplier (prefer header index; else a number in a cell containing 'x')
-                    mult = 0.0
-                    if header_map.get('mult', -1) >= 0 and header_map['mult'] < len(cells):
-                        mult = _num(cells[header_map['mult']].text)
-                    if mult == 0.0:
-                        for meta in metas:
-                            if meta['has_x'] and meta['numbers']:
-                                mult = max(meta['numbers'])
-                                break
-                    if mult == 0.0:
-                        # fallback: a large integer <= 2000 that's not clearly a price
-                        for n in sorted(all_numbers, reverse=True):
-                            if 1 <= n <= 2000:
-                                mult = n
-                                break
-
-                    # Identify wager
-                    wager = 0.0
-                    if header_map.get('wager', -1) >= 0 and header_map['wager'] < len(cells):
-                        wager = _num(cells[header_map['wager']].text)
-                    if wager == 0.0:
-                        small_candidates = []
-                        for meta in metas:
-                            for n in meta['numbers']:
-                                if n > 0 and (meta['has_dollar'] or n <= 100):
-                                    small_candidates.append((n, meta))
-                        if small_candidates:
-                            wager = min(small_candidates, key=lambda t: t[0])[0]
-
-                    # Prices (by header preferred)
-                    entry_price = 0.0
-                    current_price = 0.0
-                    if header_map.get('entry', -1) >= 0 and header_map['entry'] < len(cells):
-                        entry_price = _num(cells[header_map['entry']].text)
-                    if header_map.get('current', -1) >= 0 and header_map['current'] < len(cells):
-                        current_price = _num(cells[header_map['current']].text)
-                    if entry_price == 0.0 or current_price == 0.0:
-                        price_like = [n for n in all_numbers if n >= 1000]
-                        price_like = sorted(price_like, reverse=True)[:2]
-                        if entry_price == 0.0:
-                            entry_price = price_like[0] if price_like else 0.0
-                        if current_price == 0.0:
-                            current_price = price_like[1] if len(price_like) > 1 else 0.0
-
-                    # PnL: prefer dedicated P&L cell; else pick signed token near cashout
-                    pnl_display = 0.0
-                    pnl_from_display = False
-                    if header_map.get('pnl', -1) >= 0 and header_map['pnl'] < len(cells):
-                        pnl_display = _num(cells[header_map['pnl']].text)
+    def _load_active_bets(self) -> list:
+        return assign_position_ids(self._parse_active_bets(self._snapshot_positions()))
+
+    @_driver_locked
+    def poll_active_bets(self):
+        """Positions as (bets, changed) from the in-page positions stream (see _POSITIONS_STREAM_JS).
+
+        Each call drains only the row events since the previous one, so when nothing changed it
+        is one small round trip and the previous bets come back with changed=False. Rows that did
+        change are merged into a Python mirror of the table and re-parsed like a full snapshot.
+        Falls back to get_active_bets (changed=True) when POSITIONS_STREAM is off or the script fails.
+        """
+        from config import POSITIONS_STREAM
+        if not POSITIONS_STREAM:
+            return self.get_active_bets(), True
+        stream = self._positions_stream
+        started = time.monotonic()
+        try:
+            snapshot = self._drain_positions_stream()
+        except Exception as e:
+            self.logger.warning(f"Positions stream drain failed, using a full snapshot: {e}")
+            stream['gen'] = None
+            return self.get_active_bets(), True
+        if snapshot is None:
+            return stream['bets'], False
+        try:
+            stream['bets'] = assign_position_ids(self._parse_active_bets(snapshot))
+        except Exception as e:
+            print(f"Error getting active bets: {e}")
+            stream['bets'] = []
+        # Fresh as a scrape: let get_active_bets callers reuse it
+        self._bets_cache.put(stream['bets'], started)
+        return stream['bets'], True
+
+    def _drain_positions_stream(self, resync: bool = False):
+        """Apply the stream events since the last cursor to the mirror. Returns a snapshot in the
+        _snapshot_positions shape, or None when no events were pending."""
+        from config import POSITIONS_STREAM_RING, POSITIONS_STREAM_RESYNC_S
+        stream = self._positions_stream
+        cursor = stream['seq']
+        if resync or stream['gen'] is None or time.monotonic() - stream['synced_at'] > POSITIONS_STREAM_RESYNC_S:
+            cursor = -1
+        res = self.driver.execute_script(
+            _POSITIONS_STREAM_JS, SELECTORS.get('cash_out_button', ''), stream['gen'], cursor, int(POSITIONS_STREAM_RING)
+        )
+        if not isinstance(res, dict) or 'seq' not in res:
+            raise ValueError(f"unexpected stream result: {res!r}")
+        stream['polls'] += 1
+        if res.get('resync'):
+            stream['rows'] = {row.get('id'): row for row in res.get('rows') or []}
+            stream['synced_at'] = time.monotonic()
+            stream['resyncs'] += 1
+            if res.get('overflow'):
+                stream['overflows'] += 1
+                self.logger.info(f"Positions stream overflowed its ring ({POSITIONS_STREAM_RING} events); resynced")
+        else:
+            events = res.get('events') or []
+            if not events:
+                stream['gen'], stream['seq'] = res['gen'], res['seq']
+                return None
+            rows = stream['rows']
+            for ev in events:
+                if ev.get('t') == 'row':
+                    rows[ev.get('id')] = ev.get('row') or {}
+                elif ev.get('t') == 'del':
+                    rows.pop(ev.get('id'), None)
+            stream['drained'] += len(events)
+        stream['gen'], stream['seq'] = res['gen'], res['seq']
+        stream['headers'] = res.get('headers') or stream['headers']
+        stream['order'] = res.get('order') or []
+        rows = [stream['rows'][i] for i in stream['order'] if i in stream['rows']]
+        if len(rows) < len(stream['order']):
+            if resync:
+                raise ValueError("resync is missing rows")
+            # A row on the page the mirror never saw: start over from a full snapshot
+            return self._drain_positions_stream(resync=True)
+        # Drop rows that left the table without a removal (e.g. re-parented)
+        if len(stream['rows']) > len(rows):
+            stream['rows'] = {i: stream['rows'][i] for i in stream['order']}
+        return {'headers': stream['headers'], 'rows': rows}
+
+    def positions_stream_stats(self) -> dict:
+        stream = self._positions_stream
+        return {k: stream[k] for k in ('seq', 'polls', 'drained', 'resyncs', 'overflows')}
+
+    def _parse_active_bets(self, snapshot: dict) -> list:
+        """Turn a positions snapshot (see _snapshot_positions) into bet dicts. Pure Python, no driver calls."""
+        # Map columns from table headers
+        header_map = {}
+        headers = [(h or '').strip().lower() for h in (snapshot.get('headers') or [])]
+        if headers:
+            def idx_of(keys):
+                for k in keys:
+                    for i, h in enumerate(headers):
+                        if k in h:
+                            return i
+                return -1
+            header_map = {
+                'entry': idx_of(['entry']),
+                'current': idx_of(['current','mark']),
+                'wager': idx_of(['wager','stake','amount']),
+                'mult': idx_of(['mult','multiplier','x']),
+                'pnl': idx_of(['p&l','pnl','profit']),
+                'cashout': idx_of(['cash out','cashout']),
+                'opened': idx_of(['open time','opened','created','time','date']),
+                'instrument': idx_of(['market','instrument','symbol','asset','pair','contract']),
+            }
+        # Cells that don't change while a position is open; close_trade matches rows on them
+        static_cols = sorted({header_map[k] for k in ('entry', 'wager', 'mult', 'opened') if header_map.get(k, -1) >= 0})
+
+        bet_rows = snapshot.get('rows') or []
+        # Instruments a row may name: every routed one plus the lanes of this session
+        from config import SENTINEL_ROUTES
+        instruments = set(SENTINEL_ROUTES.values()) | set(self._siblings) | {self.instrument}
+
+        def _dir_from_row(row) -> str:
+            # 1) scan entire row text
+            d = _norm_dir_text(row.get('text') or '')
+            if d:
+                return d
+            # 2) scan attributes of descendants (class, aria-label, title, alt)
+            for v in row.get('hints') or []:
+                d = _norm_dir_text(v)
+                if d:
+                    return d
+            # 3) color heuristic on first cell
+            rgb = row.get('color') or ''
+            if isinstance(rgb, str):
+                m = re.search(r"rgba?\((\d+)\s*,\s*(\d+)\s*,\s*(\d+)", rgb)
+                if m:
+                    r, g, b = int(m.group(1)), int(m.group(2)), int(m.group(3))
+                    if g > r + 30 and g > b + 30:
+                        return 'up'
+                    if r > g + 30 and r > b + 30:
+                        return 'down'
+            return 'unknown'
+
+        def _extract_numbers_with_context(txt):
+            txt = txt or ''
+            low = txt.lower()
+            has_dollar = '$' in txt
+            has_percent = '%' in txt
+            has_x = 'x' in low
+            # find all numeric tokens (including negatives)
+            nums = []
+            for m in re.finditer(r"-?\d+(?:,\d{3})*(?:\.\d+)?", txt):
+                val = _num(m.group(0))
+                nums.append(val)
+            return {
+                'text': txt,
+                'has_dollar': has_dollar,
+                'has_percent': has_percent,
+                'has_x': has_x,
+                'numbers': nums,
+            }
+
+        active_bets = []
+        print(f"Found {len(bet_rows)} total rows")
+
+        for i, row in enumerate(bet_rows):
+            try:
+                cells = row.get('cells') or []
+                if len(cells) < 2:
+                    continue
+
+                direction = _dir_from_row(row)
+
+                # Collect numeric tokens per cell
+                metas = [_extract_numbers_with_context(c) for c in cells]
+                all_numbers = [n for meta in metas for n in meta['numbers']]
+
+                # Identify multiplier (prefer header index; else a number in a cell containing 'x')
+                mult = 0.0
+                if header_map.get('mult', -1) >= 0 and header_map['mult'] < len(cells):
+                    mult = _num(cells[header_map['mult']])
+                if mult == 0.0:
+                    for meta in metas:
+                        if meta['has_x'] and meta['numbers']:
+                            mult = max(meta['numbers'])
+                            break
+                if mult == 0.0:
+                    # fallback: a large integer <= 2000 that's not clearly a price
+                    for n in sorted(all_numbers, reverse=True):
+                        if 1 <= n <= 2000:
+                            mult = n
+                            break
+
+                # Identify wager
+                wager = 0.0
+                if header_map.get('wager', -1) >= 0 and header_map['wager'] < len(cells):
+                    wager = _num(cells[header_map['wager']])
+                if wager == 0.0:
+                    small_candidates = []
+                    for meta in metas:
+                        for n in meta['numbers']:
+                            if n > 0 and (meta['has_dollar'] or n <= 100):
+                                small_candidates.append((n, meta))
+                    if small_candidates:
+                        wager = min(small_candidates, key=lambda t: t[0])[0]
+
+                # Prices (by header preferred)
+                entry_price = 0.0
+                current_price = 0.0
+                if header_map.get('entry', -1) >= 0 and header_map['entry'] < len(cells):
+                    entry_price = _num(cells[header_map['entry']])
+                if header_map.get('current', -1) >= 0 and header_map['current'] < len(cells):
+                    current_price = _num(cells[header_map['current']])
+                if entry_price == 0.0 or current_price == 0.0:
+                    price_like = [n for n in all_numbers if n >= 1000]
+                    price_like = sorted(price_like, reverse=True)[:2]
+                    if entry_price == 0.0:
+                        entry_price = price_like[0] if price_like else 0.0
+                    if current_price == 0.0:
+                        current_price = price_like[1] if len(price_like) > 1 else 0.0
+
+                # PnL: prefer dedicated P&L cell; else pick signed token near cashout
+                pnl_display = 0.0
+                pnl_from_display = False
+                if header_map.get('pnl', -1) >= 0 and header_map['pnl'] < len(cells):
+                    pnl_display = _num(cells[header_map['pnl']])
+                    pnl_from_display = True
+                else:
+                    # heuristic: use cell right before Cash Out column
+                    ci = header_map.get('cashout', -1)
+                    if ci > 0 and ci - 1 < len(cells):
+                        pnl_display = _num(cells[ci - 1])
                         pnl_from_display = True
                     else:
-                        # heuristic: use cell right before Cash Out column
-                        ci = header_map.get('cashout', -1)
-                        if ci > 0 and ci - 1 < len(cells):
-                            pnl_display = _num(cells[ci - 1].text)
-                            pnl_from_display = True
-                        else:
-                            for meta in metas:
-                                if meta['has_percent'] or ('+' in meta['text'] or '-' in meta['text']):
-                                    if meta['numbers']:
-                                        pnl_display = sorted(meta['numbers'], key=lambda x: abs(x))[0]
-                                        pnl_from_display = True
-                                        break
-
-                    # Compute dynamic P&L when plausible
-                    pnl_dyn = 0.0
-                    if mult and wager and entry_price and current_price:
-                        if direction == 'up':
-                            pnl_dyn = (current_price - entry_price) * mult * wager
-                        elif direction == 'down':
-                            pnl_dyn = (entry_price - current_price) * mult * wager
-
-                    # Final P&L selection:
-                    # - If we found a platform display value, trust it (keeps correct sign incl. fees)
-                    # - Otherwise, fall back to dynamic calculation
-                    if pnl_from_display:
-                        pnl = pnl_display
-                        pnl_source = 'display'
-                    else:
-                        pnl = pnl_dyn
-                        pnl_source = 'calc'
-
-                    bias = 'Unknown'
+                        for meta in metas:
+                            if meta['has_percent'] or ('+' in meta['text'] or '-' in meta['text']):
+                                if meta['numbers']:
+                                    pnl_display = sorted(meta['numbers'], key=lambda x: abs(x))[0]
+                                    pnl_from_display = True
+                                    break
+
+                # Compute dynamic P&L when plausible
+                pnl_dyn = 0.0
+                if mult and wager and entry_price and current_price:
                     if direction == 'up':
-                        bias = 'Bullish'
+                        pnl_dyn = (current_price - entry_price) * mult * wager
                     elif direction == 'down':
-                        bias = 'Bearish'
-
-                    bet_info = {
-                        'direction': direction,
-                        'entry_price': entry_price,
-                        'current_price': current_price,
-                        'wager': wager,
-                        'multiplier': mult,
-                        'pnl': pnl,
-                        'pnl_source': pnl_source,
-                        'bias': bias,
-                        'row_index': i,
-                    }
+                        pnl_dyn = (entry_price - current_price) * mult * wager
+
+                # Final P&L selection:
+                # - If we found a platform display value, trust it (keeps correct sign incl. fees)
+                # - Otherwise, fall back to dynamic calculation
+                if pnl_from_display:
+                    pnl = pnl_display
+                    pnl_source = 'display'
+                else:
+                    pnl = pnl_dyn
+                    pnl_source = 'calc'
+
+                bias = 'Unknown'
+                if direction == 'up':
+                    bias = 'Bullish'
+                elif direction == 'down':
+                    bias = 'Bearish'
+
+                bet_info = {
+                    'direction': direction,
+                    'entry_price': entry_price,
+                    'current_price': current_price,
+                    'wager': wager,
+                    'multiplier': mult,
+                    'pnl': pnl,
+                    'pnl_source': pnl_source,
+                    'bias': bias,
+                    'row_index': i,
+                    'has_cashout': bool(row.get('cashout')),
+                    'opened': cells[header_map['opened']] if 0 <= header_map.get('opened', -1) < len(cells) else '',
+                    'match': {str(j): cells[j] for j in static_cols if j < len(cells)},
+                    'token': row.get('token') or '',
+                    # None when the row doesn't say: never assume the page's own instrument
+                    'instrument': row_instrument(
+                        [cells[header_map['instrument']] if 0 <= header_map.get('instrument', -1) < len(cells) else '',
+                         row.get('text') or ''] + list(row.get('hints') or []),
+                        instruments),
+                }
+                # Identity from the raw static cells / row token only: the parsed values above can
+                # come from heuristics that pick different cells from tick to tick
+                bet_info['key'] = position_key(bet_info)
 
-                    active_bets.append(bet_info)
-                    print(f"Row {i}: {direction.upper()} | Entry: {entry_price} | Current: {current_price} | Wager: {wager} | Mult: {mult} | PnL: {pnl} | src: {pnl_source}")
+                active_bets.append(bet_info)
+                print(f"Row {i}: {direction.upper()} | Entry: {entry_price} | Current: {current_price} | Wager: {wager} | Mult: {mult} | PnL: {pnl} | src: {pnl_source}")
 
-                except Exception as e:
-                    print(f"Error parsing row {i}: {e}")
-                    continue
+            except Exception as e:
+                print(f"Error parsing row {i}: {e}")
+                continue
 
+        # Post-processing: fill unknown directions, override wager when appropriate,
+        # and fix P&L sign from price movement if site omits minus sign
+        try:
+            # 1) Fill unknown directions using recent requested directions
+            unknown_idxs = [idx for idx, r in enumerate(active_bets) if r.get('direction') == 'unknown']
+            if unknown_idxs:
+                recent = self._recent_directions
+                last_req = self._last_requested_direction
+                if len(active_bets) == 1 and last_req in ('up','down'):
+                    active_bets[0]['direction'] = last_req
+                    active_bets[0]['bias'] = 'Bullish' if last_req == 'up' else 'Bearish'
+                elif isinstance(recent, list) and recent:
+                    # assign most recent directions to newest rows (end of list)
+                    order = list(range(len(active_bets) - 1, -1, -1))
+                    for offset, idx in enumerate(order):
+                        if active_bets[idx].get('direction') == 'unknown' and offset < len(recent):
+                            d = recent[-1 - offset]
+                            if d in ('up','down'):
+                                active_bets[idx]['direction'] = d
+                                active_bets[idx]['bias'] = 'Bullish' if d == 'up' else 'Bearish'
+            # 2) Override wager for a single recent trade to the last requested wager if wager looks tiny/noisy
+            if len(active_bets) == 1 and self._last_requested_wager is not None:
+                if active_bets[0].get('wager', 0) <= 0 or active_bets[0].get('wager', 0) < self._last_requested_wager / 2:
+                    active_bets[0]['wager'] = float(self._last_requested_wager)
+            # 3) Fix P&L sign using price movement + direction while preserving magnitude from display
+            # Only apply sign-fix when we had to calculate pnl (no trustworthy display value)
+            for bet in active_bets:
+                if bet.get('pnl_source') == 'calc':
+                    d = bet.get('direction')
+                    e = float(bet.get('entry_price') or 0)
+                    c = float(bet.get('current_price') or 0)
+                    pnl_val = float(bet.get('pnl') or 0)
+                    if d in ('up','down') and e > 0 and c > 0:
+                        move = c - e
+                        sign = 1.0 if (d == 'up' and move >= 0) or (d == 'down' and move <= 0) else -1.0
+                        # If pnl is positive but sign is negative, flip; if pnl is negative but sign positive, abs
+                        if pnl_val >= 0 and sign < 0:
+                            bet['pnl'] = -abs(pnl_val)
+                        elif pnl_val <= 0 and sign > 0:
+                            bet['pnl'] = abs(pnl_val)
+        except Exception as _e:
+            print(f"post-process bets warning: {_e}")
+
+        # Debug summary after post-processing
+        try:
+            for j, b in enumerate(active_bets):
+                print(f"Post {j}: {str(b.get('direction')).upper()} | Entry: {b.get('entry_price')} | Current: {b.get('current_price')} | Wager: {b.get('wager')} | Mult: {b.get('multiplier')} | PnL: {b.get('pnl')}")
+        except Exception:
+            pass
 
+        print(f"Successfully parsed {len(active_bets)} active positions")
+        return active_bets
+
+    def _record_stage(self, stage: str):
+        """Close the current stage of the running trade: its duration and WebDriver call count go to
+        the 'trade.<stage>' latency histogram and to the per-trade timings."""
+        timer = self._stage_timer
+        if timer is not None:
+            timer.lap(stage)
+
+    def _mark_trace(self, name: str):
+        """Stamp `name` on the signal trace of the running trade, if any."""
+        trace = self._trace
+        if trace is not None:
+            trace.mark(name)
+
+    def is_busy(self) -> bool:
+        """True while another thread holds the driver (e.g. the signal worker mid-trade)."""
+        if self.driver_lock.acquire(blocking=False):
+            self.driver_lock.release()
+            return False
+        return True
 
-            # Post-processing: fill unknown directions, override wager when appropriate,
-            # and fix P&L sign from price movement if site omits minus sign
-            try:
-                # 1) Fill unknown directions using recent requested directions
-                unknown_idxs = [idx for idx, r in enumerate(active_bets) if r.get('direction') == 'unknown']
-                if unknown_idxs:
-                    recent = getattr(self, '_recent_directions', None)
-                    last_req = getattr(self, '_last_requested_direction', None)
-                    if len(active_bets) == 1 and last_req in ('up','down'):
-                        active_bets[0]['direction'] = last_req
-                        active_bets[0]['bias'] = 'Bullish' if last_req == 'up' else 'Bearish'
-                    elif isinstance(recent, list) and recent:
-                        # assign most recent directions to newest rows (end of list)
-                        order = list(range(len(active_bets) - 1, -1, -1))
-                        for offset, idx in enumerate(order):
-                            if active_bets[idx].get('direction') == 'unknown' and offset < len(recent):
-                                d = recent[-1 - offset]
-                                if d in ('up','down'):
-                                    active_bets[idx]['direction'] = d
-                                    active_bets[idx]['bias'] = 'Bullish' if d == 'up' else 'Bearish'
-                # 2) Override wager for a single recent trade to the last requested wager if wager looks tiny/noisy
-                if len(active_bets) == 1 and hasattr(self, '_last_requested_wager'):
-                    if active_bets[0].get('wager', 0) <= 0 or active_bets[0].get('wager', 0) < self._last_requested_wager / 2:
-                        active_bets[0]['wager'] = float(self._last_requested_wager)
-                # 3) Fix P&L sign using price movement + direction while preserving magnitude from display
-                # Only apply sign-fix when we had to calculate pnl (no trustworthy display value)
-                for bet in active_bets:
-                    if bet.get('pnl_source') == 'calc':
-                        d = bet.get('direction')
-                        e = float(bet.get('entry_price') or 0)
-                        c = float(bet.get('current_price') or 0)
-                        pnl_val = float(bet.get('pnl') or 0)
-                        if d in ('up','down') and e > 0 and c > 0:
-                            move = c - e
-                            sign = 1.0 if (d == 'up' and move >= 0) or (d == 'down' and move <= 0) else -1.0
-                            # If pnl is positive but sign is negative, flip; if pnl is negative but sign positive, abs
-                            if pnl_val >= 0 and sign < 0:
-                                bet['pnl'] = -abs(pnl_val)
-                            elif pnl_val <= 0 and sign > 0:
-                                bet['pnl'] = abs(pnl_val)
-            except Exception as _e:
-                print(f"post-process bets warning: {_e}")
-
-            # Debug summary after post-processing
+    def latency_report(self) -> str:
+        """p50/p95/p99 per trade stage since startup (or the last reset)."""
+        return self.latency.dump()
+
+    def _arm_order_ack(self) -> int:
+        """Install the in-page order acknowledgement watcher right before PLACE BET.
+        Returns the visible cash-out button count used as baseline, or -1 if arming failed."""
+        try:
+            baseline = self.driver.execute_script(_ORDER_ACK_ARM_JS, SELECTORS.get('cash_out_button', ''))
+            return int(baseline) if baseline is not None else -1
+        except Exception as e:
+            self.logger.warning(f"Order ack arm failed: {e}")
+            return -1
+
+    def _await_order_ack(self, timeout: float = None, ignore=()) -> dict:
+        """Wait for the armed watcher to see the order land. Resolves as soon as a new position row
+        appears ('position'), a new toast/alert shows ('toast'), a confirm modal opens ('modal') or the
+        page navigates ('navigation'); otherwise returns 'timeout' after ORDER_ACK_TIMEOUT seconds.
+        Kinds listed in `ignore` are skipped. Returns a dict with at least 'kind' and 'elapsed_ms'
+        (since arming)."""
+        from config import ORDER_ACK_TIMEOUT
+        timeout = ORDER_ACK_TIMEOUT if timeout is None else timeout
+        try:
+            res = self.driver.execute_async_script(_ORDER_ACK_WAIT_JS, int(timeout * 1000), list(ignore))
+            if isinstance(res, dict) and res.get('kind'):
+                return res
+            return {'kind': 'error', 'error': f'unexpected ack result: {res}'}
+        except Exception as e:
+            # A full navigation tears down the page script context mid-wait
             try:
-                for j, b in enumerate(active_bets):
-                    print(f"Post {j}: {str(b.get('direction')).upper()} | Entry: {b.get('entry_price')} | Current: {b.get('current_price')} | Wager: {b.get('wager')} | Mult: {b.get('multiplier')} | PnL: {b.get('pnl')}")
-            except Exception:
-                pass
+                if not self._is_on_trading_page():
+                    return {'kind': 'navigation', 'href': self.driver.current_url}
             except Exception:
                 pass
-
-
-            print(f"Successfully parsed {len(active_bets)} active positions")
-            return active_bets
-
-        except Exception as e:
-            print(f"Error getting active bets: {e}")
-            return []
-
-    def execute_trade(self, direction, wager, multiplier):
-        """Execute a complete trade using Buy/Sell toggle for direction with safe JS clicks and URL monitoring."""
-        print(f"⚡ EXECUTING TRADE: {direction.upper()}, ${wager}, {multiplier}x")
-        self.logger.info(f"EXECUTE_TRADE start | direction={direction} wager={wager} multiplier={multiplier}")
+            self.logger.warning(f"Order ack wait failed: {e}")
+            return {'kind': 'error', 'error': str(e)}
+
+    def _await_direction_state(self, up_el, down_el, label: str, timeout: float = None) -> str:
+        """Wait in-page until the Up/Down chip colors report `label` (or timeout) and return the
+        observed state ('UP', 'DOWN' or ''). Replaces a fixed post-click sleep plus a re-scan."""
+        from config import DIRECTION_ACK_TIMEOUT
+        timeout = DIRECTION_ACK_TIMEOUT if timeout is None else timeout
+        res = self.driver.execute_async_script(_DIRECTION_WAIT_JS, up_el, down_el, label, int(timeout * 1000))
+        return (res or {}).get('direction', '') if isinstance(res, dict) else ''
+
+    @_driver_locked
+    def execute_trade(self, direction, wager, multiplier, engine: str = None, trace: SignalTrace = None):
+        """Execute a complete trade with the selected execution engine.
+
+        engine (default config.EXECUTION_ENGINE):
+          - 'ui':   Buy/Sell toggle for direction with safe JS clicks and URL monitoring
+          - 'api':  one in-page POST to /private/trade (see place_order_via_api)
+          - 'auto': api first; falls back to the UI flow only for failure classes in API_UI_FALLBACK_ON
+
+        The structured result of the last API attempt is kept in self.last_order_result and
+        per-stage durations (seconds) of the attempt in self.last_trade_timings.
+
+        trace: optional SignalTrace of the signal that triggered the trade; it gets the exec_start,
+        click_issued and confirmed marks and is journaled into self.signal_stats when the trade ends.
+        """
+        from config import EXECUTION_ENGINE
+        engine = (engine or EXECUTION_ENGINE or 'ui').lower()
+        self._stage_timer = self.latency.timer('trade.')
+        calls_before = self.latency.driver_calls()
+        self._trace = trace
+        self._mark_trace('exec_start')
 
         # Remember last requested parameters so UI can label new positions reliably
         try:
@@ -1655,7 +3104,7 @@ class TradingInterface:
             self._last_requested_direction = d if d in ('up','down') else 'up'
             self._last_requested_wager = float(wager)
             # Keep a small history of recent directions
-            lst = getattr(self, '_recent_directions', [])
+            lst = list(self._recent_directions)
             lst.append(self._last_requested_direction)
             if len(lst) > 5:
                 lst = lst[-5:]
@@ -1663,117 +3112,330 @@ class TradingInterface:
         except Exception:
             pass
 
+        result = False
         try:
-            # 0. Ensure we're on the correct trading page
-            current_url = self.driver.current_url
-            print(f"📍 Current URL: {current_url}")
-            if not self._is_on_trading_page():
-                print("❌ Not on BTC trading page, navigating...")
-                self._ensure_on_trading_page()
-                self.logger.info("Navigated to trading page")
-
-            # 1. Set wager and multiplier
-            print("🔧 Setting wager and multiplier...")
-            if not self.set_wager(wager):
-                self.logger.error("Failed to set wager")
+            result = self._dispatch_trade(direction, wager, multiplier, engine)
+            return result
+        finally:
+            timer, self._stage_timer = self._stage_timer, None
+            timer.total()
+            self.last_trade_timings = dict(timer.laps)
+            self._bets_cache.invalidate()
+            self.logger.info("TRADE TIMINGS | " + " ".join(f"{k}={v * 1000:.0f}ms" for k, v in self.last_trade_timings.items())
+                             + f" | webdriver_calls={self.latency.driver_calls() - calls_before}")
+            self._trace = None
+            if trace is not None:
+                trace.direction = direction.lower()
+                self.record_signal(trace, 'confirmed' if 'confirmed' in trace.marks else ('placed' if result else 'failed'))
+
+    def record_signal(self, trace: SignalTrace, outcome: str):
+        """Close a signal trace: add its legs to the rolling stats and write its journal line."""
+        trace.outcome = outcome
+        self.signal_stats.record(trace)
+        self.logger.info("SIGNAL TRACE | " + json.dumps(trace.journal()))
+
+    def _dispatch_trade(self, direction, wager, multiplier, engine: str):
+        """Run the selected engine (see execute_trade); returns the engine's result.
+
+        In 'auto' mode an API failure goes to the UI flow only when the order cannot have been
+        taken: API_UI_FALLBACK_ON classes that failed before the request was sent, or
+        API_UI_FALLBACK_VERIFY classes once no new position showed up within ORDER_ACK_TIMEOUT."""
+        from config import API_UI_FALLBACK_ON, API_UI_FALLBACK_VERIFY, ORDER_ACK_TIMEOUT
+        if engine in ('api', 'auto'):
+            print(f"⚡ EXECUTING TRADE via API: {direction.upper()}, ${wager}, {multiplier}x")
+            before_count = self._count_open_positions() if engine == 'auto' else -1
+            order = self.place_order_via_api(direction, wager, multiplier)
+            self.last_order_result = order
+            self._record_stage('api')
+            if order.get('ok'):
+                self._mark_trace('confirmed')
+                print(f"✅ API order accepted (id={order.get('order_id')}, entry={order.get('entry_price')}, {order.get('latency_ms', 0):.0f}ms)")
+                return True
+            error_class = order.get('error_class')
+            print(f"❌ API order failed: {error_class} - {order.get('error')}")
+            if engine == 'api':
                 return False
-            if not self.set_multiplier(multiplier):
-                self.logger.error("Failed to set multiplier")
+            if error_class in API_UI_FALLBACK_ON and not order.get('sent'):
+                self.logger.warning(f"API engine failed before sending ({error_class}); falling back to UI flow")
+            elif error_class in API_UI_FALLBACK_VERIFY:
+                # The POST may have reached the exchange: only retry through the UI once no position appeared
+                appeared = self._new_position_since(before_count, ORDER_ACK_TIMEOUT)
+                self._record_stage('api_verify')
+                if appeared:
+                    self._mark_trace('confirmed')
+                    self.logger.warning(f"API engine reported {error_class} but a new position appeared; not retrying")
+                    return True
+                if appeared is None:
+                    self.logger.error(f"API engine failed ({error_class}) and positions could not be re-read; not retrying")
+                    return False
+                self.logger.warning(f"API engine failed ({error_class}) and no position appeared; falling back to UI flow")
+            else:
                 return False
-            self.logger.info(f"Inputs set | wager={wager} multiplier={multiplier}")
+        return self._execute_trade_ui(direction, wager, multiplier)
 
-            # 2. Select direction using robust chip discovery inside the order panel
-            print(f"🎯 Selecting direction {direction.upper()} within order panel...")
-            label = 'UP' if direction.lower() == 'up' else 'DOWN'
-            # Skip if already in desired state by chip color
-            state_before = ''
-            try:
-                state_before = self._get_direction_state_from_chips()
-            except Exception:
-                pass
-            if state_before != label:
-                chips = self._get_text_size_chip_candidates()
-                target_chip = chips.get(label)
-                if target_chip is None:
-                    # Fallback to radio-based controls if chips not identified
+    def _count_open_positions(self) -> int:
+        """Visible cash-out buttons in one round trip (see _CASHOUT_COUNT_JS); -1 if unreadable."""
+        try:
+            n = self.driver.execute_script(_CASHOUT_COUNT_JS, SELECTORS.get('cash_out_button', ''))
+            return int(n) if n is not None else -1
+        except Exception as e:
+            self.logger.warning(f"Open positions count failed: {e}")
+            return -1
+
+    def _new_position_since(self, before_count: int, wait: float = 0.0):
+        """Whether more positions are open than before_count, re-reading for up to `wait` seconds so a
+        slow row render still counts. None when either count is unknown (callers must not retry then)."""
+        if before_count is None or before_count < 0:
+            return None
+        deadline = time.monotonic() + max(0.0, wait)
+        while True:
+            count = self._count_open_positions()
+            if count < 0:
+                return None
+            if count > before_count:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.2)
+
+    def _prepare_order_ticket(self, direction, wager, multiplier):
+        """Steps 0-2 of the UI flow: trading page, wager/multiplier inputs, direction chip.
+        Returns (controls, control_state) from the control registry ({} and {} when it failed), or
+        None when the order must be aborted."""
+        label = 'UP' if direction.lower() == 'up' else 'DOWN'
+        self._ticket.clear()
+        # 0. Ensure we're on the correct trading page
+        current_url = self.driver.current_url
+        print(f"📍 Current URL: {current_url}")
+        if not self._is_trading_href(current_url):
+            self.logger.warning(f"Not on the {self.instrument} trading page, navigating...")
+            self._ensure_on_trading_page()
+            self.logger.info("Navigated to trading page")
+
+        # Resolve every order control (inputs, chips, PLACE BET) and their state in one call.
+        # An empty result means the registry script failed; each step then uses its own locator.
+        controls = self._resolve_order_controls()
+        control_state = controls.get('state') or {}
+        self._record_stage('page_check')
+
+        # 1. Set wager and multiplier (one atomic call; unchanged fields cost nothing)
+        print("🔧 Setting wager and multiplier...")
+        inputs = self.set_order_inputs(wager, multiplier, controls.get('wager_input'), controls.get('multiplier_input'))
+        self._record_stage('set_inputs')
+        for field, value, setter, element in (
+            ('wager', wager, self.set_wager, controls.get('wager_input')),
+            ('multiplier', multiplier, self.set_multiplier, controls.get('multiplier_input')),
+        ):
+            result = (inputs or {}).get(field) or {}
+            if result.get('ok'):
+                continue
+            if inputs is not None and not result.get('found'):
+                self.logger.error(f"Failed to set {field}: input not found")
+                return None
+            # Atomic set failed or did not stick; retry this field the slow way
+            ok = setter(value, element=element)
+            self._record_stage(f'set_{field}')
+            if not ok:
+                self.logger.error(f"Failed to set {field}")
+                return None
+        self.logger.info(f"Inputs set | wager={wager} multiplier={multiplier} | {inputs}")
+
+        # 2. Select direction using robust chip discovery inside the order panel
+        print(f"🎯 Selecting direction {direction.upper()} within order panel...")
+        # Skip if already in desired state by chip color
+        state_before = ''
+        try:
+            state_before = control_state.get('direction', '') if controls else self._get_direction_state_from_chips()
+        except Exception:
+            pass
+        # The registry already read the chips; only fall back to a re-scan without it
+        state_after = state_before if (controls and state_before == label) else None
+        if state_before != label:
+            if controls:
+                target_chip = controls.get(label.lower())
+            else:
+                target_chip = self._get_text_size_chip_candidates().get(label)
+            if target_chip is None:
+                # Fallback to radio-based controls if chips not identified
+                selected = False
+                try:
+                    selected = self._find_and_select_radio_direction(label) or self._find_and_select_role_radio_direction(label)
+                except Exception:
                     selected = False
+                if not selected:
+                    print("❌ Could not locate a reliable direction control; aborting to avoid wrong-side order")
+                    return None
+            else:
+                try:
+                    self._javascript_click(target_chip, description=f"Chip {label}", prevent_default_if_link=False)
+                    self._record_stage('chip_click')
+                except Exception as e:
+                    self.logger.error(f"Chip click failed for {label}: {e}")
+                    print("❌ Could not click direction chip; aborting")
+                    return None
+                # Wait for the chip colors to flip instead of sleeping a fixed interval
+                if controls:
                     try:
-                        selected = self._find_and_select_radio_direction(label) or self._find_and_select_role_radio_direction(label)
-                    except Exception:
-                        selected = False
-                    if not selected:
-                        print("❌ Could not locate a reliable direction control; aborting to avoid wrong-side order")
-                        return False
-                else:
-                    try:
-                        self._javascript_click(target_chip, description=f"Chip {label}", prevent_default_if_link=False)
-                        time.sleep(0.3)
+                        state_after = self._await_direction_state(controls.get('up'), controls.get('down'), label)
                     except Exception as e:
-                        self.logger.error(f"Chip click failed for {label}: {e}")
-                        print("❌ Could not click direction chip; aborting")
-                        return False
-            # Verify desired state after click
-            try:
+                        self.logger.warning(f"Direction wait failed, re-scanning chips: {e}")
+                        state_after = None
+        # Verify desired state after click
+        try:
+            if state_after is None:
                 state_after = self._get_direction_state_from_chips()
-                if state_after and state_after != label:
-                    self.logger.error(f"Direction chip mismatch: have {state_after}, want {label}")
-                    print("❌ Direction verification failed; aborting to avoid wrong-side order")
+            if state_after and state_after != label:
+                self.logger.error(f"Direction chip mismatch: have {state_after}, want {label}")
+                print("❌ Direction verification failed; aborting to avoid wrong-side order")
+                return None
+        except Exception:
+            pass
+        self._record_stage('direction')
+        return controls, control_state
+
+    def _reuse_order_ticket(self, label: str, wager, multiplier):
+        """Fast path for repeat trades. If the last confirmed ticket is still on the page with the
+        same wager and multiplier, one in-page check replaces the page check, control lookup and
+        input setting; a changed side only costs the chip click. Returns (controls, ack baseline or
+        None when not armed yet), or None to take the full flow."""
+        ticket = self._ticket
+        if not ticket or ticket.get('instrument') != self.instrument:
+            return None
+        controls = ticket['controls']
+        want = {'wager': str(wager), 'multiplier': str(multiplier), 'direction': label}
+        try:
+            res = self.driver.execute_script(
+                "function __sentinelArmAck(){" + _ORDER_ACK_ARM_JS + "}\n" + _TICKET_CHECK_JS,
+                controls, want, SELECTORS.get('cash_out_button', '')
+            ) or {}
+        except Exception as e:
+            # Stale element handles land here after a re-render
+            self.logger.info(f"Order ticket check failed, taking full flow: {e}")
+            res = {}
+        if not (res.get('attached') and res.get('wager_ok') and res.get('multiplier_ok') and res.get('place_bet_ok')
+                and self._is_trading_href(res.get('href'))):
+            self.logger.info(f"Order ticket invalid, taking full flow: {res}")
+            ticket.clear()
+            return None
+        self._record_stage('ticket_check')
+        if res.get('direction') == label:
+            return controls, res.get('baseline')
+        try:
+            self._javascript_click(controls[label.lower()], description=f"Chip {label}", prevent_default_if_link=False)
+            self._record_stage('chip_click')
+            state = self._await_direction_state(controls['up'], controls['down'], label)
+        except NavigationRedirectedError:
+            raise
+        except Exception as e:
+            self.logger.warning(f"Cached chip click failed, taking full flow: {e}")
+            state = ''
+        self._record_stage('direction')
+        if state != label:
+            ticket.clear()
+            return None
+        ticket['direction'] = label
+        return controls, None
+
+    def _remember_order_ticket(self, label: str, wager, multiplier, controls: dict):
+        """Keep the ticket of a confirmed order for _reuse_order_ticket (needs registry handles)."""
+        handles = {k: controls.get(k) for k in ('wager_input', 'multiplier_input', 'up', 'down', 'place_bet')}
+        if any(v is None for v in handles.values()):
+            self._ticket.clear()
+            return
+        self._ticket.clear()
+        self._ticket.update(instrument=self.instrument, wager=str(wager), multiplier=str(multiplier),
+                            direction=label, controls=handles)
+
+    def _execute_trade_ui(self, direction, wager, multiplier):
+        """UI click flow behind execute_trade: inputs, direction chip, PLACE BET, event-driven acknowledgement.
+        A repeat of the last confirmed ticket skips straight to PLACE BET (see _reuse_order_ticket)."""
+        print(f"⚡ EXECUTING TRADE: {direction.upper()}, ${wager}, {multiplier}x")
+        self.logger.info(f"EXECUTE_TRADE start | direction={direction} wager={wager} multiplier={multiplier}")
+        label = 'UP' if direction.lower() == 'up' else 'DOWN'
+
+        try:
+            armed_baseline = None
+            reused = self._reuse_order_ticket(label, wager, multiplier)
+            if reused is not None:
+                print("♻️ Order ticket unchanged; skipping page check, inputs and direction")
+                controls, armed_baseline = reused
+                control_state = {'place_bet_enabled': True, 'place_bet_displayed': True}
+            else:
+                prepared = self._prepare_order_ticket(direction, wager, multiplier)
+                if prepared is None:
                     return False
-            except Exception:
-                pass
+                controls, control_state = prepared
 
             # 3. Click PLACE BET using JS with navigation guard
             print("🎯 Clicking PLACE BET button...")
             try:
+                # First click attempt reuses the registry handle; retries re-resolve after any navigation
+                registry_handles = [controls['place_bet']] if controls.get('place_bet') is not None else []
                 def get_place_bet():
+                    if registry_handles:
+                        return registry_handles.pop()
                     el = self._find_place_bet_button()
                     if el is None:
                         raise Exception('PLACE BET button not found')
                     return el
-                place_bet_button = get_place_bet()
-                if place_bet_button.is_enabled() and place_bet_button.is_displayed():
-                    before_count = self._get_open_positions_count()
-                    self._javascript_click(get_place_bet, description="PLACE BET")
+                if registry_handles:
+                    place_bet_button = registry_handles[0]
+                    clickable = bool(control_state.get('place_bet_enabled')) and bool(control_state.get('place_bet_displayed'))
+                else:
+                    place_bet_button = get_place_bet()
+                    clickable = place_bet_button.is_enabled() and place_bet_button.is_displayed()
+                if clickable:
+                    before_count = armed_baseline if armed_baseline is not None else self._arm_order_ack()
+                    self._javascript_click(get_place_bet, description="PLACE BET", idempotent=False)
+                    self._mark_trace('click_issued')
                     print(f"✅ {direction.upper()} trade executed (click issued)!")
-                    time.sleep(1.5)
+                    self._record_stage('place_bet')
 
-                    # If confirmation modal appears, confirm
-                    try:
-                        confirmed = self._confirm_order_if_needed()
-                        if confirmed:
-                            print("✅ Confirmed order in modal")
-                            self.logger.info("Order confirmation modal handled")
-                            time.sleep(1)
-                    except Exception as e:
-                        self.logger.warning(f"No/Failed order confirmation: {e}")
+                    # Event-driven acknowledgement: returns as soon as the page reacts
+                    ack = self._await_order_ack()
+                    self._record_stage('ack')
 
-                    # Post-check: positions count or toast
-                    after_count = self._get_open_positions_count()
-                    if after_count > before_count:
-                        self.logger.info(f"Positions increased: {before_count} -> {after_count}")
-                    else:
-                        # As last resort, call site API with captured schema (buy flag) to avoid UI redirects
+                    # If confirmation modal appears, confirm and keep waiting for the position
+                    if ack.get('kind') == 'modal':
                         try:
-                            api_ok = self._place_trade_via_api(direction, wager, multiplier)
-                            if api_ok:
-                                print("✅ API trade placed as fallback")
-                                self.logger.info("Fallback API trade placed")
-                                time.sleep(1)
-                                after_count = self._get_open_positions_count()
+                            confirmed = self._confirm_order_if_needed()
+                            if confirmed:
+                                print("✅ Confirmed order in modal")
+                                self.logger.info("Order confirmation modal handled")
                         except Exception as e:
-                            self.logger.error(f"Fallback API trade error: {e}")
-                        msg = self._find_toast_or_error()
-                        if msg:
-                            self.logger.warning(f"Post-place message: {msg}")
-                            print(f"⚠️ Site message: {msg}")
-                        # As a direct fallback try sending Enter to PLACE BET button to trigger form submit
-                        if after_count == before_count:
-                            try:
-                                place_bet_button.send_keys(Keys.ENTER)
+                            self.logger.warning(f"No/Failed order confirmation: {e}")
+                        ack = self._await_order_ack(ignore=('modal',))
+                        self._record_stage('confirm')
+                    # A toast can precede the new row (e.g. "bet placed"); give the row a short grace period
+                    if ack.get('kind') == 'toast':
+                        from config import ORDER_ACK_TOAST_GRACE
+                        toast_ack = ack
+                        ack = self._await_order_ack(timeout=ORDER_ACK_TOAST_GRACE, ignore=('modal', 'toast'))
+                        if ack.get('kind') != 'position':
+                            ack = toast_ack
+                        self._record_stage('ack')
+                    self.logger.info(f"Order ack: {ack}")
 
-                                time.sleep(1)
-                            except Exception:
-                                pass
+                    # Post-check: positions count or toast
+                    placed = ack.get('kind') == 'position'
+                    if placed:
+                        self.logger.info(f"Positions increased: {before_count} -> {ack.get('count')}")
+                    else:
+                        if ack.get('kind') == 'toast' and ack.get('text'):
+                            self.logger.warning(f"Post-place message: {ack.get('text')}")
+                            print(f"⚠️ Site message: {ack.get('text')}")
+                        elif ack.get('kind') != 'toast':
+                            msg = self._find_toast_or_error()
+                            if msg:
+                                self.logger.warning(f"Post-place message: {msg}")
+                                print(f"⚠️ Site message: {msg}")
+                        placed = self._fallback_place(direction, wager, multiplier, before_count, place_bet_button)
+
+                    if placed:
+                        self._mark_trace('confirmed')
+                        self._remember_order_ticket(label, wager, multiplier, controls)
+                    else:
+                        self._ticket.clear()
 
                     # Dump any captured trading requests to identify direction encoding
                     try:
@@ -1786,13 +3448,12 @@ class TradingInterface:
                     print(f"📍 Final URL: {final_url}")
                     self.logger.info(f"Final URL after PLACE BET: {final_url}")
 
-                    if self._is_on_trading_page():
+                    if self._is_trading_href(final_url):
                         print("✅ Remained on trading page - trade flow completed")
-                        return after_count > before_count or True
                     else:
                         self.logger.warning("URL changed after PLACE BET; returning to trading page")
                         self._ensure_on_trading_page()
-                        return after_count > before_count or True
+                    return placed
                 else:
                     print("❌ PLACE BET button not clickable")
                     self.logger.error("PLACE BET button not clickable")
@@ -1814,11 +3475,98 @@ class TradingInterface:
             self.logger.error(f"Trade execution failed: {e}")
             return False
 
+    def _fallback_place(self, direction, wager, multiplier, before_count: int, place_bet_button) -> bool:
+        """PLACE BET was clicked but no position row was seen. Re-check the positions count against
+        before_count first: the click may have landed after the ack wait. Only when provably no new
+        position exists (on the trading page, both counts known) is ONE fallback tried: the site API
+        with the captured schema when USE_API_FALLBACK is on, else Enter on PLACE BET. Returns
+        whether the order is known to be placed."""
+        from config import ORDER_ACK_TOAST_GRACE, USE_API_FALLBACK
+        appeared = self._new_position_since(before_count, ORDER_ACK_TOAST_GRACE) if self._is_on_trading_page() else None
+        self._record_stage('ack_verify')
+        if appeared:
+            self.logger.info(f"New position appeared after the ack wait (baseline {before_count})")
+            return True
+        if appeared is None:
+            self.logger.error("No order ack and positions could not be re-checked; not retrying")
+            return False
+        placed = False
+        if USE_API_FALLBACK:
+            # Call site API with captured schema (buy flag) to avoid UI redirects
+            placed = self._place_trade_via_api(direction, wager, multiplier)
+            if placed:
+                print("✅ API trade placed as fallback")
+                self.logger.info("Fallback API trade placed")
+            self._record_stage('api_fallback')
+        else:
+            # Send Enter to PLACE BET to trigger the form submit
+            try:
+                self._arm_order_ack()
+                place_bet_button.send_keys(Keys.ENTER)
+                placed = self._await_order_ack().get('kind') == 'position'
+            except Exception as e:
+                self.logger.error(f"Enter fallback error: {e}")
+            self._record_stage('enter_fallback')
+        return placed
+
+    @_driver_locked
     def close_all_trades(self):
-        """Close all active trades by clicking all CASH OUT buttons SIMULTANEOUSLY"""
+        """Close all active trades by clicking all CASH OUT buttons SIMULTANEOUSLY.
+
+        One in-page call clicks every visible cash-out button in the same JS tick, then waits for
+        their position rows to disappear (up to CLOSE_ALL_TIMEOUT). Per-position results and timings
+        are kept in self.last_close_all_result. The one-by-one WebDriver fallback runs only when the
+        script provably clicked nothing, so no position gets a second cash-out click.
+        """
+        from config import CLOSE_ALL_TIMEOUT
+        self._bets_cache.invalidate()  # lock held until we return, so nobody reloads it in between
         try:
             print("🚨 CLOSING ALL TRADES SIMULTANEOUSLY...")
+            selector = ', '.join(s for s in (SELECTORS.get('cash_out_button'), '.css-nja62m') if s)
+            started = time.monotonic()
+            run_id = f"{started:.6f}"
+            try:
+                res = self.driver.execute_async_script(_CLOSE_ALL_JS, selector, int(CLOSE_ALL_TIMEOUT * 1000), run_id)
+            except Exception as e:
+                self.logger.warning(f"Single-dispatch close-all failed: {e}")
+                res = None
+            if not isinstance(res, dict) or 'clicked' not in res:
+                # The wait failed; whether the clicks went out is on the page
+                try:
+                    clicked = self.driver.execute_script(_CLOSE_ALL_PROBE_JS, run_id)
+                except Exception as e:
+                    self.logger.error(f"Close-all outcome unknown, not clicking again: {e}")
+                    return False
+                if clicked is None:
+                    self.logger.warning("Single-dispatch close-all never ran; clicking one by one")
+                    return self._close_all_trades_webdriver()
+                self.logger.warning(f"Close-all clicked {clicked} cash-out button(s) but its wait failed")
+                return int(clicked) > 0
+            res['wall_ms'] = (time.monotonic() - started) * 1000.0
+            self.last_close_all_result = res
+
+            results = res.get('results') or []
+            if not results:
+                print("No active trades to close")
+                return True
+            for r in results:
+                state = 'closed' if r.get('closed') else ('clicked' if r.get('ok') else f"error: {r.get('error')}")
+                print(f"  row {r.get('index')}: {state} | {(r.get('row_text') or '').replace(chr(10), ' ')[:80]}")
+            print(
+                f"⚡ Closed {sum(1 for r in results if r.get('closed'))}/{len(results)} trades "
+                f"(clicks in {res.get('clicked_ms', 0):.0f}ms, settled in {res.get('elapsed_ms', 0):.0f}ms, "
+                f"wall {res['wall_ms']:.0f}ms{', TIMED OUT' if res.get('timed_out') else ''})"
+            )
+            self.logger.info(f"close_all_trades | {res}")
+            return res.get('clicked', 0) > 0
+
+        except Exception as e:
+            print(f"❌ Error closing all trades: {e}")
+            return False
 
+    def _close_all_trades_webdriver(self):
+        """Legacy close-all: one WebDriver round trip per button check and click (fallback only)."""
+        try:
             # Find all CASH OUT buttons
             cash_out_buttons = self.driver.find_elements(By.CSS_SELECTOR, '.css-nja62m')
 
@@ -1846,51 +3594,34 @@ class TradingInterface:
             print(f"❌ Error closing all trades: {e}")
             return False
 
-    def close_trade(self, position_id: int) -> bool:
-        """Attempt to close a single trade identified by its row index (0-based)."""
+    @_driver_locked
+    def close_trade(self, position_id) -> bool:
+        """Close a single trade by its stable id (bet['id'] from get_active_bets) or, for older
+        callers, by row index (0-based, resolved to that row's position in the current snapshot).
+        The row is found in-page by its unchanging cells (or its row token), so rows that closed or
+        moved since the caller's snapshot don't redirect the click."""
         try:
-            rows = self.driver.find_elements(By.CSS_SELECTOR, 'tbody tr')
-            if not rows:
-                rows = self.driver.find_elements(By.CSS_SELECTOR, 'tr[class*="css-"]')
-            if position_id < 0 or position_id >= len(rows):
-                print(f"close_trade: invalid position_id {position_id}, rows={len(rows)}")
+            # Current row index and static cells of that position; the row is matched in-page by
+            # its cells, so a snapshot within the cache TTL is as good as a fresh one
+            bets = self._bets_cache.get(self._load_active_bets)
+            if isinstance(position_id, str):
+                bet = next((b for b in bets if b.get('id') == position_id), None)
+            else:
+                bet = next((b for b in bets if b.get('row_index') == int(position_id)), None)
+            if bet is None:
+                print(f"close_trade: position {position_id} no longer open")
                 return False
-            row = rows[position_id]
-            sel = SELECTORS.get('cash_out_button', '')
-            btn = None
-            try:
-                if sel:
-                    for b in row.find_elements(By.CSS_SELECTOR, sel):
-                        if b.is_displayed() and b.is_enabled():
-                            btn = b
-                            break
-            except Exception:
-                pass
-            if btn is None:
-                try:
-                    for b in row.find_elements(By.XPATH, ".//button[contains(translate(., 'cash out', 'CASH OUT'), 'CASH OUT')]"):
-                        if b.is_displayed() and b.is_enabled():
-                            btn = b
-                            break
-                except Exception:
-                    pass
-            if btn is None:
-                print("close_trade: cash out button not found in row")
+            index, match = bet.get('row_index', -1), bet.get('match') or {}
+            token = '' if match else bet.get('token') or ''
+            self._bets_cache.invalidate()
+            res = self.driver.execute_script(
+                _CLOSE_POSITION_JS, SELECTORS.get('cash_out_button', ''), index, match, token
+            ) or {}
+            if not res.get('closed'):
+                print(f"close_trade: {res.get('reason', 'failed')} (position {position_id}, row {index}, rows={res.get('rows')})")
                 return False
-            btn.click()
+            self.logger.info(f"Closed position {position_id} at row {res.get('index')}")
             return True
         except Exception as e:
             print(f"close_trade error: {e}")
             return False
-
-
-
-
-
-
-
-
-
-
-
-